@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from tests.utils import run_server
+from uvicorn.bench import http
+from uvicorn.bench.app import app
+from uvicorn.bench.main import main
+from uvicorn.config import Config
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("scenario", list(http.SCENARIOS))
+async def test_run_load(http_protocol_cls: type, unused_tcp_port: int, scenario: str):
+    config = Config(app=app, http=http_protocol_cls, lifespan="off", port=unused_tcp_port)
+    async with run_server(config):
+        stats = await http.run_load(
+            "127.0.0.1", unused_tcp_port, http.SCENARIOS[scenario], duration=0.1, connections=2, idle_connections=2
+        )
+    assert stats.requests > 0
+    assert stats.errors == 0
+    assert len(stats.latencies) == stats.requests
+
+
+async def test_run_load_connection_refused(unused_tcp_port: int):
+    stats = await http.run_load(
+        "127.0.0.1", unused_tcp_port, http.SCENARIOS["keep-alive"], duration=0.1, connections=2, idle_connections=0
+    )
+    assert stats.requests == 0
+    assert stats.errors == 2
+
+
+def test_http_command(tmp_path: Path):
+    runner = CliRunner()
+    output = tmp_path / "results.json"
+    args = ["http", "--http", "h11", "--scenario", "keep-alive", "--duration", "0.2", "--connections", "2"]
+    result = runner.invoke(main, [*args, "--output", str(output)])
+    assert result.exit_code == 0, result.output
+    document = json.loads(output.read_text())
+    [benchmark_result] = document["results"]
+    assert benchmark_result["benchmark"] == "http"
+    assert benchmark_result["requests"] > 0
+    assert benchmark_result["metrics"]["requests_per_second"] > 0
+
+    # Results worse than the baseline fail the run.
+    benchmark_result["metrics"]["requests_per_second"] *= 100
+    output.write_text(json.dumps(document))
+    result = runner.invoke(main, [*args, "--baseline", str(output)])
+    assert result.exit_code == 1
+    assert "Regression: http/keep-alive/h11: requests_per_second" in result.output
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from uvicorn.bench import micro
+from uvicorn.bench.main import HTTP_IMPLEMENTATIONS, WS_IMPLEMENTATIONS, get_installed, main
+
+
+@pytest.mark.parametrize("implementation", get_installed(HTTP_IMPLEMENTATIONS))
+def test_run_http(implementation: str):
+    result = micro.run_http(implementation, requests=100)
+    metrics = result["metrics"]
+    expected = metrics["receive_ns_per_request"] + metrics["respond_ns_per_request"]
+    assert metrics["ns_per_request"] == pytest.approx(expected)
+    assert metrics["receive_peak_bytes_per_request"] > 0
+    assert metrics["respond_peak_bytes_per_request"] > 0
+
+
+@pytest.mark.parametrize("implementation", get_installed(WS_IMPLEMENTATIONS))
+def test_run_websocket(implementation: str):
+    result = micro.run_websocket(implementation, messages=100)
+    assert result["scenario"] == "websocket-echo"
+    assert result["metrics"]["ns_per_message"] > 0
+    assert result["metrics"]["peak_bytes_per_message"] > 0
+
+
+def test_run_proxy_headers():
+    result = micro.run_proxy_headers(requests=100, networks=300, clients=70000)
+    assert result["scenario"] == "proxy-headers"
+    assert result["metrics"]["ns_per_request"] > 0
+
+
+@pytest.mark.parametrize("length", [5, 300, 70000])
+def test_client_frame(length: int):
+    frame = micro.client_frame(b"x" * length, opcode=0x2)
+    assert frame[0] == 0x82
+    assert frame[1] & 0x80
+    assert frame.endswith(b"\x00\x00\x00\x00" + b"x" * length)
+
+
+def test_micro_command(tmp_path: Path):
+    output = tmp_path / "results.json"
+    result = CliRunner().invoke(
+        main, ["micro", "--http", "h11", "--ws", "wsproto", "--iterations", "50", "--output", str(output)]
+    )
+    assert result.exit_code == 0, result.output
+    results = json.loads(output.read_text())["results"]
+    assert [(result["scenario"], result["implementation"]) for result in results] == [
+        ("http", "h11"),
+        ("websocket-echo", "wsproto"),
+    ]
+
+    # All installed implementations are benchmarked by default.
+    result = CliRunner().invoke(main, ["micro", "--iterations", "50", "--output", str(output)])
+    assert result.exit_code == 0, result.output
+    expected = len(get_installed(HTTP_IMPLEMENTATIONS)) + len(get_installed(WS_IMPLEMENTATIONS)) + 1
+    assert len(json.loads(output.read_text())["results"]) == expected
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import os
+
+from uvicorn.bench.results import compare, get_cpu_time, get_peak_memory, percentile
+
+
+def test_percentile():
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([], 50) == 0
+
+
+def test_compare():
+    baseline = [
+        {
+            "benchmark": "http",
+            "scenario": "keep-alive",
+            "implementation": "h11",
+            "metrics": {"requests_per_second": 1000, "latency_p99_ms": 10, "max_rss_kib": None},
+        }
+    ]
+    results = [
+        {
+            "benchmark": "http",
+            "scenario": "keep-alive",
+            "implementation": "h11",
+            "metrics": {"requests_per_second": 950, "latency_p99_ms": 12, "max_rss_kib": 1000},
+        },
+        {"benchmark": "http", "scenario": "upload", "implementation": "h11", "metrics": {"requests_per_second": 1}},
+    ]
+    assert compare(results, baseline, tolerance=0.1) == ["http/keep-alive/h11: latency_p99_ms 12 (baseline 10)"]
+    assert compare(results, baseline, tolerance=0.01) == [
+        "http/keep-alive/h11: requests_per_second 950 (baseline 1000)",
+        "http/keep-alive/h11: latency_p99_ms 12 (baseline 10)",
+    ]
+
+
+def test_get_peak_memory():
+    peak_memory = get_peak_memory(os.getpid())
+    assert peak_memory is None or peak_memory > 0
+    rss = get_peak_memory(os.getpid(), "VmRSS")
+    assert rss is None or 0 < rss <= peak_memory  # type: ignore[operator]
+
+
+def test_get_cpu_time():
+    cpu_time = get_cpu_time(os.getpid())
+    assert cpu_time is None or cpu_time > 0
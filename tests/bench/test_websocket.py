@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import zlib
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from tests.utils import run_server
+from uvicorn.bench import websocket
+from uvicorn.bench.app import app
+from uvicorn.bench.main import main
+from uvicorn.bench.micro import client_frame
+from uvicorn.config import Config
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("scenario", list(websocket.SCENARIOS))
+async def test_run_load(ws_protocol_cls: type, unused_tcp_port: int, scenario: str):
+    config = Config(app=app, ws=ws_protocol_cls, lifespan="off", port=unused_tcp_port)
+    stats = websocket.LoadStats()
+    async with run_server(config):
+        clients = await websocket.connect("127.0.0.1", unused_tcp_port, websocket.SCENARIOS[scenario], 2, stats)
+        await websocket.run_load(clients, websocket.SCENARIOS[scenario], 0.1, stats)
+        for client in clients:
+            client.close()
+    assert stats.messages > 0
+    assert stats.errors == 0
+    # Each broadcast message is counted once per connection it is delivered to.
+    assert len(stats.latencies) * (2 if scenario == "broadcast" else 1) == stats.messages
+
+
+async def test_echo_message(unused_tcp_port: int):
+    config = Config(app=app, ws="wsproto", lifespan="off", port=unused_tcp_port)
+    async with run_server(config):
+        client = await websocket.Client.connect("127.0.0.1", unused_tcp_port, "/", deflate=True)
+        for payload in [b"Hello", b"x" * 70000]:
+            client.send(payload, fragments=3)
+            assert await client.receive() == payload
+        client.writer.write(client_frame(b"\x00\x01", opcode=0x2))
+        assert await client.receive() == b"\x00\x01"
+        client.close()
+
+
+@pytest.mark.parametrize("options", [{"ws": "none"}, {"ws": "wsproto", "ws_per_message_deflate": False}])
+async def test_connect_failed(unused_tcp_port: int, options: dict[str, str | bool]):
+    config = Config(app=app, lifespan="off", port=unused_tcp_port, **options)  # type: ignore[arg-type]
+    stats = websocket.LoadStats()
+    async with run_server(config):
+        clients = await websocket.connect("127.0.0.1", unused_tcp_port, websocket.SCENARIOS["deflate"], 2, stats)
+    assert clients == []
+    assert stats.errors == 2
+
+
+async def test_run_load_connection_refused(unused_tcp_port: int):
+    stats = websocket.LoadStats()
+    clients = await websocket.connect("127.0.0.1", unused_tcp_port, websocket.SCENARIOS["broadcast"], 2, stats)
+    await websocket.run_load(clients, websocket.SCENARIOS["broadcast"], 0.1, stats)
+    assert stats.messages == 0
+    assert stats.errors == 2
+
+
+class FakeWriter:
+    def __init__(self) -> None:
+        self.written = b""
+
+    def write(self, data: bytes) -> None:
+        self.written += data
+
+
+async def test_receive_control_frames():
+    reader = asyncio.StreamReader()
+    writer = FakeWriter()
+    client = websocket.Client(reader, writer, client_max_window_bits=15)  # type: ignore[arg-type]
+    compressor = zlib.compressobj(wbits=-15)
+    compressed = compressor.compress(b"x" * 70000) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    reader.feed_data(b"\x89\x04ping" + b"\x8a\x04pong")
+    reader.feed_data(b"\xc1\x7f" + (len(compressed) - 4).to_bytes(8, "big") + compressed[:-4])
+    reader.feed_data(b"\x88\x02\x03\xe8")
+    assert await client.receive() == b"x" * 70000
+    # Pings are answered, and pongs ignored.
+    assert writer.written == b"\x8a\x84\x00\x00\x00\x00ping"
+    with pytest.raises(ConnectionError):
+        await client.receive()
+
+
+def test_websocket_command(tmp_path: Path):
+    output = tmp_path / "results.json"
+    args = ["websocket", "--ws", "wsproto", "--scenario", "echo", "--duration", "0.2", "--connections", "2"]
+    result = CliRunner().invoke(main, [*args, "--output", str(output)])
+    assert result.exit_code == 0, result.output
+    [benchmark_result] = json.loads(output.read_text())["results"]
+    assert benchmark_result["benchmark"] == "websocket"
+    assert benchmark_result["errors"] == 0
+    assert benchmark_result["messages"] > 0
+    assert benchmark_result["metrics"]["messages_per_second"] > 0
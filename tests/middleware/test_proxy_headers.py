@@ -11,7 +11,7 @@ from tests.response import Response
 from tests.utils import run_server
 from uvicorn._types import ASGIReceiveCallable, ASGISendCallable, Scope
 from uvicorn.config import Config
-from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware, _TrustedHosts
+from uvicorn.middleware.proxy_headers import TRUSTED_HOSTS_CACHE_SIZE, ProxyHeadersMiddleware, _TrustedHosts
 
 if TYPE_CHECKING:
     from uvicorn.protocols.http.h11_impl import H11Protocol
@@ -341,6 +341,44 @@ def test_forwarded_hosts(init_hosts: str | list[str], test_host: str, expected:
     assert (test_host in trusted_hosts) is expected
 
 
+@pytest.mark.parametrize(
+    ("test_host", "expected"),
+    [
+        ("10.0.0.1", True),
+        ("10.255.255.255", True),
+        ("11.0.0.1", False),
+        ("172.16.5.4", True),
+        ("172.32.0.1", False),
+        ("192.168.7.1", False),
+        ("192.168.8.1", True),
+        ("203.0.113.7", True),
+        ("203.0.113.8", False),
+        ("2001:db8:1::1", True),
+        ("2001:db8:2::1", False),
+        ("::ffff:10.0.0.1", False),
+        ("fe80::1%eth0", True),
+    ],
+)
+def test_forwarded_hosts_networks(test_host: str, expected: bool) -> None:
+    networks = [f"192.168.{index}.0/24" for index in range(8, 256)]
+    trusted_hosts = _TrustedHosts(["10.0.0.0/8", "172.16.0.0/12", "203.0.113.7/32", "2001:db8:1::/48", "fe80::/10"])
+    trusted_hosts_with_many_networks = _TrustedHosts([*networks, "10.0.0.0/8", "172.16.0.0/12", "203.0.113.7/32"])
+    assert (test_host in trusted_hosts) is (expected and not test_host.startswith("192.168."))
+    if ":" not in test_host:
+        assert (test_host in trusted_hosts_with_many_networks) is expected
+
+
+def test_forwarded_hosts_cache() -> None:
+    trusted_hosts = _TrustedHosts(["10.0.0.0/8", "unix:///foo/bar"])
+    for _ in range(2):
+        assert "10.0.0.1" in trusted_hosts
+        assert "unix:///foo/bar" in trusted_hosts
+    assert trusted_hosts._is_trusted.cache_info().hits == 2
+    for index in range(TRUSTED_HOSTS_CACHE_SIZE * 2):
+        assert f"192.0.{index // 256}.{index % 256}" not in trusted_hosts
+    assert trusted_hosts._is_trusted.cache_info().currsize == TRUSTED_HOSTS_CACHE_SIZE
+
+
 @pytest.mark.anyio
 @pytest.mark.parametrize(
     ("trusted_hosts", "expected"),
@@ -426,6 +464,21 @@ async def test_proxy_headers_multiple_proxies(trusted_hosts: str | list[str], ex
     assert response.text == expected
 
 
+@pytest.mark.anyio
+async def test_proxy_headers_repeated() -> None:
+    async with make_httpx_client("127.0.0.1") as client:
+        headers = [
+            (X_FORWARDED_FOR, "1.2.3.4"),
+            (X_FORWARDED_PROTO, "https"),
+            (X_FORWARDED_FOR, "5.6.7.8"),
+            (X_FORWARDED_PROTO, "wss"),
+        ]
+        response = await client.get("/", headers=headers)
+    assert response.status_code == 200
+    # As with the other headers, the last of repeated proxy headers is used.
+    assert response.text == "wss://5.6.7.8:0"
+
+
 @pytest.mark.anyio
 async def test_proxy_headers_invalid_x_forwarded_for() -> None:
     async with make_httpx_client("*") as client:
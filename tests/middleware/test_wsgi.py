@@ -1,15 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 import io
 import sys
-from collections.abc import AsyncGenerator
+import threading
+import time
+from collections.abc import AsyncGenerator, Iterator
 from typing import Callable
 
-import a2wsgi
 import httpx
 import pytest
 
-from uvicorn._types import Environ, HTTPRequestEvent, HTTPScope, StartResponse
+from uvicorn._types import ASGIReceiveEvent, ASGISendEvent, Environ, HTTPRequestEvent, HTTPScope, StartResponse
 from uvicorn.middleware import wsgi
 
 
@@ -53,7 +55,7 @@ def return_exc_info(environ: Environ, start_response: StartResponse) -> list[byt
         return [output]
 
 
-@pytest.fixture(params=[wsgi._WSGIMiddleware, a2wsgi.WSGIMiddleware])
+@pytest.fixture(params=[wsgi._WSGIMiddleware, wsgi.WSGIMiddleware])
 def wsgi_middleware(request: pytest.FixtureRequest) -> Callable:
     return request.param
 
@@ -112,6 +114,249 @@ async def test_wsgi_exc_info(wsgi_middleware: Callable) -> None:
     assert response.text == "Internal Server Error"
 
 
+def read_lines(environ: Environ, start_response: StartResponse) -> list[bytes]:
+    lines = [b"%d\n" % len(line) for line in environ["wsgi.input"]]
+    start_response("200 OK", [("Content-Type", "text/plain; charset=utf-8")], None)
+    return lines
+
+
+@pytest.mark.anyio
+async def test_wsgi_input_streaming() -> None:
+    messages: list[ASGIReceiveEvent] = [
+        {"type": "http.request", "body": b"a" * 40 + b"\n" + b"b" * 30, "more_body": True},
+        {"type": "http.request", "body": b"b" * 30 + b"\nc", "more_body": False},
+    ]
+    received = 0
+
+    async def receive() -> ASGIReceiveEvent:
+        nonlocal received
+        received += 1
+        return messages[received - 1]
+
+    loop = asyncio.get_running_loop()
+    body = wsgi.WSGIInput(loop, max_buffer_size=32)
+    feeder = loop.create_task(body.feed(receive, b"", True))
+    for _ in range(3):
+        await asyncio.sleep(0)
+    # The rest of the request body is only received once the buffered part is read.
+    assert received == 1
+    assert await loop.run_in_executor(None, body.readline, 10) == b"a" * 10
+    assert await loop.run_in_executor(None, body.read, 5) == b"a" * 5
+    # A line longer than the buffer is still read whole.
+    assert await loop.run_in_executor(None, body.readlines, 1) == [b"a" * 25 + b"\n"]
+    assert await loop.run_in_executor(None, body.readlines) == [b"b" * 60 + b"\n", b"c"]
+    assert received == 2
+    assert await loop.run_in_executor(None, body.read) == b""
+    await feeder
+
+
+@pytest.mark.anyio
+async def test_wsgi_input_disconnect() -> None:
+    messages: list[ASGIReceiveEvent] = [
+        {"type": "http.request", "body": b"a" * 100, "more_body": True},
+        {"type": "http.disconnect"},
+    ]
+
+    async def receive() -> ASGIReceiveEvent:
+        return messages.pop(0)
+
+    loop = asyncio.get_running_loop()
+    body = wsgi.WSGIInput(loop, max_buffer_size=32)
+    feeder = loop.create_task(body.feed(receive, b"", True))
+    # The application sees the part of the body received before the client disconnected.
+    assert await loop.run_in_executor(None, body.read) == b"a" * 100
+    assert await loop.run_in_executor(None, body.readlines, 10) == []
+    await feeder
+
+
+@pytest.mark.anyio
+async def test_wsgi_read_lines(wsgi_middleware: Callable) -> None:
+    transport = httpx.ASGITransport(wsgi_middleware(read_lines))
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        response = await client.post("/", content=b"a\n" * 50000 + b"last")
+    assert response.status_code == 200
+    assert response.text == "2\n" * 50000 + "4\n"
+
+
+def get_scope() -> HTTPScope:
+    return {
+        "asgi": {"version": "3.0", "spec_version": "2.0"},
+        "scheme": "http",
+        "raw_path": b"/",
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "path": "/",
+        "root_path": "",
+        "client": None,
+        "server": None,
+        "query_string": b"",
+        "headers": [],
+        "extensions": {},
+    }
+
+
+async def receive_empty_body() -> ASGIReceiveEvent:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+@pytest.mark.anyio
+async def test_wsgi_response_backpressure() -> None:
+    produced = 0
+
+    def app(environ: Environ, start_response: StartResponse) -> Iterator[bytes]:
+        nonlocal produced
+        start_response("200 OK", [], None)
+        for _ in range(100):
+            produced += 1
+            yield b"x" * 4096
+
+    bodies: list[bytes] = []
+    sent = asyncio.Event()
+
+    async def send(message: ASGISendEvent) -> None:
+        if message["type"] == "http.response.body":
+            bodies.append(message["body"])
+            await sent.wait()
+
+    # The application's thread waits while the client is not keeping up, with the chunk that did
+    # not fit in the queue.
+    expected = wsgi.WSGI_OUTPUT_BUFFER_SIZE // 4096 + 1
+    task = asyncio.create_task(wsgi._WSGIMiddleware(app)(get_scope(), receive_empty_body, send))
+    for _ in range(200):  # pragma: no branch
+        await asyncio.sleep(0.01)
+        if produced >= expected:
+            break
+    await asyncio.sleep(0.05)
+    assert produced == expected
+    sent.set()
+    await task
+    assert b"".join(bodies) == b"x" * 4096 * 100
+    # Chunks queued while sending are sent together.
+    assert len(bodies) < 100
+
+
+@pytest.mark.anyio
+async def test_wsgi_file_wrapper() -> None:
+    file = io.BytesIO(b"x" * 200000)
+
+    def app(environ: Environ, start_response: StartResponse) -> list[bytes]:
+        start_response("200 OK", [], None)
+        return environ["wsgi.file_wrapper"](file, 8192)
+
+    bodies: list[bytes] = []
+
+    async def send(message: ASGISendEvent) -> None:
+        if message["type"] == "http.response.body":
+            bodies.append(message["body"])
+
+    await wsgi._WSGIMiddleware(app)(get_scope(), receive_empty_body, send)
+    assert b"".join(bodies) == b"x" * 200000
+    assert file.closed
+
+
+def test_file_wrapper_without_close() -> None:
+    class Reader:
+        def __init__(self) -> None:
+            self.data = [b"", b"y" * 10, b"x" * 10]
+
+        def read(self, size: int) -> bytes:
+            return self.data.pop()
+
+    wrapper = wsgi.FileWrapper(Reader())  # type: ignore[arg-type]
+    assert list(wrapper) == [b"x" * 10, b"y" * 10]
+    wrapper.close()
+
+
+@pytest.mark.anyio
+async def test_wsgi_send_failed() -> None:
+    def app(environ: Environ, start_response: StartResponse) -> Iterator[bytes]:
+        start_response("200 OK", [], None)
+        for _ in range(100):
+            yield b"x" * 4096
+
+    async def send(message: ASGISendEvent) -> None:
+        raise OSError("Connection lost")
+
+    # The application is not left waiting for a sender that stopped.
+    with pytest.raises(OSError):
+        await wsgi._WSGIMiddleware(app)(get_scope(), receive_empty_body, send)
+
+
+def test_wsgi_executor_adaptive() -> None:
+    executor = wsgi.WSGIExecutor(max_threads=3, min_threads=1, idle_timeout=0.05)
+    release = threading.Event()
+    futures = [executor.submit(release.wait) for _ in range(5)]
+    time.sleep(0.05)
+    # Threads are started while requests wait, up to the maximum.
+    assert len(executor.threads) == 3
+    assert executor.queued == 2
+    release.set()
+    assert all(future.result() for future in futures)
+    assert executor.started == 5
+    # Only the requests beyond the maximum number of threads are sure to have waited.
+    assert executor.max_queued_seen >= 2
+    assert executor.max_wait > 0
+    assert "5 requests waited" in executor.format_stats()
+    # The threads above the minimum stop once idle.
+    for _ in range(100):  # pragma: no branch
+        if len(executor.threads) == 1:
+            break
+        time.sleep(0.01)
+    assert len(executor.threads) == 1
+    executor.shutdown()
+    assert not executor.threads
+
+
+def test_wsgi_executor() -> None:
+    executor = wsgi.WSGIExecutor(max_threads=1)
+    assert executor.format_stats() == (
+        "0 requests waited 0.000s on average and 0.000s at most for one of 0 threads (0 busy), "
+        "with 0 requests waiting now, at most 0, and 0 turned away"
+    )
+    release = threading.Event()
+    blocked = executor.submit(release.wait, timeout=5)
+    cancelled = executor.submit(release.wait)
+    failed = executor.submit(int, "x")
+    assert cancelled.cancel()
+    release.set()
+    assert blocked.result()
+    with pytest.raises(ValueError):
+        failed.result()
+    executor.shutdown(wait=False)
+    with pytest.raises(RuntimeError):
+        executor.submit(release.wait)
+
+
+@pytest.mark.anyio
+async def test_wsgi_max_queued(wsgi_middleware: Callable) -> None:
+    release = threading.Event()
+
+    def app(environ: Environ, start_response: StartResponse) -> list[bytes]:
+        release.wait(timeout=5)
+        start_response("200 OK", [("Content-Length", "0")], None)
+        return []
+
+    executor = wsgi.WSGIExecutor(max_threads=1, max_queued=1)
+    transport = httpx.ASGITransport(wsgi_middleware(app, executor=executor))
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        # One request runs, and one waits for the thread.
+        tasks = [asyncio.create_task(client.get("/")) for _ in range(2)]
+        for _ in range(100):  # pragma: no branch
+            if executor.stats()["busy_threads"] == executor.stats()["queued"] == 1:
+                break
+            await asyncio.sleep(0.01)
+        response = await client.get("/")
+        assert response.status_code == 503
+        release.set()
+        assert [response.status_code for response in await asyncio.gather(*tasks)] == [200, 200]
+        # Once the thread is free again, requests are let through.
+        response = await client.get("/")
+    assert response.status_code == 200
+    assert executor.stats()["rejected"] == 1
+    executor.shutdown()
+
+
 def test_build_environ_encoding() -> None:
     scope: HTTPScope = {
         "asgi": {"version": "3.0", "spec_version": "2.0"},
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import ipaddress
+
+import pytest
+
+from uvicorn.protocols.proxy_protocol import V2_SIGNATURE, InvalidProxyHeader, parse_proxy_header
+
+
+def v2_header(command: int, family: int, addresses: bytes, tlvs: bytes = b"") -> bytes:
+    payload = addresses + tlvs
+    return V2_SIGNATURE + bytes([0x20 | command, family]) + len(payload).to_bytes(2, "big") + payload
+
+
+V2_TCP4_ADDRESSES = (
+    ipaddress.IPv4Address("192.0.2.1").packed + ipaddress.IPv4Address("198.51.100.1").packed + b"\xc3\x50\x01\xbb"
+)
+V2_TCP6_ADDRESSES = (
+    ipaddress.IPv6Address("2001:db8::1").packed + ipaddress.IPv6Address("2001:db8::2").packed + b"\xc3\x50\x01\xbb"
+)
+
+
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        (
+            b"PROXY TCP4 192.0.2.1 198.51.100.1 50000 443\r\nGET",
+            (45, (("192.0.2.1", 50000), ("198.51.100.1", 443))),
+        ),
+        (
+            b"PROXY TCP6 2001:db8::1 2001:db8::2 50000 443\r\n",
+            (46, (("2001:db8::1", 50000), ("2001:db8::2", 443))),
+        ),
+        (b"PROXY UNKNOWN\r\n", (15, None)),
+        (b"PROXY UNKNOWN ffff::1 ffff::2 1 2\r\nGET", (35, None)),
+        (
+            v2_header(1, 0x11, V2_TCP4_ADDRESSES) + b"GET",
+            (28, (("192.0.2.1", 50000), ("198.51.100.1", 443))),
+        ),
+        (
+            v2_header(1, 0x21, V2_TCP6_ADDRESSES, tlvs=b"\x01\x00\x02h2"),
+            (57, (("2001:db8::1", 50000), ("2001:db8::2", 443))),
+        ),
+        (v2_header(0, 0x00, b""), (16, None)),
+        (v2_header(0, 0x11, V2_TCP4_ADDRESSES), (28, None)),
+        (v2_header(1, 0x00, b""), (16, None)),
+        (v2_header(1, 0x31, b"\x00" * 216), (232, None)),
+    ],
+)
+def test_parse_proxy_header(data: bytes, expected: tuple[int, object]) -> None:
+    assert parse_proxy_header(data) == expected
+    # The header is only parsed once all of it is received.
+    for end in range(expected[0]):
+        assert parse_proxy_header(data[:end]) is None
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"GET / HTTP/1.1\r\n",
+        b"PROXY TCP4 192.0.2.1 198.51.100.1 50000\r\n",
+        b"PROXY UDP4 192.0.2.1 198.51.100.1 50000 443\r\n",
+        b"PROXY TCP4 192.0.2.1 2001:db8::2 50000 443\r\n",
+        b"PROXY TCP6 192.0.2.1 198.51.100.1 50000 443\r\n",
+        b"PROXY TCP4 192.0.2.1 example.com 50000 443\r\n",
+        b"PROXY TCP4 192.0.2.1 198.51.100.1 50000 65536\r\n",
+        b"PROXY TCP4 192.0.2.1 198.51.100.1 +1 443\r\n",
+        b"PROXY TCP4 192.0.2.1 198.51.100.1 \xff 443\r\n",
+        b"PROXY UNKNOWN " + b"x" * 100,
+        V2_SIGNATURE + b"\x11\x11\x00\x00",
+        V2_SIGNATURE + b"\x22\x11\x00\x00",
+        v2_header(1, 0x11, V2_TCP4_ADDRESSES[:-1]),
+        v2_header(1, 0x21, V2_TCP4_ADDRESSES),
+    ],
+)
+def test_parse_invalid_proxy_header(data: bytes) -> None:
+    with pytest.raises(InvalidProxyHeader):
+        parse_proxy_header(data)
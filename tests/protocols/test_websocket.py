@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import socket
 from copy import deepcopy
 from typing import TYPE_CHECKING, Any, TypedDict
 
@@ -227,6 +228,33 @@ async def test_headers(ws_protocol_cls: WSProtocol, http_protocol_cls: HTTPProto
         assert is_open
 
 
+async def test_proxy_protocol(ws_protocol_cls: WSProtocol, http_protocol_cls: HTTPProtocol, unused_tcp_port: int):
+    class App(WebSocketResponse):
+        async def websocket_connect(self, message: WebSocketConnectEvent):
+            await self.send({"type": "websocket.accept"})
+            await self.send(
+                {"type": "websocket.send", "text": repr((self.scope.get("client"), self.scope.get("server")))}
+            )
+
+    async def open_connection(url: str):
+        sock = socket.create_connection(("127.0.0.1", unused_tcp_port))
+        sock.sendall(b"PROXY TCP6 2001:db8::1 2001:db8::2 50000 443\r\n")
+        async with websockets.client.connect(url, sock=sock) as websocket:
+            return await websocket.recv()
+
+    config = Config(
+        app=App,
+        ws=ws_protocol_cls,
+        http=http_protocol_cls,
+        lifespan="off",
+        port=unused_tcp_port,
+        proxy_protocol=True,
+    )
+    async with run_server(config):
+        addresses = await open_connection(f"ws://127.0.0.1:{unused_tcp_port}")
+    assert addresses == repr((("2001:db8::1", 50000), ("2001:db8::2", 443)))
+
+
 async def test_extra_headers(ws_protocol_cls: WSProtocol, http_protocol_cls: HTTPProtocol, unused_tcp_port: int):
     class App(WebSocketResponse):
         async def websocket_connect(self, message: WebSocketConnectEvent):
@@ -650,12 +678,12 @@ async def test_send_close_on_server_shutdown(
         await asyncio.sleep(0.1)
         disconnect_message_before_shutdown = disconnect_message
     server_shutdown_event.set()
+    await task
 
     assert websocket is not None
     assert websocket.close_code == 1012
     assert disconnect_message_before_shutdown == {}
     assert disconnect_message == {"type": "websocket.disconnect", "code": 1012}
-    task.cancel()
 
 
 @pytest.mark.parametrize("subprotocol", ["proto1", "proto2"])
@@ -1,19 +1,28 @@
 from __future__ import annotations
 
+import asyncio
 import functools
 import os
 import signal
 import socket
 import threading
 import time
+from pathlib import Path
 from typing import Any, Callable
 
 import pytest
+from pytest_mock import MockerFixture
 
 from uvicorn import Config
 from uvicorn._types import ASGIReceiveCallable, ASGISendCallable, Scope
 from uvicorn.supervisors import Multiprocess
-from uvicorn.supervisors.multiprocess import Process
+from uvicorn.supervisors.multiprocess import (
+    Autoscaler,
+    Process,
+    get_accept_queue_depth,
+    get_cpu_sets,
+    parse_cpu_list,
+)
 
 
 def new_console_in_windows(test_function: Callable[[], Any]) -> Callable[[], Any]:  # pragma: no cover
@@ -49,15 +58,79 @@ def run(sockets: list[socket.socket] | None) -> None:
         time.sleep(1)
 
 
-def test_process_ping_pong() -> None:
+def test_process_heartbeat() -> None:
     process = Process(Config(app=app), target=lambda x: None, sockets=[])
-    threading.Thread(target=process.always_pong, daemon=True).start()
-    assert process.ping()
-
-
-def test_process_ping_pong_timeout() -> None:
+    assert process.heartbeat.value == 0
+    asyncio.run(process.notify())
+    assert process.heartbeat.value == 1
+
+
+def test_process_busy_excludes_other_threads() -> None:
+    def spin() -> None:
+        deadline = time.thread_time() + 0.2
+        while time.thread_time() < deadline:
+            pass
+
+    async def main() -> None:
+        await process.notify()
+        # Work done by other threads of the worker doesn't make its event loop look busy.
+        await asyncio.get_running_loop().run_in_executor(None, spin)
+        await process.notify()
+
+    process = Process(Config(app=app), target=run, sockets=[])
+    asyncio.run(main())
+    assert process.busy.value < 0.5
+
+
+def test_process_pending_tasks() -> None:
+    async def main() -> None:
+        request = asyncio.create_task(asyncio.sleep(1))
+        # The server calls the heartbeat from a task of its own, which is not in-flight work.
+        await asyncio.ensure_future(process.notify())
+        assert process.pending_tasks.value == 1
+        request.cancel()
+
+    process = Process(Config(app=app), target=run, sockets=[])
+    asyncio.run(main())
+
+
+def test_process_callback_notify(caplog: pytest.LogCaptureFixture) -> None:
+    calls: list[float] = []
+
+    async def callback_notify() -> None:
+        calls.append(time.monotonic())
+        if len(calls) > 1:
+            raise RuntimeError("Notification failed")
+
+    async def main() -> None:
+        # The callback of the application is called on its own schedule, while the heartbeat is sent on each call.
+        await process.notify()
+        await asyncio.sleep(0)
+        await process.notify()
+        await asyncio.sleep(0)
+        assert process.heartbeat.value == 2
+        assert len(calls) == 1
+        process.callback_notified_at -= 60
+        await process.notify()
+        assert process.callback_task is not None
+        await asyncio.wait([process.callback_task])
+
+    process = Process(Config(app=app, callback_notify=callback_notify, timeout_notify=30), target=run, sockets=[])
+    asyncio.run(main())
+    assert len(calls) == 2
+    assert "Exception in 'callback_notify'" in caplog.text
+
+
+def test_process_heartbeat_timeout() -> None:
     process = Process(Config(app=app), target=lambda x: None, sockets=[])
-    assert not process.ping(0.1)
+    # No heartbeat has been received yet, so the process is still starting up.
+    assert process.is_responsive(0)
+    process.heartbeat.value += 1
+    assert process.is_responsive(0.1)
+    time.sleep(0.2)
+    assert not process.is_responsive(0.1)
+    process.heartbeat.value += 1
+    assert process.is_responsive(0.1)
 
 
 @new_console_in_windows
@@ -70,9 +143,10 @@ def test_multiprocess_run() -> None:
     """
     config = Config(app=app, workers=2)
     supervisor = Multiprocess(config, target=run, sockets=[])
-    threading.Thread(target=supervisor.run, daemon=True).start()
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
     supervisor.signal_queue.append(signal.SIGINT)
-    supervisor.join_all()
+    thread.join()
 
 
 @new_console_in_windows
@@ -82,16 +156,36 @@ def test_multiprocess_health_check() -> None:
     """
     config = Config(app=app, workers=2)
     supervisor = Multiprocess(config, target=run, sockets=[])
-    threading.Thread(target=supervisor.run, daemon=True).start()
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
     time.sleep(1)
     process = supervisor.processes[0]
     process.kill()
-    assert not process.is_alive()
     time.sleep(1)
+    assert supervisor.processes[0] is not process
     for p in supervisor.processes:
         assert p.is_alive()
     supervisor.signal_queue.append(signal.SIGINT)
-    supervisor.join_all()
+    thread.join()
+
+
+@new_console_in_windows
+def test_multiprocess_hung_process() -> None:
+    """
+    Ensure that a process whose heartbeat stops is killed and replaced.
+    """
+    config = Config(app=app, workers=2, timeout_worker_healthcheck=1)
+    supervisor = Multiprocess(config, target=run, sockets=[])
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
+    time.sleep(1)
+    process = supervisor.processes[0]
+    process.heartbeat.value += 1
+    time.sleep(2)
+    assert supervisor.processes[0] is not process
+    assert not process.process.is_alive()
+    supervisor.signal_queue.append(signal.SIGINT)
+    thread.join()
 
 
 @new_console_in_windows
@@ -101,10 +195,11 @@ def test_multiprocess_sigterm() -> None:
     """
     config = Config(app=app, workers=2)
     supervisor = Multiprocess(config, target=run, sockets=[])
-    threading.Thread(target=supervisor.run, daemon=True).start()
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
     time.sleep(1)
     supervisor.signal_queue.append(signal.SIGTERM)
-    supervisor.join_all()
+    thread.join()
 
 
 @pytest.mark.skipif(not hasattr(signal, "SIGBREAK"), reason="platform unsupports SIGBREAK")
@@ -115,10 +210,11 @@ def test_multiprocess_sigbreak() -> None:  # pragma: py-not-win32
     """
     config = Config(app=app, workers=2)
     supervisor = Multiprocess(config, target=run, sockets=[])
-    threading.Thread(target=supervisor.run, daemon=True).start()
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
     time.sleep(1)
     supervisor.signal_queue.append(getattr(signal, "SIGBREAK"))
-    supervisor.join_all()
+    thread.join()
 
 
 @pytest.mark.skipif(not hasattr(signal, "SIGHUP"), reason="platform unsupports SIGHUP")
@@ -128,14 +224,15 @@ def test_multiprocess_sighup() -> None:
     """
     config = Config(app=app, workers=2)
     supervisor = Multiprocess(config, target=run, sockets=[])
-    threading.Thread(target=supervisor.run, daemon=True).start()
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
     time.sleep(1)
     pids = [p.pid for p in supervisor.processes]
     supervisor.signal_queue.append(signal.SIGHUP)
     time.sleep(1)
     assert pids != [p.pid for p in supervisor.processes]
     supervisor.signal_queue.append(signal.SIGINT)
-    supervisor.join_all()
+    thread.join()
 
 
 @pytest.mark.skipif(not hasattr(signal, "SIGTTIN"), reason="platform unsupports SIGTTIN")
@@ -145,12 +242,13 @@ def test_multiprocess_sigttin() -> None:
     """
     config = Config(app=app, workers=2)
     supervisor = Multiprocess(config, target=run, sockets=[])
-    threading.Thread(target=supervisor.run, daemon=True).start()
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
     supervisor.signal_queue.append(signal.SIGTTIN)
     time.sleep(1)
     assert len(supervisor.processes) == 3
     supervisor.signal_queue.append(signal.SIGINT)
-    supervisor.join_all()
+    thread.join()
 
 
 @pytest.mark.skipif(not hasattr(signal, "SIGTTOU"), reason="platform unsupports SIGTTOU")
@@ -160,7 +258,8 @@ def test_multiprocess_sigttou() -> None:
     """
     config = Config(app=app, workers=2)
     supervisor = Multiprocess(config, target=run, sockets=[])
-    threading.Thread(target=supervisor.run, daemon=True).start()
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
     supervisor.signal_queue.append(signal.SIGTTOU)
     time.sleep(1)
     assert len(supervisor.processes) == 1
@@ -168,4 +267,175 @@ def test_multiprocess_sigttou() -> None:
     time.sleep(1)
     assert len(supervisor.processes) == 1
     supervisor.signal_queue.append(signal.SIGINT)
-    supervisor.join_all()
+    thread.join()
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR2"), reason="platform unsupports SIGUSR2")
+def test_multiprocess_sigusr2(mocker: MockerFixture, tmp_path: Path) -> None:
+    """
+    Ensure that the SIGUSR2 signal is sent to the processes when profiling is enabled.
+    """
+    kill = mocker.patch("os.kill")
+    original_handler = signal.getsignal(signal.SIGUSR2)
+    try:
+        # Without profiling, the signal is left alone.
+        Multiprocess(Config(app=app, workers=2), target=run, sockets=[])
+        assert signal.getsignal(signal.SIGUSR2) == original_handler
+
+        supervisor = Multiprocess(Config(app=app, workers=2, profile_dir=str(tmp_path)), target=run, sockets=[])
+        assert signal.getsignal(signal.SIGUSR2) != original_handler
+    finally:
+        signal.signal(signal.SIGUSR2, original_handler)
+    supervisor.processes = [mocker.Mock(pid=1), mocker.Mock(pid=2)]
+    supervisor.handle_usr2()
+    assert kill.call_args_list == [mocker.call(1, signal.SIGUSR2), mocker.call(2, signal.SIGUSR2)]
+
+
+def test_autoscaler_scale_up() -> None:
+    autoscaler = Autoscaler(min_workers=1, max_workers=2, scale_up_delay=10)
+    assert autoscaler.decide(workers=1, load=0.9, in_flight=0, accept_queue=0, now=0) == 0
+    assert autoscaler.decide(workers=1, load=0.9, in_flight=0, accept_queue=0, now=5) == 0
+    assert autoscaler.decide(workers=1, load=0.5, in_flight=0, accept_queue=0, now=8) == 0
+    # The burst was interrupted, so the delay starts over.
+    assert autoscaler.decide(workers=1, load=0.1, in_flight=0, accept_queue=3, now=9) == 0
+    assert autoscaler.decide(workers=1, load=0.1, in_flight=0, accept_queue=3, now=9.5) == 0
+    assert autoscaler.decide(workers=1, load=0.1, in_flight=0, accept_queue=3, now=10) == 0
+    assert autoscaler.decide(workers=1, load=0.1, in_flight=0, accept_queue=3, now=20) == 1
+    assert autoscaler.decide(workers=2, load=0.9, in_flight=0, accept_queue=3, now=21) == 0
+    assert autoscaler.decide(workers=2, load=0.9, in_flight=0, accept_queue=3, now=40) == 0
+
+
+def test_autoscaler_accept_queue_readings() -> None:
+    autoscaler = Autoscaler(min_workers=1, max_workers=2, scale_up_delay=0, accept_queue_readings=3)
+    # Connections waiting on single readings don't make the workers overloaded.
+    for now in range(10):
+        accept_queue = now % 3
+        assert autoscaler.decide(workers=1, load=0.1, in_flight=0, accept_queue=accept_queue, now=now) == 0
+    assert autoscaler.decide(workers=1, load=0.1, in_flight=0, accept_queue=1, now=10) == 0
+    assert autoscaler.decide(workers=1, load=0.1, in_flight=0, accept_queue=1, now=11) == 0
+    assert autoscaler.decide(workers=1, load=0.1, in_flight=0, accept_queue=1, now=12) == 0
+    assert autoscaler.decide(workers=1, load=0.1, in_flight=0, accept_queue=1, now=13) == 1
+
+
+def test_autoscaler_in_flight() -> None:
+    autoscaler = Autoscaler(min_workers=1, max_workers=2, scale_up_delay=0, scale_down_delay=0, max_in_flight=100)
+    # Workers waiting on their requests are overloaded, even with an idle event loop.
+    assert autoscaler.decide(workers=1, load=0.1, in_flight=80, accept_queue=0, now=0) == 0
+    assert autoscaler.decide(workers=1, load=0.1, in_flight=80, accept_queue=0, now=1) == 1
+    # And are not scaled down while the remaining ones would be.
+    assert autoscaler.decide(workers=2, load=0.1, in_flight=50, accept_queue=0, now=2) == 0
+    assert autoscaler.decide(workers=2, load=0.1, in_flight=50, accept_queue=0, now=3) == 0
+    assert autoscaler.decide(workers=2, load=0.1, in_flight=10, accept_queue=0, now=4) == 0
+    assert autoscaler.decide(workers=2, load=0.1, in_flight=10, accept_queue=0, now=5) == -1
+    # Without a maximum, only the event loop busy ratio counts.
+    autoscaler = Autoscaler(min_workers=1, max_workers=2, scale_up_delay=0)
+    assert autoscaler.decide(workers=1, load=0.1, in_flight=80, accept_queue=0, now=0) == 0
+    assert autoscaler.decide(workers=1, load=0.1, in_flight=80, accept_queue=0, now=1) == 0
+
+
+def test_autoscaler_scale_down() -> None:
+    autoscaler = Autoscaler(min_workers=1, max_workers=4, scale_down_delay=60)
+    assert autoscaler.decide(workers=2, load=0.1, in_flight=0, accept_queue=0, now=0) == 0
+    assert autoscaler.decide(workers=2, load=0.1, in_flight=0, accept_queue=0, now=30) == 0
+    assert autoscaler.decide(workers=2, load=0.1, in_flight=0, accept_queue=0, now=60) == -1
+    assert autoscaler.decide(workers=1, load=0.1, in_flight=0, accept_queue=0, now=61) == 0
+    assert autoscaler.decide(workers=1, load=0.1, in_flight=0, accept_queue=0, now=200) == 0
+
+
+def test_autoscaler_does_not_scale_down_into_overload() -> None:
+    autoscaler = Autoscaler(min_workers=1, max_workers=4, high_load=0.3, low_load=0.25, scale_down_delay=0)
+    assert autoscaler.decide(workers=2, load=0.2, in_flight=0, accept_queue=0, now=0) == 0
+    assert autoscaler.decide(workers=2, load=0.2, in_flight=0, accept_queue=0, now=1) == 0
+
+
+def test_get_accept_queue_depth() -> None:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        assert get_accept_queue_depth(sock) == 0
+        with socket.create_connection(sock.getsockname()):
+            time.sleep(0.1)
+            assert get_accept_queue_depth(sock) == (1 if hasattr(socket, "TCP_INFO") else 0)
+
+
+@new_console_in_windows
+def test_multiprocess_autoscale() -> None:
+    """
+    Ensure that the supervisor adds and removes processes according to their reported load.
+    """
+    config = Config(app=app, workers=1, workers_max=2)
+    supervisor = Multiprocess(config, target=run, sockets=[])
+    assert supervisor.autoscaler is not None
+    supervisor.autoscaler.scale_up_delay = 0
+    supervisor.autoscaler.scale_down_delay = 0
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
+    time.sleep(1)
+    process = supervisor.processes[0]
+    process.busy.value = 1.0
+    process.heartbeat.value += 1
+    time.sleep(1.5)
+    assert len(supervisor.processes) == 2
+    for process in supervisor.processes:
+        process.busy.value = 0.0
+        process.heartbeat.value += 1
+    time.sleep(1.5)
+    assert len(supervisor.processes) == 1
+    supervisor.signal_queue.append(signal.SIGINT)
+    thread.join()
+    assert not supervisor.retiring
+
+
+def test_parse_cpu_list() -> None:
+    assert parse_cpu_list("0-3,8,10-11\n") == {0, 1, 2, 3, 8, 10, 11}
+    assert parse_cpu_list("") == set()
+
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="platform unsupports CPU affinity")
+def test_get_cpu_sets(tmp_path: Path) -> None:  # pragma: py-not-linux
+    available = os.sched_getaffinity(0)
+    assert get_cpu_sets("none") == []
+    assert get_cpu_sets("core") == [{cpu} for cpu in sorted(available)]
+    # Without NUMA information, the whole machine is a single node.
+    assert get_cpu_sets("numa", nodes_path=tmp_path) == [available]
+
+    for node, cpu in enumerate(sorted(available)):
+        (tmp_path / f"node{node}").mkdir()
+        (tmp_path / f"node{node}" / "cpulist").write_text(f"{cpu}\n")
+    (tmp_path / "node99").mkdir()
+    (tmp_path / "node99" / "cpulist").write_text("\n")
+    assert get_cpu_sets("numa", nodes_path=tmp_path) == [{cpu} for cpu in sorted(available)]
+
+
+def test_multiprocess_new_process_placement(mocker: MockerFixture) -> None:
+    process_class = mocker.patch("uvicorn.supervisors.multiprocess.Process")
+    config = Config(app=app, workers=2)
+    supervisor = Multiprocess(config, target=run, sockets=[])
+    supervisor.cpu_sets = [{0, 1}, {2, 3}]
+    supervisor.processes = [mocker.Mock(cpus={0, 1})]
+    supervisor.new_process()
+    assert process_class.call_args.kwargs["cpus"] == {2, 3}
+    supervisor.new_process({0, 1})
+    assert process_class.call_args.kwargs["cpus"] == {0, 1}
+
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="platform unsupports CPU affinity")
+def test_multiprocess_worker_affinity() -> None:  # pragma: py-not-linux
+    """
+    Ensure that processes are pinned to their CPUs, and keep them when restarted.
+    """
+    config = Config(app=app, workers=2, worker_affinity="core")
+    supervisor = Multiprocess(config, target=run, sockets=[])
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
+    time.sleep(1)
+    for process in supervisor.processes:
+        assert process.cpus in supervisor.cpu_sets
+        assert os.sched_getaffinity(process.pid) == process.cpus  # type: ignore[arg-type]
+    process = supervisor.processes[1]
+    process.kill()
+    time.sleep(1)
+    assert supervisor.processes[1] is not process
+    assert supervisor.processes[1].cpus == process.cpus
+    supervisor.signal_queue.append(signal.SIGINT)
+    thread.join()
@@ -67,6 +67,29 @@ def test_cli_headers() -> None:
     ]
 
 
+def test_cli_socket_options() -> None:
+    runner = CliRunner()
+
+    with mock.patch.object(main, "run") as mock_run:
+        result = runner.invoke(
+            cli, ["tests.test_cli:App", "--socket-option", "TCP_DEFER_ACCEPT=5", "--socket-option", "TCP_NODELAY=0"]
+        )
+
+    assert result.exit_code == 0
+    assert mock_run.call_args[1]["socket_options"] == {"TCP_DEFER_ACCEPT": 5, "TCP_NODELAY": 0}
+
+
+def test_cli_invalid_socket_option() -> None:
+    runner = CliRunner()
+
+    with mock.patch.object(main, "run") as mock_run:
+        result = runner.invoke(cli, ["tests.test_cli:App", "--socket-option", "TCP_NODELAY"])
+
+    assert result.exit_code == 2
+    assert "'TCP_NODELAY' is not in the NAME=VALUE format" in result.output
+    mock_run.assert_not_called()
+
+
 def test_cli_call_server_run() -> None:
     runner = CliRunner()
 
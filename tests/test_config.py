@@ -20,7 +20,7 @@ from pytest_mock import MockerFixture
 from tests.custom_loop_utils import CustomLoop
 from tests.utils import as_cwd, get_asyncio_default_loop_per_os
 from uvicorn._types import ASGIApplication, ASGIReceiveCallable, ASGISendCallable, Environ, Scope, StartResponse
-from uvicorn.config import Config, LoopFactoryType
+from uvicorn.config import Config, LoopFactoryType, resolve_socket_options, set_socket_options
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from uvicorn.middleware.wsgi import WSGIMiddleware
 from uvicorn.protocols.http.h11_impl import H11Protocol
@@ -195,6 +195,24 @@ def test_wsgi_app() -> None:
     assert isinstance(config.loaded_app, WSGIMiddleware)
     assert config.interface == "wsgi"
     assert config.asgi_version == "3.0"
+    assert config.loaded_app.executor is config.wsgi_executor
+
+
+@pytest.mark.parametrize(
+    "options, expected",
+    [
+        ({}, (10, 10, None)),
+        ({"wsgi_min_threads": 2, "limit_concurrency": 4}, (4, 2, None)),
+        ({"wsgi_max_queued": 20}, (10, 10, 20)),
+    ],
+)
+def test_wsgi_threads(options: dict[str, int], expected: tuple[int, int, int | None]) -> None:
+    config = Config(app=wsgi_app, interface="wsgi", wsgi_threads=10, **options)  # type: ignore[arg-type]
+    config.load()
+
+    executor = config.wsgi_executor
+    assert executor is not None
+    assert (executor.max_threads, executor.min_threads, executor.max_queued) == expected
 
 
 def test_proxy_headers() -> None:
@@ -262,6 +280,14 @@ def test_socket_bind() -> None:
     sock.close()
 
 
+def test_socket_bind_listener_options() -> None:
+    config = Config(app=asgi_app, socket_options={"SO_RCVBUF": 32768})
+    sock = config.bind_socket()
+    # Set before the socket is passed on to listen.
+    assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) >= 32768
+    sock.close()
+
+
 def test_ssl_config(
     tls_ca_certificate_pem_path: str,
     tls_ca_certificate_private_key_path: str,
@@ -585,3 +611,64 @@ def test_custom_loop__not_importable_custom_loop_setup_function(caplog: pytest.L
         'Error loading custom loop setup function. Attribute "non_existing_setup_function" not found in module "tests.test_config".'  # noqa: E501
         == error_messages.pop(0)
     )
+
+
+def test_config_workers_max_lower_than_workers(caplog: pytest.LogCaptureFixture) -> None:
+    with caplog.at_level(logging.WARNING):
+        config = Config(app=asgi_app, workers=4, workers_max=2)
+    assert config.workers_max is None
+    assert '"workers_max" is lower than "workers", disabling autoscaling.' in caplog.messages
+
+
+@pytest.mark.skipif(sys.version_info >= (3, 12), reason="eager tasks are supported")
+def test_config_eager_tasks_unsupported(caplog: pytest.LogCaptureFixture) -> None:  # pragma: py-gte-312
+    with caplog.at_level(logging.WARNING):
+        Config(app=asgi_app, eager_tasks=True)
+    assert '"eager_tasks" requires Python 3.12 or later, and is ignored.' in caplog.messages
+
+
+def test_config_proxy_protocol_ssl(
+    caplog: pytest.LogCaptureFixture, tls_ca_certificate_pem_path: str, tls_ca_certificate_private_key_path: str
+) -> None:
+    with caplog.at_level(logging.WARNING):
+        config = Config(
+            app=asgi_app,
+            proxy_protocol=True,
+            ssl_certfile=tls_ca_certificate_pem_path,
+            ssl_keyfile=tls_ca_certificate_private_key_path,
+        )
+    assert not config.proxy_protocol
+    assert '"proxy_protocol" is ignored with SSL, as the header would precede the TLS handshake.' in caplog.messages
+
+
+def test_resolve_socket_options() -> None:
+    listener_options, connection_options = resolve_socket_options(
+        {"tcp_defer_accept": 5, "SO_SNDBUF": 65536, "TCP_NODELAY": 0, "SO_KEEPALIVE": 1}
+    )
+    assert listener_options == [
+        (socket.IPPROTO_TCP, socket.TCP_DEFER_ACCEPT, 5),
+        (socket.SOL_SOCKET, socket.SO_SNDBUF, 65536),
+    ]
+    assert connection_options == [
+        (socket.IPPROTO_TCP, socket.TCP_NODELAY, 0),
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+
+def test_config_unsupported_socket_option(caplog: pytest.LogCaptureFixture) -> None:
+    with pytest.raises(SystemExit) as exit_exception:
+        Config(app=asgi_app, socket_options={"SO_REUSEPORT": 1})
+    assert exit_exception.value.code == 1
+    assert caplog.messages[-1].startswith("Unsupported socket option 'SO_REUSEPORT'.")
+
+
+def test_set_socket_options_ignores_unix_sockets() -> None:  # pragma: py-win32
+    with socket.socket(socket.AF_UNIX) as sock:
+        set_socket_options(sock, [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)])
+
+
+def test_static_mounts(tmp_path: Path) -> None:
+    config = Config(app=asgi_app, static=[f"/assets={tmp_path}", f"/media/={tmp_path}"])
+    assert config.static_mounts == [("/assets/", str(tmp_path)), ("/media/", str(tmp_path))]
+    with pytest.raises(ValueError, match="Invalid static mount"):
+        Config(app=asgi_app, static=["assets"])
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import signal
+import time
+from pathlib import Path
+
+import pytest
+
+from uvicorn.profiler import SamplingProfiler
+
+pytestmark = pytest.mark.skipif(not hasattr(signal, "setitimer"), reason="platform unsupports setitimer")
+
+
+def busy_function(duration: float) -> None:
+    deadline = time.process_time() + duration
+    while time.process_time() < deadline:
+        pass
+
+
+def test_sampling_profiler(tmp_path: Path) -> None:
+    profiler = SamplingProfiler(str(tmp_path / "profiles"), interval=0.001)
+    profiler.toggle()
+    assert profiler.running
+    busy_function(0.1)
+    profiler.toggle()
+    assert not profiler.running
+    # Signals are not delivered anymore once stopped.
+    assert signal.getsignal(signal.SIGPROF) == signal.SIG_IGN
+
+    [path] = (tmp_path / "profiles").iterdir()
+    stacks = dict(line.rsplit(" ", 1) for line in path.read_text().splitlines())
+    assert all(int(count) > 0 for count in stacks.values())
+    # The stacks are listed from the outermost frame to the innermost one.
+    code = busy_function.__code__
+    innermost = f"test_sampling_profiler ({__file__}:{test_sampling_profiler.__code__.co_firstlineno});"
+    innermost += f"busy_function ({code.co_filename}:{code.co_firstlineno})"
+    assert any(stack.endswith(innermost) for stack in stacks)
+
+
+def test_sampling_profiler_restart(tmp_path: Path) -> None:
+    profiler = SamplingProfiler(str(tmp_path), interval=0.001)
+    profiler.start()
+    busy_function(0.05)
+    profiler.stop()
+    profiler.start()
+    # Each profile only has the samples taken since it was started.
+    assert not profiler.samples
+    profiler.stop()
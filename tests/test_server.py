@@ -4,20 +4,24 @@ import asyncio
 import contextlib
 import logging
 import signal
+import socket
 import sys
+import threading
 from collections.abc import Generator
 from contextlib import AbstractContextManager
+from pathlib import Path
 from typing import Callable
 
 import httpx
 import pytest
+from pytest_mock import MockerFixture
 
 from tests.utils import run_server
-from uvicorn._types import ASGIReceiveCallable, ASGISendCallable, Scope
+from uvicorn._types import ASGIReceiveCallable, ASGISendCallable, Environ, Scope, StartResponse
 from uvicorn.config import Config
 from uvicorn.protocols.http.h11_impl import H11Protocol
 from uvicorn.protocols.http.httptools_impl import HttpToolsProtocol
-from uvicorn.server import Server
+from uvicorn.server import Server, ServerState
 
 pytestmark = pytest.mark.anyio
 
@@ -95,3 +99,217 @@ async def test_request_than_limit_max_requests_warn_log(
             responses = await asyncio.gather(*tasks)
             assert len(responses) == 2
     assert "Maximum request limit of 1 exceeded. Terminating process." in caplog.text
+
+
+async def test_limit_max_requests_wakes_up_main_loop(
+    unused_tcp_port: int, http_protocol_cls: type[H11Protocol | HttpToolsProtocol]
+):
+    config = Config(app=app, limit_max_requests=1, port=unused_tcp_port, http=http_protocol_cls)
+    server = Server(config=config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    async with httpx.AsyncClient() as client:
+        await client.get(f"http://127.0.0.1:{unused_tcp_port}")
+    # The server exits as soon as the limit is reached, rather than on its next tick.
+    await asyncio.wait_for(task, timeout=0.5)
+
+
+def test_on_request_complete() -> None:
+    reached: list[int] = []
+    server_state = ServerState(max_requests=2)
+    server_state.on_max_requests = lambda: reached.append(server_state.total_requests)
+    for _ in range(3):
+        server_state.on_request_complete()
+    assert server_state.total_requests == 3
+    assert reached == [2]
+
+
+async def test_callback_notify(unused_tcp_port: int, caplog: pytest.LogCaptureFixture):
+    calls = 0
+    blocked = asyncio.Event()
+
+    async def callback_notify() -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("Notification failed")
+        blocked.set()
+        await asyncio.Event().wait()
+
+    config = Config(app=app, port=unused_tcp_port, callback_notify=callback_notify, timeout_notify=0)
+    async with run_server(config) as server:
+        await asyncio.wait_for(blocked.wait(), timeout=5)
+        notify_task = server._notify_task
+        assert notify_task is not None
+    # Exceptions are logged, and a pending notification is cancelled once the server exits.
+    assert "Exception in 'callback_notify'" in caplog.text
+    await asyncio.wait([notify_task], timeout=1)
+    assert notify_task.cancelled()
+
+
+async def test_socket_options(unused_tcp_port: int, http_protocol_cls: type[H11Protocol | HttpToolsProtocol]) -> None:
+    nodelay: list[int] = []
+
+    async def app(scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
+        for connection in server.server_state.connections:
+            sock = connection.transport.get_extra_info("socket")
+            nodelay.append(sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY))
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    socket_options = {"SO_RCVBUF": 32768, "TCP_NODELAY": 0}
+    config = Config(app=app, port=unused_tcp_port, http=http_protocol_cls, socket_options=socket_options)
+    async with run_server(config) as server:
+        listener = server.servers[0].sockets[0]
+        assert listener.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) >= 32768
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"http://127.0.0.1:{unused_tcp_port}")
+    assert response.status_code == 204
+    assert nodelay == [0]
+
+
+async def test_socket_options_on_sockets(unused_tcp_port: int) -> None:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", unused_tcp_port))
+    config = Config(app=app, lifespan="off", socket_options={"SO_RCVBUF": 32768})
+    server = Server(config)
+    task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+    assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) >= 32768
+    server.should_exit = True
+    await task
+
+
+async def test_socket_options_address_in_use(unused_tcp_port: int) -> None:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", unused_tcp_port))
+        sock.listen()
+        config = Config(app=app, lifespan="off", port=unused_tcp_port, socket_options={"SO_RCVBUF": 32768})
+        with pytest.raises(SystemExit):
+            await Server(config).serve()
+
+
+async def test_static_files(
+    unused_tcp_port: int, http_protocol_cls: type[H11Protocol | HttpToolsProtocol], tmp_path: Path
+) -> None:
+    content = bytes(range(256)) * 1024
+    (tmp_path / "large.bin").write_bytes(content)
+    config = Config(app=app, port=unused_tcp_port, http=http_protocol_cls, static=[f"/static={tmp_path}"])
+    async with run_server(config) as server:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"http://127.0.0.1:{unused_tcp_port}/static/large.bin")
+        assert response.content == content
+        static_files = server.server_state.static_files
+        assert static_files is not None
+        file = next(iter(static_files._files.values()))
+    # The files kept open are closed on shutdown.
+    assert not static_files._files
+    assert file.evicted and not file.users
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR2"), reason="platform unsupports SIGUSR2")
+async def test_profile_signal(unused_tcp_port: int, tmp_path: Path) -> None:
+    config = Config(app=app, lifespan="off", port=unused_tcp_port, profile_dir=str(tmp_path))
+    original_handler = signal.getsignal(signal.SIGUSR2)
+    server = Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    assert server.profiler is not None
+    signal.raise_signal(signal.SIGUSR2)
+    while not server.profiler.running:
+        await asyncio.sleep(0.01)
+    server.should_exit = True
+    await task
+    # Profiling is stopped on shutdown, and the profile written.
+    assert not server.profiler.running
+    assert len(list(tmp_path.iterdir())) == 1
+    assert signal.getsignal(signal.SIGUSR2) == original_handler
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR2"), reason="platform unsupports SIGUSR2")
+def test_profile_signal_not_handled_without_profiling() -> None:
+    original_handler = signal.getsignal(signal.SIGUSR2)
+    server = Server(Config(app=app, lifespan="off"))
+    with server.capture_signals():
+        assert signal.getsignal(signal.SIGUSR2) == original_handler
+
+
+async def test_loop_lag_threshold(unused_tcp_port: int) -> None:
+    config = Config(app=app, lifespan="off", port=unused_tcp_port, loop_lag_threshold=0.5)
+    server = Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    assert server.watchdog is not None
+    assert server.watchdog._thread is not None and server.watchdog._thread.is_alive()
+    server.should_exit = True
+    await task
+    # The watchdog is stopped with the server.
+    assert not server.watchdog._thread.is_alive()
+
+
+def wsgi_app(environ: Environ, start_response: StartResponse) -> list[bytes]:
+    start_response("200 OK", [("Content-Length", "0")], None)
+    return []
+
+
+async def test_wsgi_executor_shutdown(unused_tcp_port: int, caplog: pytest.LogCaptureFixture) -> None:
+    config = Config(app=wsgi_app, interface="wsgi", lifespan="off", port=unused_tcp_port)
+    caplog.set_level(logging.INFO, logger="uvicorn.error")
+    async with run_server(config):
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"http://127.0.0.1:{unused_tcp_port}")
+    assert response.status_code == 200
+    assert config.wsgi_executor is not None
+    assert "WSGI thread pool: 1 requests waited" in caplog.text
+    assert config.wsgi_executor._closed
+
+
+async def test_wsgi_executor_stats(caplog: pytest.LogCaptureFixture) -> None:
+    config = Config(app=wsgi_app, interface="wsgi", lifespan="off")
+    config.load()
+    server = Server(config)
+    assert config.wsgi_executor is not None
+    caplog.set_level(logging.INFO, logger="uvicorn.error")
+
+    # Nothing is logged before requests came.
+    server.on_tick()
+    assert "WSGI thread pool" not in caplog.text
+    server.last_wsgi_stats = 0.0
+    config.wsgi_executor.submit(int).result()
+    server.on_tick()
+    assert "WSGI thread pool: 1 requests waited" in caplog.text
+    # The figures are logged at most once every interval.
+    caplog.clear()
+    config.wsgi_executor.submit(int).result()
+    server.on_tick()
+    assert "WSGI thread pool" not in caplog.text
+    assert server._tick_handle is not None
+    server._tick_handle.cancel()
+    config.wsgi_executor.shutdown()
+
+
+async def test_exit_from_another_thread(unused_tcp_port: int):
+    server = Server(Config(app=app, lifespan="off", port=unused_tcp_port))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    # The main loop is woken up, instead of polling the exit flag.
+    threading.Thread(target=setattr, args=(server, "should_exit", True)).start()
+    await asyncio.wait_for(task, timeout=1)
+
+
+async def test_on_tick_aligned_to_seconds(mocker: MockerFixture):
+    config = Config(app=app)
+    config.load()
+    server = Server(config)
+    mocker.patch("uvicorn.server.time.time", return_value=1_000_000.25)
+    server.on_tick()
+    assert server.server_state.default_headers[0] == (b"date", b"Mon, 12 Jan 1970 13:46:40 GMT")
+    assert server._tick_handle is not None
+    loop = asyncio.get_running_loop()
+    assert server._tick_handle.when() - loop.time() == pytest.approx(0.75, abs=0.05)
+    server._tick_handle.cancel()
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+import pytest
+
+from uvicorn.watchdog import LAG_BUCKETS, LoopWatchdog
+
+pytestmark = pytest.mark.anyio
+
+
+def blocking_function() -> None:
+    time.sleep(0.3)
+
+
+async def test_loop_watchdog(caplog: pytest.LogCaptureFixture) -> None:
+    caplog.set_level(logging.INFO, logger="uvicorn.error")
+    watchdog = LoopWatchdog(threshold=0.05)
+    watchdog.start(asyncio.get_running_loop())
+    await asyncio.sleep(0.1)
+    blocking_function()
+    await asyncio.sleep(0.1)
+    watchdog.stop()
+    assert watchdog._thread is not None and not watchdog._thread.is_alive()
+
+    # The stack is captured once while the loop is blocked, and the lag measured once it is not.
+    assert any("blocking_function" in stack for stack in watchdog.stacks)
+    assert watchdog.max_lag >= 0.2
+    assert sum(watchdog.histogram[LAG_BUCKETS.index(0.5) :]) >= 1
+    assert sum(watchdog.histogram) >= 3
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(message.startswith("The event loop has been blocked for") for message in messages)
+    assert any(message.startswith("The event loop was blocked for") for message in messages)
+    assert messages[-1].startswith("Event loop lag: max ")
+    assert ">5000ms: 0" in messages[-1]
@@ -17,6 +17,9 @@ async def run_server(config: Config, sockets: list[socket] | None = None) -> Asy
     server = Server(config=config)
     task = asyncio.create_task(server.serve(sockets=sockets))
     await asyncio.sleep(0.1)
+    # Startup may take longer on a busy machine, such as when running the tests in parallel.
+    while not server.started and not task.done():
+        await asyncio.sleep(0.01)  # pragma: full coverage
     try:
         yield server
     finally:
@@ -82,3 +82,17 @@ else:
                         "task": task,
                     }
                 )
+
+
+if sys.version_info >= (3, 12):
+
+    def create_eager_task(loop: asyncio.AbstractEventLoop, coro: Coroutine[Any, Any, _T]) -> asyncio.Task[_T]:
+        # Run the coroutine until it first suspends before returning, skipping the scheduling of
+        # its first step, and the scheduling altogether if it completes without suspending.
+        return asyncio.Task(coro, loop=loop, eager_start=True)
+
+else:
+
+    def create_eager_task(loop: asyncio.AbstractEventLoop, coro: Coroutine[Any, Any, _T]) -> asyncio.Task[_T]:
+        # Eager tasks need Python 3.12.
+        return loop.create_task(coro)
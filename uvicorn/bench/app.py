@@ -0,0 +1,70 @@
+"""
+The application served by the HTTP and WebSocket benchmarks. It does as little as possible, so
+that the cost of the server dominates.
+"""
+
+from __future__ import annotations
+
+from uvicorn._types import ASGIReceiveCallable, ASGISendCallable, Scope, WebSocketScope, WebSocketSendEvent
+
+BODY = b"Hello, world!"
+STREAM_CHUNK = b"x" * 16384
+STREAM_CHUNKS = 64
+
+
+# The connections to `/broadcast`, each message received on one of them being sent to all of them.
+BROADCAST_CLIENTS: set[ASGISendCallable] = set()
+
+
+async def websocket_app(scope: WebSocketScope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
+    await receive()
+    await send({"type": "websocket.accept"})
+    broadcast = scope["path"] == "/broadcast"
+    if broadcast:
+        BROADCAST_CLIENTS.add(send)
+    try:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            assert message["type"] == "websocket.receive"
+            text, data = message.get("text"), message.get("bytes")
+            reply: WebSocketSendEvent
+            if text is not None:
+                reply = {"type": "websocket.send", "text": text}
+            else:
+                assert data is not None
+                reply = {"type": "websocket.send", "bytes": data}
+            for client in list(BROADCAST_CLIENTS) if broadcast else [send]:
+                await client(reply)
+    finally:
+        BROADCAST_CLIENTS.discard(send)
+
+
+async def app(scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
+    if scope["type"] == "websocket":
+        await websocket_app(scope, receive, send)
+        return
+    assert scope["type"] == "http"
+    path = scope["path"]
+    if path == "/stream":
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        for _ in range(STREAM_CHUNKS - 1):
+            await send({"type": "http.response.body", "body": STREAM_CHUNK, "more_body": True})
+        await send({"type": "http.response.body", "body": STREAM_CHUNK})
+        return
+
+    if path == "/upload":
+        received = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            assert message["type"] == "http.request"
+            received += len(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"%d" % received
+    else:
+        body = BODY
+    headers = [(b"content-type", b"text/plain"), (b"content-length", b"%d" % len(body))]
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
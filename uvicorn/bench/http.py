@@ -0,0 +1,180 @@
+"""
+An HTTP load generator, to compare the throughput, latency and memory usage of the HTTP protocol
+implementations across a few scenarios.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections.abc import Iterator
+
+from uvicorn._subprocess import get_subprocess
+from uvicorn.bench.results import Result, get_peak_memory, percentile
+from uvicorn.config import Config
+from uvicorn.server import Server
+
+UPLOAD_SIZE = 1024 * 1024
+
+
+class Scenario:
+    def __init__(self, request: bytes, pipeline: int = 1, idle_connections: bool = False) -> None:
+        self.request = request
+        self.pipeline = pipeline
+        self.idle_connections = idle_connections
+
+
+SCENARIOS = {
+    "keep-alive": Scenario(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n"),
+    "pipelining": Scenario(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n", pipeline=16),
+    "streaming": Scenario(b"GET /stream HTTP/1.1\r\nHost: localhost\r\n\r\n"),
+    "upload": Scenario(
+        b"POST /upload HTTP/1.1\r\nHost: localhost\r\nContent-Length: %d\r\n\r\n" % UPLOAD_SIZE + b"x" * UPLOAD_SIZE
+    ),
+    "idle-connections": Scenario(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n", idle_connections=True),
+}
+
+
+class LoadStats:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self.latencies: list[float] = []
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """
+    Read a response, returning its status code.
+    """
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head[9:12])
+    content_length = 0
+    chunked = False
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            content_length = int(value)
+        elif name == b"transfer-encoding":
+            chunked = value.strip().lower() == b"chunked"
+    if not chunked:
+        await reader.readexactly(content_length)
+        return status
+    while True:
+        size = int((await reader.readline()).split(b";")[0], 16)
+        await reader.readexactly(size + 2)
+        if size == 0:
+            return status
+
+
+async def run_connection(host: str, port: int, scenario: Scenario, deadline: float, stats: LoadStats) -> None:
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats.errors += 1
+        return
+    batch = scenario.request * scenario.pipeline
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(batch)
+            for _ in range(scenario.pipeline):
+                if await read_response(reader) >= 500:
+                    stats.errors += 1  # pragma: full coverage
+                stats.latencies.append(time.perf_counter() - start)
+            stats.requests += scenario.pipeline
+    except (OSError, asyncio.IncompleteReadError):  # pragma: full coverage
+        stats.errors += 1
+    finally:
+        writer.close()
+
+
+async def run_load(
+    host: str, port: int, scenario: Scenario, duration: float, connections: int, idle_connections: int
+) -> LoadStats:
+    """
+    Send requests over `connections` connections for `duration` seconds, each sending the next
+    request once the response to the previous one is received.
+    """
+    idle = []
+    if scenario.idle_connections:
+        for _ in range(idle_connections):
+            idle.append(await asyncio.open_connection(host, port))
+
+    stats = LoadStats()
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(run_connection(host, port, scenario, deadline, stats) for _ in range(connections)))
+    stats.elapsed = time.perf_counter() - start
+    for _, writer in idle:
+        writer.close()
+    return stats
+
+
+async def wait_until_ready(host: str, port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(SCENARIOS["keep-alive"].request)
+            await read_response(reader)
+            writer.close()
+            return
+        except OSError:  # pragma: full coverage
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+@contextlib.contextmanager
+def run_server(loop: str, http: str = "auto", ws: str = "auto") -> Iterator[tuple[str, int, int]]:
+    """
+    Run the benchmark application in a child process, yielding its address and process ID.
+    """
+    config = Config(
+        "uvicorn.bench.app:app",
+        host="127.0.0.1",
+        port=0,
+        http=http,
+        ws=ws,
+        loop=loop,
+        lifespan="off",
+        access_log=False,
+        log_level="warning",
+    )
+    sock = config.bind_socket()
+    host, port = sock.getsockname()[:2]
+    process = get_subprocess(config, target=Server(config).run, sockets=[sock])
+    process.start()
+    try:
+        assert process.pid is not None
+        yield host, port, process.pid
+    finally:
+        process.terminate()
+        process.join()
+        sock.close()
+
+
+def run_benchmark(
+    scenario: str, http: str, loop: str, duration: float, connections: int, idle_connections: int
+) -> Result:
+    with run_server(loop, http=http) as (host, port, pid):
+        asyncio.run(wait_until_ready(host, port))
+        stats = asyncio.run(run_load(host, port, SCENARIOS[scenario], duration, connections, idle_connections))
+        peak_memory = get_peak_memory(pid)
+
+    return {
+        "benchmark": "http",
+        "scenario": scenario,
+        "implementation": http,
+        "requests": stats.requests,
+        "errors": stats.errors,
+        "metrics": {
+            "requests_per_second": stats.requests / stats.elapsed,
+            "latency_p50_ms": percentile(stats.latencies, 50) * 1000,
+            "latency_p99_ms": percentile(stats.latencies, 99) * 1000,
+            "max_rss_kib": peak_memory,
+        },
+    }
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import importlib.util
+
+import click
+
+from uvicorn.bench import http, micro, websocket
+from uvicorn.bench.results import baseline_option, output_option, report, tolerance_option
+
+HTTP_IMPLEMENTATIONS = ["h11", "httptools"]
+WS_IMPLEMENTATIONS = ["websockets", "websockets-sansio", "wsproto"]
+
+
+def get_installed(implementations: list[str]) -> list[str]:
+    """
+    The implementations whose library is installed.
+    """
+    return [name for name in implementations if importlib.util.find_spec(name.split("-")[0]) is not None]
+
+
+@click.group()
+def main() -> None:
+    """
+    Benchmark the Uvicorn protocol implementations.
+    """
+
+
+@main.command("http")
+@click.option(
+    "--http",
+    "implementations",
+    multiple=True,
+    type=click.Choice(HTTP_IMPLEMENTATIONS),
+    help="HTTP protocol implementation to benchmark. May be used multiple times. [default: all installed]",
+)
+@click.option(
+    "--scenario",
+    "scenarios",
+    multiple=True,
+    type=click.Choice(list(http.SCENARIOS)),
+    help="Scenario to run. May be used multiple times. [default: all]",
+)
+@click.option(
+    "--loop",
+    type=click.Choice(["auto", "asyncio", "uvloop"]),
+    default="auto",
+    help="Event loop implementation of the server.",
+    show_default=True,
+)
+@click.option("--duration", type=float, default=5.0, help="Seconds to run each scenario for.", show_default=True)
+@click.option("--connections", type=int, default=32, help="Number of busy connections.", show_default=True)
+@click.option(
+    "--idle-connections",
+    type=int,
+    default=1000,
+    help="Number of connections held open without requests, in the idle-connections scenario.",
+    show_default=True,
+)
+@output_option
+@baseline_option
+@tolerance_option
+def http_command(
+    implementations: list[str],
+    scenarios: list[str],
+    loop: str,
+    duration: float,
+    connections: int,
+    idle_connections: int,
+    output: str | None,
+    baseline: str | None,
+    tolerance: float,
+) -> None:
+    """
+    Measure the requests per second, latency and peak memory of a server running each HTTP protocol
+    implementation, for each scenario.
+    """
+    if not implementations:
+        implementations = get_installed(HTTP_IMPLEMENTATIONS)
+    results = []
+    for scenario in scenarios or http.SCENARIOS:
+        for implementation in implementations:
+            click.echo(f"Running http/{scenario}/{implementation}...", err=True)
+            results.append(http.run_benchmark(scenario, implementation, loop, duration, connections, idle_connections))
+    report(results, output, baseline, tolerance)
+
+
+@main.command("websocket")
+@click.option(
+    "--ws",
+    "implementations",
+    multiple=True,
+    type=click.Choice(WS_IMPLEMENTATIONS),
+    help="WebSocket protocol implementation to benchmark. May be used multiple times. [default: all installed]",
+)
+@click.option(
+    "--scenario",
+    "scenarios",
+    multiple=True,
+    type=click.Choice(list(websocket.SCENARIOS)),
+    help="Scenario to run. May be used multiple times. [default: all]",
+)
+@click.option(
+    "--loop",
+    type=click.Choice(["auto", "asyncio", "uvloop"]),
+    default="auto",
+    help="Event loop implementation of the server.",
+    show_default=True,
+)
+@click.option("--duration", type=float, default=5.0, help="Seconds to run each scenario for.", show_default=True)
+@click.option("--connections", type=int, default=100, help="Number of connections.", show_default=True)
+@output_option
+@baseline_option
+@tolerance_option
+def websocket_command(
+    implementations: list[str],
+    scenarios: list[str],
+    loop: str,
+    duration: float,
+    connections: int,
+    output: str | None,
+    baseline: str | None,
+    tolerance: float,
+) -> None:
+    """
+    Measure the messages per second, latency, memory per connection and CPU time per message of a
+    server running each WebSocket protocol implementation, for each scenario.
+    """
+    if not implementations:
+        implementations = get_installed(WS_IMPLEMENTATIONS)
+    results = []
+    for scenario in scenarios or websocket.SCENARIOS:
+        for implementation in implementations:
+            click.echo(f"Running websocket/{scenario}/{implementation}...", err=True)
+            results.append(websocket.run_benchmark(scenario, implementation, loop, duration, connections))
+    report(results, output, baseline, tolerance)
+
+
+@main.command("micro")
+@click.option(
+    "--http",
+    "http_implementations",
+    multiple=True,
+    type=click.Choice(HTTP_IMPLEMENTATIONS),
+    help="HTTP protocol implementation to benchmark. May be used multiple times. [default: all installed]",
+)
+@click.option(
+    "--ws",
+    "ws_implementations",
+    multiple=True,
+    type=click.Choice(WS_IMPLEMENTATIONS),
+    help="WebSocket protocol implementation to benchmark. May be used multiple times. [default: all installed]",
+)
+@click.option(
+    "--proxy-headers",
+    is_flag=True,
+    help="Benchmark the proxy headers middleware. [default: when no implementation is selected]",
+)
+@click.option(
+    "--iterations",
+    type=int,
+    default=100_000,
+    help="Number of requests or messages to measure for each implementation.",
+    show_default=True,
+)
+@output_option
+@baseline_option
+@tolerance_option
+def micro_command(
+    http_implementations: list[str],
+    ws_implementations: list[str],
+    proxy_headers: bool,
+    iterations: int,
+    output: str | None,
+    baseline: str | None,
+    tolerance: float,
+) -> None:
+    """
+    Measure the nanoseconds and bytes allocated per request or message spent in each protocol
+    implementation, and the nanoseconds per request spent in the proxy headers middleware, without
+    sockets.
+    """
+    if not http_implementations and not ws_implementations and not proxy_headers:
+        http_implementations = get_installed(HTTP_IMPLEMENTATIONS)
+        ws_implementations = get_installed(WS_IMPLEMENTATIONS)
+        proxy_headers = True
+    results = []
+    for implementation in http_implementations:
+        click.echo(f"Running micro/http/{implementation}...", err=True)
+        results.append(micro.run_http(implementation, iterations))
+    for implementation in ws_implementations:
+        click.echo(f"Running micro/websocket-echo/{implementation}...", err=True)
+        results.append(micro.run_websocket(implementation, iterations))
+    if proxy_headers:
+        click.echo("Running micro/proxy-headers...", err=True)
+        results.append(micro.run_proxy_headers(iterations))
+    report(results, output, baseline, tolerance)
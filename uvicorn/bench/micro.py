@@ -0,0 +1,338 @@
+"""
+Socket-free microbenchmarks, driving the protocol classes directly with an in-memory transport
+and a trivial application, so that only the cost of Uvicorn itself is measured.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import tracemalloc
+from collections.abc import Coroutine
+from typing import Any, Callable
+
+from uvicorn._types import ASGIReceiveCallable, ASGISendCallable, Scope
+from uvicorn.bench.results import Result
+from uvicorn.config import HTTP_PROTOCOLS, WS_PROTOCOLS, Config
+from uvicorn.importer import import_from_string
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+from uvicorn.server import ServerState
+
+HTTP_REQUEST = b"GET / HTTP/1.1\r\nHost: localhost\r\nUser-Agent: bench\r\nAccept: */*\r\n\r\n"
+
+WS_HANDSHAKE = (
+    b"GET / HTTP/1.1\r\n"
+    b"Host: localhost\r\n"
+    b"Upgrade: websocket\r\n"
+    b"Connection: Upgrade\r\n"
+    b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n"
+    b"Sec-WebSocket-Version: 13\r\n"
+    b"\r\n"
+)
+
+
+def client_frame(payload: bytes, opcode: int = 0x1, fin: bool = True, rsv1: bool = False) -> bytes:
+    """
+    A frame as sent by a client, masked with a zero key so that the payload is unchanged.
+    """
+    first = (0x80 if fin else 0) | (0x40 if rsv1 else 0) | opcode
+    length = len(payload)
+    if length < 126:
+        header = bytes([first, 0x80 | length])
+    elif length < 65536:
+        header = bytes([first, 0x80 | 126]) + length.to_bytes(2, "big")
+    else:
+        header = bytes([first, 0x80 | 127]) + length.to_bytes(8, "big")
+    return header + b"\x00\x00\x00\x00" + payload
+
+
+async def hello_app(scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-length", b"13")]})
+    await send({"type": "http.response.body", "body": b"Hello, world!"})
+
+
+async def echo_app(scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
+    await receive()
+    await send({"type": "websocket.accept"})
+    while True:
+        message = await receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        assert message["type"] == "websocket.receive"
+        text, data = message.get("text"), message.get("bytes")
+        if text is not None:
+            await send({"type": "websocket.send", "text": text})
+        elif data is not None:
+            await send({"type": "websocket.send", "bytes": data})
+
+
+class FakeTransport(asyncio.Transport):
+    """
+    An in-memory transport, discarding the data written to it.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.protocol: asyncio.Protocol | None = None
+        self.closing = False
+        self.written = 0
+        self.write_event: asyncio.Event | None = None
+
+    def get_extra_info(self, name: str, default: Any = None) -> Any:
+        return {"sockname": ("127.0.0.1", 8000), "peername": ("127.0.0.1", 50000)}.get(name, default)
+
+    def write(self, data: bytes | bytearray | memoryview) -> None:
+        self.written += len(data)
+        if self.write_event is not None:
+            self.write_event.set()
+
+    def close(self) -> None:
+        self.closing = True
+
+    def abort(self) -> None:
+        self.closing = True
+
+    def is_closing(self) -> bool:
+        return self.closing
+
+    def can_write_eof(self) -> bool:
+        return False
+
+    def pause_reading(self) -> None:
+        pass
+
+    def resume_reading(self) -> None:
+        pass
+
+    def is_reading(self) -> bool:
+        return True
+
+    def get_write_buffer_size(self) -> int:
+        return 0
+
+    def set_write_buffer_limits(self, high: int | None = None, low: int | None = None) -> None:
+        pass
+
+    def set_protocol(self, protocol: asyncio.BaseProtocol) -> None:
+        self.protocol = protocol  # type: ignore[assignment]
+
+    def get_protocol(self) -> asyncio.BaseProtocol:
+        assert self.protocol is not None
+        return self.protocol
+
+
+class FakeTask:
+    def __init__(self, coroutine: Coroutine[Any, Any, None]) -> None:
+        self.coroutine = coroutine
+        self.callbacks: list[Callable[[FakeTask], None]] = []
+
+    def add_done_callback(self, callback: Callable[[FakeTask], None]) -> None:
+        self.callbacks.append(callback)
+
+    def run(self) -> None:
+        """
+        Run the task to completion. It must not wait for anything, as there is no event loop.
+        """
+        try:
+            self.coroutine.send(None)
+        except StopIteration:
+            pass
+        else:  # pragma: no cover
+            raise RuntimeError("The task is waiting, but there is no event loop to resume it.")
+        for callback in self.callbacks:
+            callback(self)
+
+
+class FakeTimerHandle:
+    def cancel(self) -> None:
+        pass
+
+
+class FakeLoop:
+    """
+    Runs the tasks created by the protocols only when told to, so that each stage can be measured.
+    """
+
+    def __init__(self) -> None:
+        self.tasks: list[FakeTask] = []
+
+    def create_task(self, coroutine: Coroutine[Any, Any, None]) -> FakeTask:
+        task = FakeTask(coroutine)
+        self.tasks.append(task)
+        return task
+
+    def call_later(self, delay: float, callback: Callable[..., None], *args: Any) -> FakeTimerHandle:
+        return FakeTimerHandle()
+
+    def time(self) -> float:
+        return time.monotonic()
+
+    def run_tasks(self) -> None:
+        while self.tasks:
+            self.tasks.pop(0).run()
+
+
+class StageStats:
+    def __init__(self) -> None:
+        self.ns = 0
+        self.peak_bytes = 0
+
+
+def run_http(implementation: str, requests: int) -> Result:
+    """
+    Measure the time and memory spent per request by an HTTP protocol, in two stages: receiving and
+    parsing the request up to creating the application task, and running the application, which
+    includes serializing and writing its response.
+    """
+    config = Config(app=hello_app, http=implementation, lifespan="off", log_level="warning")
+    config.load()
+    protocol_cls = import_from_string(HTTP_PROTOCOLS[implementation])
+    loop = FakeLoop()
+    transport = FakeTransport()
+    protocol = protocol_cls(config=config, server_state=ServerState(), app_state={}, _loop=loop)
+    protocol.connection_made(transport)
+
+    def receive() -> None:
+        protocol.data_received(HTTP_REQUEST)
+
+    stages = {"receive": receive, "respond": loop.run_tasks}
+    stats = {name: StageStats() for name in stages}
+
+    # Warm up, then time each stage.
+    for _ in range(min(requests, 1000)):
+        for stage in stages.values():
+            stage()
+    for _ in range(requests):
+        for name, stage in stages.items():
+            start = time.perf_counter_ns()
+            stage()
+            stats[name].ns += time.perf_counter_ns() - start
+
+    # Trace the memory allocated by each stage separately, as tracing slows everything down.
+    tracemalloc.start()
+    retained = tracemalloc.get_traced_memory()[0]
+    for _ in range(requests):
+        for name, stage in stages.items():
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            stage()
+            stats[name].peak_bytes += tracemalloc.get_traced_memory()[1] - current
+    retained = tracemalloc.get_traced_memory()[0] - retained
+    tracemalloc.stop()
+    protocol.connection_lost(None)
+
+    metrics: dict[str, float] = {"ns_per_request": sum(stage_stats.ns for stage_stats in stats.values()) / requests}
+    for name, stage_stats in stats.items():
+        metrics[f"{name}_ns_per_request"] = stage_stats.ns / requests
+        metrics[f"{name}_peak_bytes_per_request"] = stage_stats.peak_bytes / requests
+    metrics["retained_bytes_per_request"] = retained / requests
+    return {"benchmark": "micro", "scenario": "http", "implementation": implementation, "metrics": metrics}
+
+
+async def _run_websocket(implementation: str, messages: int, payload: bytes) -> Result:
+    config = Config(app=echo_app, ws=implementation, lifespan="off", log_level="warning")
+    config.load()
+    protocol_cls = import_from_string(WS_PROTOCOLS[implementation])
+    transport = FakeTransport()
+    transport.write_event = asyncio.Event()
+    server_state = ServerState()
+    protocol = protocol_cls(config=config, server_state=server_state, app_state={})
+    protocol.connection_made(transport)
+    protocol.data_received(WS_HANDSHAKE)
+    await transport.write_event.wait()
+    frame = client_frame(payload)
+
+    async def echo() -> None:
+        assert transport.write_event is not None
+        transport.write_event.clear()
+        protocol.data_received(frame)
+        await transport.write_event.wait()
+
+    for _ in range(min(messages, 1000)):
+        await echo()
+    elapsed = 0
+    for _ in range(messages):
+        start = time.perf_counter_ns()
+        await echo()
+        elapsed += time.perf_counter_ns() - start
+
+    tracemalloc.start()
+    retained = tracemalloc.get_traced_memory()[0]
+    peak_bytes = 0
+    for _ in range(messages):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        await echo()
+        peak_bytes += tracemalloc.get_traced_memory()[1] - current
+    retained = tracemalloc.get_traced_memory()[0] - retained
+    tracemalloc.stop()
+
+    # Close the connection, and let the application return.
+    protocol.data_received(client_frame(b"\x03\xe8", opcode=0x8))
+    protocol.connection_lost(None)
+    await asyncio.wait(server_state.tasks, timeout=1)
+    return {
+        "benchmark": "micro",
+        "scenario": "websocket-echo",
+        "implementation": implementation,
+        "metrics": {
+            "ns_per_message": elapsed / messages,
+            "peak_bytes_per_message": peak_bytes / messages,
+            "retained_bytes_per_message": retained / messages,
+        },
+    }
+
+
+def run_websocket(implementation: str, messages: int, payload: bytes = b"Hello, world!") -> Result:
+    """
+    Measure the time and memory spent by a WebSocket protocol to receive a text message and echo it
+    back, including the event loop iterations between the protocol and the application.
+    """
+    return asyncio.run(_run_websocket(implementation, messages, payload))
+
+
+async def _noop_app(scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
+    pass
+
+
+def run_proxy_headers(requests: int, networks: int = 256, clients: int = 10_000) -> Result:
+    """
+    Measure the time spent by the proxy headers middleware per request, trusting `networks` networks,
+    for requests forwarded by two trusted proxies on behalf of `clients` different clients.
+    """
+    trusted_hosts = [f"10.{index // 256}.{index % 256}.0/24" for index in range(networks)]
+    middleware = ProxyHeadersMiddleware(_noop_app, trusted_hosts)
+    proxy = f"10.{(networks - 1) // 256}.{(networks - 1) % 256}.1"
+    scopes: list[dict[str, Any]] = []
+    for index in range(clients):
+        client = f"192.0.{index // 256 % 256}.{index % 256}" if index < 65536 else f"2001:db8::{index:x}"
+        headers = [
+            (b"host", b"localhost"),
+            (b"user-agent", b"bench"),
+            (b"accept", b"*/*"),
+            (b"x-forwarded-proto", b"https"),
+            (b"x-forwarded-for", f"{client}, {proxy}".encode()),
+        ]
+        scopes.append({"type": "http", "scheme": "http", "client": (proxy, 50000), "headers": headers})
+
+    def call(scope: dict[str, Any]) -> None:
+        # The middleware sets the client and scheme of the scope, so each request gets a copy of it.
+        try:
+            middleware(scope.copy(), None, None).send(None)  # type: ignore[arg-type]
+        except StopIteration:
+            pass
+
+    for index in range(min(requests, 1000)):
+        call(scopes[index % clients])
+    elapsed = 0
+    for index in range(requests):
+        scope = scopes[index % clients]
+        start = time.perf_counter_ns()
+        call(scope)
+        elapsed += time.perf_counter_ns() - start
+    return {
+        "benchmark": "micro",
+        "scenario": "proxy-headers",
+        "implementation": "uvicorn",
+        "metrics": {"ns_per_request": elapsed / requests},
+    }
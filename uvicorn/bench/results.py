@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+import sys
+from pathlib import Path
+from typing import Any
+
+import click
+
+import uvicorn
+
+# A benchmark result: the benchmark, scenario and implementation it was run for, along with its metrics.
+# Metrics ending with `_per_second` are better when higher, and all others when lower.
+Result = dict[str, Any]
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """
+    The nearest-rank percentile of `values`, or 0 if there are none.
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+
+def get_peak_memory(pid: int, field: str = "VmHWM") -> int | None:
+    """
+    The peak resident set size of a process in KiB, or its current one with `field="VmRSS"`, where
+    `/proc` is available.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1])
+    except OSError:  # pragma: py-linux
+        pass
+    return None  # pragma: py-linux
+
+
+def get_cpu_time(pid: int) -> float | None:
+    """
+    The user and system CPU time used by a process in seconds, where `/proc` is available.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            # The fields after the command name, which may contain spaces, start with the state.
+            fields = stat.read().rpartition(")")[2].split()
+    except OSError:  # pragma: py-linux
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def compare(results: list[Result], baseline: list[Result], tolerance: float) -> list[str]:
+    """
+    Compare results with a baseline, returning a message for each metric that regressed by more than
+    the `tolerance` ratio.
+    """
+    baseline_results = {
+        (result["benchmark"], result["scenario"], result["implementation"]): result for result in baseline
+    }
+    regressions = []
+    for result in results:
+        key = (result["benchmark"], result["scenario"], result["implementation"])
+        if key not in baseline_results:
+            continue
+        for metric, value in result["metrics"].items():
+            expected = baseline_results[key]["metrics"].get(metric)
+            if value is None or not expected:
+                continue
+            if metric.endswith("_per_second"):
+                regressed = value < expected * (1 - tolerance)
+            else:
+                regressed = value > expected * (1 + tolerance)
+            if regressed:
+                regressions.append(f"{'/'.join(key)}: {metric} {value:.6g} (baseline {expected:.6g})")
+    return regressions
+
+
+def report(results: list[Result], output: str | None, baseline: str | None, tolerance: float) -> None:
+    """
+    Write the results as JSON to `output` or stdout, and exit with an error if they regressed from
+    the results stored in `baseline`.
+    """
+    document = {
+        "uvicorn": uvicorn.__version__,
+        "python": platform.python_version(),
+        "implementation": sys.implementation.name,
+        "results": results,
+    }
+    content = json.dumps(document, indent=2)
+    if output is None:
+        click.echo(content)
+    else:
+        Path(output).write_text(content + "\n")
+
+    if baseline is not None:
+        regressions = compare(results, json.loads(Path(baseline).read_text())["results"], tolerance)
+        for regression in regressions:
+            click.secho(f"Regression: {regression}", fg="red", err=True)
+        if regressions:
+            sys.exit(1)
+
+
+output_option = click.option(
+    "--output", type=click.Path(dir_okay=False), help="Write the results as JSON to this file."
+)
+baseline_option = click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Compare the results with those stored in this file, and fail on regressions.",
+)
+tolerance_option = click.option(
+    "--tolerance",
+    type=float,
+    default=0.1,
+    help="Ratio by which a metric may be worse than its baseline.",
+    show_default=True,
+)
@@ -0,0 +1,252 @@
+"""
+A WebSocket load generator, to compare the throughput, latency, memory and CPU usage of the
+WebSocket protocol implementations across a few scenarios.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import os
+import time
+import zlib
+
+from uvicorn.bench.http import run_server, wait_until_ready
+from uvicorn.bench.micro import client_frame
+from uvicorn.bench.results import Result, get_cpu_time, get_peak_memory, percentile
+
+FRAGMENT_SIZE = 64 * 1024
+CHAT_MESSAGE = b'{"user": "alice", "room": "general", "text": "Hello, world!"}\n'
+
+
+class Scenario:
+    def __init__(self, path: str, payload: bytes, fragments: int = 1, deflate: bool = False) -> None:
+        self.path = path
+        self.payload = payload
+        self.fragments = fragments
+        self.deflate = deflate
+
+
+SCENARIOS = {
+    "echo": Scenario("/", CHAT_MESSAGE),
+    "broadcast": Scenario("/broadcast", CHAT_MESSAGE),
+    "large-fragmented": Scenario("/", b"x" * 16 * FRAGMENT_SIZE, fragments=16),
+    "deflate": Scenario("/", CHAT_MESSAGE * 64, deflate=True),
+}
+
+
+class Client:
+    """
+    A minimal WebSocket client, sending and receiving text messages.
+    """
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, client_max_window_bits: int | None = None
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.compressor = None
+        self.decompressor = None
+        if client_max_window_bits is not None:
+            self.compressor = zlib.compressobj(wbits=-client_max_window_bits)
+            self.decompressor = zlib.decompressobj(wbits=-15)
+
+    @classmethod
+    async def connect(cls, host: str, port: int, path: str, deflate: bool = False) -> Client:
+        """
+        Open a connection, negotiating the `permessage-deflate` extension if `deflate` is set.
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n"
+        )
+        if deflate:
+            request += "Sec-WebSocket-Extensions: permessage-deflate; client_max_window_bits\r\n"
+        writer.write(request.encode() + b"\r\n")
+        head = (await reader.readuntil(b"\r\n\r\n")).decode()
+
+        client_max_window_bits = None
+        for line in head.split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "sec-websocket-extensions" and "permessage-deflate" in value:
+                client_max_window_bits = 15
+                for param in value.split(";"):
+                    param_name, _, bits = param.strip().partition("=")
+                    if param_name == "client_max_window_bits" and bits:
+                        client_max_window_bits = int(bits.strip('"'))
+        if not head.startswith("HTTP/1.1 101") or (deflate and client_max_window_bits is None):
+            writer.close()
+            raise ConnectionError(f"The WebSocket handshake failed: {head.splitlines()[0]}")
+        return cls(reader, writer, client_max_window_bits)
+
+    def send(self, payload: bytes, fragments: int = 1) -> None:
+        """
+        Send a text message, compressed if `permessage-deflate` was negotiated, in `fragments` frames.
+        """
+        compressed = self.compressor is not None
+        if self.compressor is not None:
+            payload = self.compressor.compress(payload) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+            # The empty block ending the flushed data is left out of the message.
+            payload = payload[:-4]
+        size = -(-len(payload) // fragments)
+        frames = []
+        for index in range(fragments):
+            frames.append(
+                client_frame(
+                    payload[index * size : (index + 1) * size],
+                    opcode=0x0 if index else 0x1,
+                    fin=index == fragments - 1,
+                    rsv1=compressed and not index,
+                )
+            )
+        self.writer.write(b"".join(frames))
+
+    async def receive(self) -> bytes:
+        """
+        Read a message, answering the pings received before it.
+        """
+        chunks = []
+        compressed = False
+        while True:
+            first, second = await self.reader.readexactly(2)
+            length = second & 0x7F
+            if length == 126:
+                length = int.from_bytes(await self.reader.readexactly(2), "big")
+            elif length == 127:
+                length = int.from_bytes(await self.reader.readexactly(8), "big")
+            payload = await self.reader.readexactly(length)
+            opcode = first & 0x0F
+            if opcode == 0x8:
+                raise ConnectionError("The server closed the connection.")
+            if opcode == 0x9:
+                self.writer.write(client_frame(payload, opcode=0xA))
+                continue
+            if opcode == 0xA:
+                continue
+            if opcode != 0x0:
+                compressed = bool(first & 0x40)
+            chunks.append(payload)
+            if first & 0x80:
+                break
+        message = b"".join(chunks)
+        if compressed:
+            assert self.decompressor is not None
+            message = self.decompressor.decompress(message + b"\x00\x00\xff\xff")
+        return message
+
+    def close(self) -> None:
+        self.writer.write(client_frame(b"\x03\xe8", opcode=0x8))
+        self.writer.close()
+
+
+class LoadStats:
+    def __init__(self) -> None:
+        self.messages = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self.latencies: list[float] = []
+
+
+async def connect(host: str, port: int, scenario: Scenario, connections: int, stats: LoadStats) -> list[Client]:
+    """
+    Open `connections` connections for the scenario, counting those that failed as errors.
+    """
+    clients = []
+    for _ in range(connections):
+        try:
+            clients.append(await Client.connect(host, port, scenario.path, scenario.deflate))
+        except (OSError, asyncio.IncompleteReadError):
+            stats.errors += 1
+    return clients
+
+
+async def run_echo(client: Client, scenario: Scenario, deadline: float, stats: LoadStats) -> None:
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            client.send(scenario.payload, scenario.fragments)
+            await client.receive()
+            stats.latencies.append(time.perf_counter() - start)
+            stats.messages += 1
+    except (OSError, asyncio.IncompleteReadError):  # pragma: full coverage
+        stats.errors += 1
+
+
+async def run_broadcast(clients: list[Client], scenario: Scenario, deadline: float, stats: LoadStats) -> None:
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            clients[0].send(scenario.payload, scenario.fragments)
+            await asyncio.gather(*(client.receive() for client in clients))
+            stats.latencies.append(time.perf_counter() - start)
+            stats.messages += len(clients)
+    except (OSError, asyncio.IncompleteReadError):  # pragma: full coverage
+        stats.errors += 1
+
+
+async def run_load(clients: list[Client], scenario: Scenario, duration: float, stats: LoadStats) -> None:
+    """
+    Send messages for `duration` seconds. Each client sends the next message once its echo is
+    received, except when broadcasting, where the first client sends the next message once all
+    clients received the previous one.
+    """
+    start = time.perf_counter()
+    deadline = start + duration
+    if scenario.path == "/broadcast":
+        if clients:
+            await run_broadcast(clients, scenario, deadline, stats)
+    else:
+        await asyncio.gather(*(run_echo(client, scenario, deadline, stats) for client in clients))
+    stats.elapsed = time.perf_counter() - start
+
+
+async def measure(
+    host: str, port: int, pid: int, scenario: Scenario, duration: float, connections: int
+) -> tuple[LoadStats, dict[str, float | None]]:
+    """
+    Run the load, measuring the memory used by the connections and the CPU time used by the server.
+    """
+    await wait_until_ready(host, port)
+    stats = LoadStats()
+    rss = get_peak_memory(pid, "VmRSS")
+    clients = await connect(host, port, scenario, connections, stats)
+    connected_rss = get_peak_memory(pid, "VmRSS")
+    cpu_time = get_cpu_time(pid)
+    await run_load(clients, scenario, duration, stats)
+    loaded_cpu_time = get_cpu_time(pid)
+    for client in clients:
+        client.close()
+
+    metrics: dict[str, float | None] = {"rss_per_connection_kib": None, "cpu_us_per_message": None}
+    if rss is not None and connected_rss is not None and clients:  # pragma: py-not-linux
+        metrics["rss_per_connection_kib"] = max(connected_rss - rss, 0) / len(clients)
+    if cpu_time is not None and loaded_cpu_time is not None and stats.messages:  # pragma: py-not-linux
+        metrics["cpu_us_per_message"] = (loaded_cpu_time - cpu_time) / stats.messages * 1_000_000
+    return stats, metrics
+
+
+def run_benchmark(scenario: str, ws: str, loop: str, duration: float, connections: int) -> Result:
+    with run_server(loop, ws=ws) as (host, port, pid):
+        stats, metrics = asyncio.run(measure(host, port, pid, SCENARIOS[scenario], duration, connections))
+        peak_memory = get_peak_memory(pid)
+
+    return {
+        "benchmark": "websocket",
+        "scenario": scenario,
+        "implementation": ws,
+        "messages": stats.messages,
+        "errors": stats.errors,
+        "metrics": {
+            "messages_per_second": stats.messages / stats.elapsed,
+            "latency_p50_ms": percentile(stats.latencies, 50) * 1000,
+            "latency_p99_ms": percentile(stats.latencies, 99) * 1000,
+            **metrics,
+            "max_rss_kib": peak_memory,
+        },
+    }
@@ -22,13 +22,15 @@ from uvicorn.logging import TRACE_LOG_LEVEL
 from uvicorn.middleware.asgi2 import ASGI2Middleware
 from uvicorn.middleware.message_logger import MessageLoggerMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
-from uvicorn.middleware.wsgi import WSGIMiddleware
+from uvicorn.middleware.wsgi import WSGIExecutor, WSGIMiddleware
+from uvicorn.protocols.http.static import parse_static_mount
 
 HTTPProtocolType = Literal["auto", "h11", "httptools"]
 WSProtocolType = Literal["auto", "none", "websockets", "websockets-sansio", "wsproto"]
 LifespanType = Literal["auto", "on", "off"]
 LoopFactoryType = Literal["none", "auto", "asyncio", "uvloop"]
 InterfaceType = Literal["auto", "asgi3", "asgi2", "wsgi"]
+WorkerAffinityType = Literal["none", "core", "numa"]
 
 LOG_LEVELS: dict[str, int] = {
     "critical": logging.CRITICAL,
@@ -62,9 +64,27 @@ LOOP_FACTORIES: dict[str, str | None] = {
     "uvloop": "uvicorn.loops.uvloop:uvloop_loop_factory",
 }
 INTERFACES: list[InterfaceType] = ["auto", "asgi3", "asgi2", "wsgi"]
+WORKER_AFFINITIES: list[WorkerAffinityType] = ["none", "core", "numa"]
 
 SSL_PROTOCOL_VERSION: int = ssl.PROTOCOL_TLS_SERVER
 
+# Socket options that can be set with `socket_options`, and their level. Listener options are set on the
+# listening sockets, and connection options on each accepted connection.
+LISTENER_SOCKET_OPTIONS: dict[str, int] = {
+    "SO_RCVBUF": socket.SOL_SOCKET,
+    "SO_SNDBUF": socket.SOL_SOCKET,
+    "TCP_DEFER_ACCEPT": socket.IPPROTO_TCP,
+    "TCP_FASTOPEN": socket.IPPROTO_TCP,
+}
+CONNECTION_SOCKET_OPTIONS: dict[str, int] = {
+    "TCP_NODELAY": socket.IPPROTO_TCP,
+    "SO_KEEPALIVE": socket.SOL_SOCKET,
+    "TCP_KEEPIDLE": socket.IPPROTO_TCP,
+    "TCP_KEEPINTVL": socket.IPPROTO_TCP,
+    "TCP_KEEPCNT": socket.IPPROTO_TCP,
+    "TCP_USER_TIMEOUT": socket.IPPROTO_TCP,
+}
+
 LOGGING_CONFIG: dict[str, Any] = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -121,6 +141,41 @@ def create_ssl_context(
     return ctx
 
 
+def resolve_socket_options(
+    socket_options: dict[str, int],
+) -> tuple[list[tuple[int, int, int]], list[tuple[int, int, int]]]:
+    """
+    Split `socket_options` into the `(level, option, value)` arguments of `setsockopt()`
+    for the listening sockets, and for the accepted connections.
+    """
+    listener_options: list[tuple[int, int, int]] = []
+    connection_options: list[tuple[int, int, int]] = []
+    for name, value in socket_options.items():
+        name = name.upper()
+        if name in LISTENER_SOCKET_OPTIONS:
+            level, options = LISTENER_SOCKET_OPTIONS[name], listener_options
+        elif name in CONNECTION_SOCKET_OPTIONS:
+            level, options = CONNECTION_SOCKET_OPTIONS[name], connection_options
+        else:
+            supported = ", ".join(sorted({**LISTENER_SOCKET_OPTIONS, **CONNECTION_SOCKET_OPTIONS}))
+            raise ValueError(f"Unsupported socket option '{name}'. Supported options are: {supported}.")
+        if not hasattr(socket, name):  # pragma: py-linux
+            logger.warning("Socket option '%s' is not available on this platform, ignoring it.", name)
+            continue
+        options.append((level, getattr(socket, name), int(value)))
+    return listener_options, connection_options
+
+
+def set_socket_options(sock: socket.socket, options: list[tuple[int, int, int]]) -> None:
+    """
+    Apply `setsockopt()` options to a TCP socket. Other sockets, such as UNIX domain sockets, are left alone.
+    """
+    if sock.family not in (socket.AF_INET, socket.AF_INET6):
+        return
+    for level, option, value in options:
+        sock.setsockopt(level, option, value)
+
+
 def is_dir(path: Path) -> bool:
     try:
         if not path.is_absolute():
@@ -197,23 +252,40 @@ class Config:
         access_log: bool = True,
         use_colors: bool | None = None,
         interface: InterfaceType = "auto",
+        wsgi_threads: int = 10,
+        wsgi_min_threads: int | None = None,
+        wsgi_max_queued: int | None = None,
         reload: bool = False,
         reload_dirs: list[str] | str | None = None,
         reload_delay: float = 0.25,
         reload_includes: list[str] | str | None = None,
         reload_excludes: list[str] | str | None = None,
         workers: int | None = None,
+        workers_max: int | None = None,
+        worker_affinity: WorkerAffinityType = "none",
+        profile_dir: str | None = None,
+        loop_lag_threshold: float | None = None,
         proxy_headers: bool = True,
+        proxy_protocol: bool = False,
         server_header: bool = True,
         date_header: bool = True,
         forwarded_allow_ips: list[str] | str | None = None,
         root_path: str = "",
         limit_concurrency: int | None = None,
         limit_max_requests: int | None = None,
+        limit_connection_memory: int | None = None,
+        limit_server_memory: int | None = None,
+        read_high_water: int = 65536,
+        write_high_water: int | None = None,
+        write_low_water: int | None = None,
         backlog: int = 2048,
         timeout_keep_alive: int = 5,
+        keep_alive_pressure: int | None = None,
         timeout_notify: int = 30,
         timeout_graceful_shutdown: int | None = None,
+        timeout_worker_healthcheck: int = 5,
+        timeout_request_header: int | None = None,
+        min_request_body_rate: int | None = None,
         callback_notify: Callable[..., Awaitable[None]] | None = None,
         ssl_keyfile: str | os.PathLike[str] | None = None,
         ssl_certfile: str | os.PathLike[str] | None = None,
@@ -225,6 +297,13 @@ class Config:
         headers: list[tuple[str, str]] | None = None,
         factory: bool = False,
         h11_max_incomplete_event_size: int | None = None,
+        eager_tasks: bool = False,
+        response_cache_size: int | None = None,
+        coalesce_paths: list[str] | None = None,
+        coalesce_max_size: int = 1024 * 1024,
+        static: list[str] | None = None,
+        static_max_open_files: int = 256,
+        socket_options: dict[str, int] | None = None,
     ):
         self.app = app
         self.host = host
@@ -245,19 +324,37 @@ class Config:
         self.access_log = access_log
         self.use_colors = use_colors
         self.interface = interface
+        self.wsgi_threads = wsgi_threads
+        self.wsgi_min_threads = wsgi_min_threads
+        self.wsgi_max_queued = wsgi_max_queued
+        self.wsgi_executor: WSGIExecutor | None = None
         self.reload = reload
         self.reload_delay = reload_delay
         self.workers = workers or 1
+        self.workers_max = workers_max
+        self.worker_affinity = worker_affinity
+        self.profile_dir = profile_dir
+        self.loop_lag_threshold = loop_lag_threshold
         self.proxy_headers = proxy_headers
+        self.proxy_protocol = proxy_protocol
         self.server_header = server_header
         self.date_header = date_header
         self.root_path = root_path
         self.limit_concurrency = limit_concurrency
         self.limit_max_requests = limit_max_requests
+        self.limit_connection_memory = limit_connection_memory
+        self.limit_server_memory = limit_server_memory
+        self.read_high_water = read_high_water
+        self.write_high_water = write_high_water
+        self.write_low_water = write_low_water
         self.backlog = backlog
         self.timeout_keep_alive = timeout_keep_alive
+        self.keep_alive_pressure = keep_alive_pressure
         self.timeout_notify = timeout_notify
         self.timeout_graceful_shutdown = timeout_graceful_shutdown
+        self.timeout_worker_healthcheck = timeout_worker_healthcheck
+        self.timeout_request_header = timeout_request_header
+        self.min_request_body_rate = min_request_body_rate
         self.callback_notify = callback_notify
         self.ssl_keyfile = ssl_keyfile
         self.ssl_certfile = ssl_certfile
@@ -270,6 +367,13 @@ class Config:
         self.encoded_headers: list[tuple[bytes, bytes]] = []
         self.factory = factory
         self.h11_max_incomplete_event_size = h11_max_incomplete_event_size
+        self.eager_tasks = eager_tasks
+        self.response_cache_size = response_cache_size
+        self.coalesce_paths = coalesce_paths
+        self.coalesce_max_size = coalesce_max_size
+        self.static_mounts = [parse_static_mount(mount) for mount in static or []]
+        self.static_max_open_files = static_max_open_files
+        self.socket_options = socket_options or {}
 
         self.loaded = False
         self.configure_logging()
@@ -321,6 +425,12 @@ class Config:
                 sorted(list(map(str, self.reload_dirs))),
             )
 
+        try:
+            self.listener_socket_options, self.connection_socket_options = resolve_socket_options(self.socket_options)
+        except ValueError as exc:
+            logger.error(exc)
+            sys.exit(1)
+
         if env_file is not None:
             from dotenv import load_dotenv
 
@@ -339,6 +449,17 @@ class Config:
         if self.reload and self.workers > 1:
             logger.warning('"workers" flag is ignored when reloading is enabled.')
 
+        if self.workers_max is not None and self.workers_max < self.workers:
+            logger.warning('"workers_max" is lower than "workers", disabling autoscaling.')
+            self.workers_max = None
+
+        if self.eager_tasks and sys.version_info < (3, 12):  # pragma: py-gte-312
+            logger.warning('"eager_tasks" requires Python 3.12 or later, and is ignored.')
+
+        if self.proxy_protocol and self.is_ssl:
+            logger.warning('"proxy_protocol" is ignored with SSL, as the header would precede the TLS handshake.')
+            self.proxy_protocol = False
+
     @property
     def asgi_version(self) -> Literal["2.0", "3.0"]:
         mapping: dict[str, Literal["2.0", "3.0"]] = {
@@ -354,7 +475,7 @@ class Config:
 
     @property
     def use_subprocess(self) -> bool:
-        return bool(self.reload or self.workers > 1)
+        return bool(self.reload or self.workers > 1 or self.workers_max is not None)
 
     def configure_logging(self) -> None:
         logging.addLevelName(TRACE_LOG_LEVEL, "TRACE")
@@ -461,7 +582,11 @@ class Config:
             self.interface = "asgi3" if use_asgi_3 else "asgi2"
 
         if self.interface == "wsgi":
-            self.loaded_app = WSGIMiddleware(self.loaded_app)
+            # Requests waiting for a thread count towards `limit_concurrency`, so there is no use for
+            # more threads than it allows requests.
+            max_threads = min(self.wsgi_threads, self.limit_concurrency or self.wsgi_threads)
+            self.wsgi_executor = WSGIExecutor(max_threads, self.wsgi_min_threads, max_queued=self.wsgi_max_queued)
+            self.loaded_app = WSGIMiddleware(self.loaded_app, executor=self.wsgi_executor)
             self.ws_protocol_class = None
         elif self.interface == "asgi2":
             self.loaded_app = ASGI2Middleware(self.loaded_app)
@@ -520,6 +645,8 @@ class Config:
 
             sock = socket.socket(family=family)
             sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            # Set before the socket starts listening, for options such as `SO_RCVBUF` to take effect.
+            set_socket_options(sock, self.listener_socket_options)
             try:
                 sock.bind((self.host, self.port))
             except OSError as exc:  # pragma: full coverage
@@ -20,11 +20,13 @@ from uvicorn.config import (
     LOG_LEVELS,
     LOGGING_CONFIG,
     SSL_PROTOCOL_VERSION,
+    WORKER_AFFINITIES,
     Config,
     HTTPProtocolType,
     InterfaceType,
     LifespanType,
     LoopFactoryType,
+    WorkerAffinityType,
     WSProtocolType,
 )
 from uvicorn.server import Server
@@ -33,6 +35,7 @@ from uvicorn.supervisors import ChangeReload, Multiprocess
 LEVEL_CHOICES = click.Choice(list(LOG_LEVELS.keys()))
 LIFESPAN_CHOICES = click.Choice(list(LIFESPAN.keys()))
 INTERFACE_CHOICES = click.Choice(INTERFACES)
+WORKER_AFFINITY_CHOICES = click.Choice(WORKER_AFFINITIES)
 
 
 def _metavar_from_type(_type: Any) -> str:
@@ -44,6 +47,17 @@ STARTUP_FAILURE = 3
 logger = logging.getLogger("uvicorn.error")
 
 
+def parse_socket_options(ctx: click.Context, param: click.Parameter, value: tuple[str, ...]) -> dict[str, int]:
+    socket_options: dict[str, int] = {}
+    for option in value:
+        name, _, option_value = option.partition("=")
+        try:
+            socket_options[name] = int(option_value)
+        except ValueError:
+            raise click.BadParameter(f"'{option}' is not in the NAME=VALUE format, with an integer value.")
+    return socket_options
+
+
 def print_version(ctx: click.Context, param: click.Parameter, value: bool) -> None:
     if not value or ctx.resilient_parsing:
         return
@@ -115,6 +129,34 @@ def print_version(ctx: click.Context, param: click.Parameter, value: bool) -> No
     help="Number of worker processes. Defaults to the $WEB_CONCURRENCY environment"
     " variable if available, or 1. Not valid with --reload.",
 )
+@click.option(
+    "--workers-max",
+    default=None,
+    type=int,
+    help="Enable autoscaling of worker processes based on their load, between --workers and this maximum number"
+    " of processes. Not valid with --reload.",
+)
+@click.option(
+    "--worker-affinity",
+    type=WORKER_AFFINITY_CHOICES,
+    default="none",
+    help="Pin each worker process to a single CPU core, or to the CPUs of a NUMA node. Only available on Linux.",
+    show_default=True,
+)
+@click.option(
+    "--profile-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Enable the sampling profiler, started and stopped in each worker process with SIGUSR2, and write the"
+    " profiles to this directory. Not available on Windows.",
+)
+@click.option(
+    "--loop-lag-threshold",
+    type=float,
+    default=None,
+    help="Log a warning, with the stack of the event loop thread, whenever the event loop is blocked for longer"
+    " than this number of seconds.",
+)
 @click.option(
     "--loop",
     type=str,
@@ -188,6 +230,27 @@ def print_version(ctx: click.Context, param: click.Parameter, value: bool) -> No
     help="Select ASGI3, ASGI2, or WSGI as the application interface.",
     show_default=True,
 )
+@click.option(
+    "--wsgi-threads",
+    type=int,
+    default=10,
+    help="Maximum number of threads WSGI applications run in.",
+    show_default=True,
+)
+@click.option(
+    "--wsgi-min-threads",
+    type=int,
+    default=None,
+    help="Minimum number of threads WSGI applications run in. When set, threads are started up to "
+    "--wsgi-threads while requests wait for one, and stopped once idle.",
+)
+@click.option(
+    "--wsgi-max-queued",
+    type=int,
+    default=None,
+    help="Maximum number of requests waiting for a thread of WSGI applications, beyond which requests are "
+    "responded to with a 503.",
+)
 @click.option(
     "--env-file",
     type=click.Path(exists=True),
@@ -227,6 +290,14 @@ def print_version(ctx: click.Context, param: click.Parameter, value: bool) -> No
     default=True,
     help="Enable/Disable X-Forwarded-Proto, X-Forwarded-For to populate url scheme and remote address info.",
 )
+@click.option(
+    "--proxy-protocol/--no-proxy-protocol",
+    is_flag=True,
+    default=False,
+    help="Enable/Disable reading the client and server addresses from a PROXY protocol v1 or v2 header "
+    "at the start of each connection. Connections without one are closed.",
+    show_default=True,
+)
 @click.option(
     "--server-header/--no-server-header",
     is_flag=True,
@@ -260,6 +331,41 @@ def print_version(ctx: click.Context, param: click.Parameter, value: bool) -> No
     default=None,
     help="Maximum number of concurrent connections or tasks to allow, before issuing HTTP 503 responses.",
 )
+@click.option(
+    "--limit-connection-memory",
+    type=int,
+    default=None,
+    help="Maximum number of bytes a connection may hold across its buffered request body and its write buffer,"
+    " before reading from it is paused.",
+)
+@click.option(
+    "--limit-server-memory",
+    type=int,
+    default=None,
+    help="Maximum number of bytes of request body buffered across all connections of a worker, before reading"
+    " is paused on the connections holding the most.",
+)
+@click.option(
+    "--read-high-water",
+    type=int,
+    default=65536,
+    help="Number of bytes of request body to buffer per connection, before reading from it is paused.",
+    show_default=True,
+)
+@click.option(
+    "--write-high-water",
+    type=int,
+    default=None,
+    help="Size of a connection's write buffer above which the application waits for it to be flushed."
+    " Defaults to the event loop's own limit.",
+)
+@click.option(
+    "--write-low-water",
+    type=int,
+    default=None,
+    help="Size of a connection's write buffer below which the application can resume writing."
+    " Defaults to the event loop's own limit.",
+)
 @click.option(
     "--backlog",
     type=int,
@@ -279,12 +385,41 @@ def print_version(ctx: click.Context, param: click.Parameter, value: bool) -> No
     help="Close Keep-Alive connections if no new data is received within this timeout.",
     show_default=True,
 )
+@click.option(
+    "--keep-alive-pressure",
+    type=int,
+    default=None,
+    help="Number of connections above which the longest idle Keep-Alive connections are closed. The Keep-Alive"
+    " timeout shrinks as the number of connections gets closer to it.",
+)
 @click.option(
     "--timeout-graceful-shutdown",
     type=int,
     default=None,
     help="Maximum number of seconds to wait for graceful shutdown.",
 )
+@click.option(
+    "--timeout-worker-healthcheck",
+    type=int,
+    default=5,
+    help="Maximum number of seconds a worker's event loop may go without reporting a heartbeat before it is "
+    "considered hung and restarted.",
+    show_default=True,
+)
+@click.option(
+    "--timeout-request-header",
+    type=int,
+    default=None,
+    help="Respond with a 408 and close the connection if the headers of a request are not received within this"
+    " timeout.",
+)
+@click.option(
+    "--min-request-body-rate",
+    type=int,
+    default=None,
+    help="Respond with a 408 and close the connection if a request body is received slower than this number of"
+    " bytes per second.",
+)
 @click.option("--ssl-keyfile", type=str, default=None, help="SSL key file", show_default=True)
 @click.option(
     "--ssl-certfile",
@@ -334,6 +469,15 @@ def print_version(ctx: click.Context, param: click.Parameter, value: bool) -> No
     multiple=True,
     help="Specify custom default HTTP response headers as a Name:Value pair",
 )
+@click.option(
+    "--socket-option",
+    "socket_options",
+    multiple=True,
+    callback=parse_socket_options,
+    help="Set a socket option as a NAME=VALUE pair, e.g. TCP_DEFER_ACCEPT=5. Listener options (SO_RCVBUF, SO_SNDBUF,"
+    " TCP_DEFER_ACCEPT, TCP_FASTOPEN) are set on the listening sockets, and connection options (TCP_NODELAY,"
+    " SO_KEEPALIVE, TCP_KEEPIDLE, TCP_KEEPINTVL, TCP_KEEPCNT, TCP_USER_TIMEOUT) on each accepted connection.",
+)
 @click.option(
     "--version",
     is_flag=True,
@@ -356,6 +500,48 @@ def print_version(ctx: click.Context, param: click.Parameter, value: bool) -> No
     default=None,
     help="For h11, the maximum number of bytes to buffer of an incomplete event.",
 )
+@click.option(
+    "--eager-tasks",
+    is_flag=True,
+    default=False,
+    help="Run the application for each request until it first waits, when the request is received, rather than on"
+    " the next iteration of the event loop. Requires Python 3.12 or later.",
+)
+@click.option(
+    "--response-cache-size",
+    type=int,
+    default=None,
+    help="Cache the responses marked as public with a max-age by the application, up to this number of bytes per"
+    " worker.",
+)
+@click.option(
+    "--coalesce-path",
+    "coalesce_paths",
+    multiple=True,
+    help="Process concurrent identical GET requests to paths starting with this prefix once, sending the response to"
+    " all of them. May be used multiple times.",
+)
+@click.option(
+    "--coalesce-max-size",
+    type=int,
+    default=1024 * 1024,
+    help="The largest response in bytes that is sent to coalesced requests.",
+    show_default=True,
+)
+@click.option(
+    "--static",
+    multiple=True,
+    metavar="PREFIX=DIRECTORY",
+    help="Serve the files in DIRECTORY for the requests to paths starting with PREFIX, without running the"
+    " application. May be used multiple times.",
+)
+@click.option(
+    "--static-max-open-files",
+    type=int,
+    default=256,
+    help="Maximum number of static files kept open per worker.",
+    show_default=True,
+)
 @click.option(
     "--factory",
     is_flag=True,
@@ -379,17 +565,25 @@ def main(
     ws_per_message_deflate: bool,
     lifespan: LifespanType,
     interface: InterfaceType,
+    wsgi_threads: int,
+    wsgi_min_threads: int | None,
+    wsgi_max_queued: int | None,
     reload: bool,
     reload_dirs: list[str],
     reload_includes: list[str],
     reload_excludes: list[str],
     reload_delay: float,
     workers: int,
+    workers_max: int | None,
+    worker_affinity: WorkerAffinityType,
+    profile_dir: str | None,
+    loop_lag_threshold: float | None,
     env_file: str,
     log_config: str,
     log_level: str,
     access_log: bool,
     proxy_headers: bool,
+    proxy_protocol: bool,
     server_header: bool,
     date_header: bool,
     forwarded_allow_ips: str,
@@ -397,8 +591,17 @@ def main(
     limit_concurrency: int,
     backlog: int,
     limit_max_requests: int,
+    limit_connection_memory: int | None,
+    limit_server_memory: int | None,
+    read_high_water: int,
+    write_high_water: int | None,
+    write_low_water: int | None,
     timeout_keep_alive: int,
+    keep_alive_pressure: int | None,
     timeout_graceful_shutdown: int | None,
+    timeout_worker_healthcheck: int,
+    timeout_request_header: int | None,
+    min_request_body_rate: int | None,
     ssl_keyfile: str,
     ssl_certfile: str,
     ssl_keyfile_password: str,
@@ -407,9 +610,16 @@ def main(
     ssl_ca_certs: str,
     ssl_ciphers: str,
     headers: list[str],
+    socket_options: dict[str, int],
     use_colors: bool,
     app_dir: str,
     h11_max_incomplete_event_size: int | None,
+    eager_tasks: bool,
+    response_cache_size: int | None,
+    coalesce_paths: list[str],
+    coalesce_max_size: int,
+    static: list[str],
+    static_max_open_files: int,
     factory: bool,
 ) -> None:
     run(
@@ -432,13 +642,21 @@ def main(
         log_level=log_level,
         access_log=access_log,
         interface=interface,
+        wsgi_threads=wsgi_threads,
+        wsgi_min_threads=wsgi_min_threads,
+        wsgi_max_queued=wsgi_max_queued,
         reload=reload,
         reload_dirs=reload_dirs or None,
         reload_includes=reload_includes or None,
         reload_excludes=reload_excludes or None,
         reload_delay=reload_delay,
         workers=workers,
+        workers_max=workers_max,
+        worker_affinity=worker_affinity,
+        profile_dir=profile_dir,
+        loop_lag_threshold=loop_lag_threshold,
         proxy_headers=proxy_headers,
+        proxy_protocol=proxy_protocol,
         server_header=server_header,
         date_header=date_header,
         forwarded_allow_ips=forwarded_allow_ips,
@@ -446,8 +664,17 @@ def main(
         limit_concurrency=limit_concurrency,
         backlog=backlog,
         limit_max_requests=limit_max_requests,
+        limit_connection_memory=limit_connection_memory,
+        limit_server_memory=limit_server_memory,
+        read_high_water=read_high_water,
+        write_high_water=write_high_water,
+        write_low_water=write_low_water,
         timeout_keep_alive=timeout_keep_alive,
+        keep_alive_pressure=keep_alive_pressure,
         timeout_graceful_shutdown=timeout_graceful_shutdown,
+        timeout_worker_healthcheck=timeout_worker_healthcheck,
+        timeout_request_header=timeout_request_header,
+        min_request_body_rate=min_request_body_rate,
         ssl_keyfile=ssl_keyfile,
         ssl_certfile=ssl_certfile,
         ssl_keyfile_password=ssl_keyfile_password,
@@ -456,10 +683,17 @@ def main(
         ssl_ca_certs=ssl_ca_certs,
         ssl_ciphers=ssl_ciphers,
         headers=[header.split(":", 1) for header in headers],  # type: ignore[misc]
+        socket_options=socket_options or None,
         use_colors=use_colors,
         factory=factory,
         app_dir=app_dir,
         h11_max_incomplete_event_size=h11_max_incomplete_event_size,
+        eager_tasks=eager_tasks,
+        response_cache_size=response_cache_size,
+        coalesce_paths=list(coalesce_paths) or None,
+        coalesce_max_size=coalesce_max_size,
+        static=list(static) or None,
+        static_max_open_files=static_max_open_files,
     )
 
 
@@ -480,17 +714,25 @@ def run(
     ws_per_message_deflate: bool = True,
     lifespan: LifespanType = "auto",
     interface: InterfaceType = "auto",
+    wsgi_threads: int = 10,
+    wsgi_min_threads: int | None = None,
+    wsgi_max_queued: int | None = None,
     reload: bool = False,
     reload_dirs: list[str] | str | None = None,
     reload_includes: list[str] | str | None = None,
     reload_excludes: list[str] | str | None = None,
     reload_delay: float = 0.25,
     workers: int | None = None,
+    workers_max: int | None = None,
+    worker_affinity: WorkerAffinityType = "none",
+    profile_dir: str | None = None,
+    loop_lag_threshold: float | None = None,
     env_file: str | os.PathLike[str] | None = None,
     log_config: dict[str, Any] | str | RawConfigParser | IO[Any] | None = LOGGING_CONFIG,
     log_level: str | int | None = None,
     access_log: bool = True,
     proxy_headers: bool = True,
+    proxy_protocol: bool = False,
     server_header: bool = True,
     date_header: bool = True,
     forwarded_allow_ips: list[str] | str | None = None,
@@ -498,8 +740,17 @@ def run(
     limit_concurrency: int | None = None,
     backlog: int = 2048,
     limit_max_requests: int | None = None,
+    limit_connection_memory: int | None = None,
+    limit_server_memory: int | None = None,
+    read_high_water: int = 65536,
+    write_high_water: int | None = None,
+    write_low_water: int | None = None,
     timeout_keep_alive: int = 5,
+    keep_alive_pressure: int | None = None,
     timeout_graceful_shutdown: int | None = None,
+    timeout_worker_healthcheck: int = 5,
+    timeout_request_header: int | None = None,
+    min_request_body_rate: int | None = None,
     ssl_keyfile: str | os.PathLike[str] | None = None,
     ssl_certfile: str | os.PathLike[str] | None = None,
     ssl_keyfile_password: str | None = None,
@@ -512,6 +763,13 @@ def run(
     app_dir: str | None = None,
     factory: bool = False,
     h11_max_incomplete_event_size: int | None = None,
+    eager_tasks: bool = False,
+    response_cache_size: int | None = None,
+    coalesce_paths: list[str] | None = None,
+    coalesce_max_size: int = 1024 * 1024,
+    static: list[str] | None = None,
+    static_max_open_files: int = 256,
+    socket_options: dict[str, int] | None = None,
 ) -> None:
     if app_dir is not None:
         sys.path.insert(0, app_dir)
@@ -532,17 +790,25 @@ def run(
         ws_per_message_deflate=ws_per_message_deflate,
         lifespan=lifespan,
         interface=interface,
+        wsgi_threads=wsgi_threads,
+        wsgi_min_threads=wsgi_min_threads,
+        wsgi_max_queued=wsgi_max_queued,
         reload=reload,
         reload_dirs=reload_dirs,
         reload_includes=reload_includes,
         reload_excludes=reload_excludes,
         reload_delay=reload_delay,
         workers=workers,
+        workers_max=workers_max,
+        worker_affinity=worker_affinity,
+        profile_dir=profile_dir,
+        loop_lag_threshold=loop_lag_threshold,
         env_file=env_file,
         log_config=log_config,
         log_level=log_level,
         access_log=access_log,
         proxy_headers=proxy_headers,
+        proxy_protocol=proxy_protocol,
         server_header=server_header,
         date_header=date_header,
         forwarded_allow_ips=forwarded_allow_ips,
@@ -550,8 +816,17 @@ def run(
         limit_concurrency=limit_concurrency,
         backlog=backlog,
         limit_max_requests=limit_max_requests,
+        limit_connection_memory=limit_connection_memory,
+        limit_server_memory=limit_server_memory,
+        read_high_water=read_high_water,
+        write_high_water=write_high_water,
+        write_low_water=write_low_water,
         timeout_keep_alive=timeout_keep_alive,
+        keep_alive_pressure=keep_alive_pressure,
         timeout_graceful_shutdown=timeout_graceful_shutdown,
+        timeout_worker_healthcheck=timeout_worker_healthcheck,
+        timeout_request_header=timeout_request_header,
+        min_request_body_rate=min_request_body_rate,
         ssl_keyfile=ssl_keyfile,
         ssl_certfile=ssl_certfile,
         ssl_keyfile_password=ssl_keyfile_password,
@@ -563,10 +838,17 @@ def run(
         use_colors=use_colors,
         factory=factory,
         h11_max_incomplete_event_size=h11_max_incomplete_event_size,
+        eager_tasks=eager_tasks,
+        response_cache_size=response_cache_size,
+        coalesce_paths=coalesce_paths,
+        coalesce_max_size=coalesce_max_size,
+        static=static,
+        static_max_open_files=static_max_open_files,
+        socket_options=socket_options,
     )
     server = Server(config=config)
 
-    if (config.reload or config.workers > 1) and not isinstance(app, str):
+    if (config.reload or config.workers > 1 or config.workers_max is not None) and not isinstance(app, str):
         logger = logging.getLogger("uvicorn.error")
         logger.warning("You must pass the application as an import string to enable 'reload' or 'workers'.")
         sys.exit(1)
@@ -575,7 +857,7 @@ def run(
         if config.should_reload:
             sock = config.bind_socket()
             ChangeReload(config, target=server.run, sockets=[sock]).run()
-        elif config.workers > 1:
+        elif config.workers > 1 or config.workers_max is not None:
             sock = config.bind_socket()
             Multiprocess(config, target=server.run, sockets=[sock]).run()
         else:
@@ -586,7 +868,7 @@ def run(
         if config.uds and os.path.exists(config.uds):
             os.remove(config.uds)  # pragma: py-win32
 
-    if not server.started and not config.should_reload and config.workers == 1:
+    if not server.started and not config.should_reload and config.workers == 1 and config.workers_max is None:
         sys.exit(STARTUP_FAILURE)
 
 
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import functools
 import ipaddress
 
 from uvicorn._types import ASGI3Application, ASGIReceiveCallable, ASGISendCallable, Scope
 
+# The number of hosts whose trust decision is cached.
+TRUSTED_HOSTS_CACHE_SIZE = 1024
+
 
 class ProxyHeadersMiddleware:
     """Middleware for handling known proxy headers
@@ -32,10 +36,17 @@ class ProxyHeadersMiddleware:
         client_host = client_addr[0] if client_addr else None
 
         if client_host in self.trusted_hosts:
-            headers = dict(scope["headers"])
-
-            if b"x-forwarded-proto" in headers:
-                x_forwarded_proto = headers[b"x-forwarded-proto"].decode("latin1").strip()
+            # Scan for the two headers rather than building a dict of all of them. As with a dict, the
+            # last of repeated headers is used.
+            x_forwarded_proto_header = x_forwarded_for_header = None
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-proto":
+                    x_forwarded_proto_header = value
+                elif name == b"x-forwarded-for":
+                    x_forwarded_for_header = value
+
+            if x_forwarded_proto_header is not None:
+                x_forwarded_proto = x_forwarded_proto_header.decode("latin1").strip()
 
                 if x_forwarded_proto in {"http", "https", "ws", "wss"}:
                     if scope["type"] == "websocket":
@@ -43,8 +54,8 @@ class ProxyHeadersMiddleware:
                     else:
                         scope["scheme"] = x_forwarded_proto
 
-            if b"x-forwarded-for" in headers:
-                x_forwarded_for = headers[b"x-forwarded-for"].decode("latin1")
+            if x_forwarded_for_header is not None:
+                x_forwarded_for = x_forwarded_for_header.decode("latin1")
                 host = self.trusted_hosts.get_trusted_client_host(x_forwarded_for)
 
                 if host:
@@ -73,6 +84,8 @@ class _TrustedHosts:
         self.trusted_literals: set[str] = set()
         self.trusted_hosts: set[ipaddress.IPv4Address | ipaddress.IPv6Address] = set()
         self.trusted_networks: set[ipaddress.IPv4Network | ipaddress.IPv6Network] = set()
+        # The prefixes of the trusted networks, as integers, by IP version and prefix length.
+        self.trusted_prefixes: dict[int, dict[int, set[int]]] = {4: {}, 6: {}}
 
         # Notes:
         # - We separate hosts from literals as there are many ways to write
@@ -80,6 +93,9 @@ class _TrustedHosts:
         # - We don't convert IP Address to single host networks (e.g. /32 / 128) as
         #   it more efficient to do an address lookup in a set than check for
         #   membership in each network.
+        # - Networks are matched by looking up the prefix of the address in a
+        #   set for each prefix length, instead of checking for membership in
+        #   each network, so that long lists of networks stay cheap to check.
         # - We still allow literals as it might be possible that we receive a
         #   something that isn't an IP Address e.g. a unix socket.
 
@@ -95,10 +111,14 @@ class _TrustedHosts:
                 if "/" in host:
                     # Looks like a network
                     try:
-                        self.trusted_networks.add(ipaddress.ip_network(host))
+                        network = ipaddress.ip_network(host)
                     except ValueError:
                         # Was not a valid IP Network
                         self.trusted_literals.add(host)
+                    else:
+                        self.trusted_networks.add(network)
+                        prefixes = self.trusted_prefixes[network.version].setdefault(network.prefixlen, set())
+                        prefixes.add(int(network.network_address) >> (network.max_prefixlen - network.prefixlen))
                 else:
                     try:
                         self.trusted_hosts.add(ipaddress.ip_address(host))
@@ -106,6 +126,9 @@ class _TrustedHosts:
                         # Was not a valid IP Address
                         self.trusted_literals.add(host)
 
+        # The decisions for the hosts seen most recently, as the same proxies and clients send most requests.
+        self._is_trusted = functools.lru_cache(maxsize=TRUSTED_HOSTS_CACHE_SIZE)(self._match)
+
     def __contains__(self, host: str | None) -> bool:
         if self.always_trust:
             return True
@@ -113,15 +136,22 @@ class _TrustedHosts:
         if not host:
             return False
 
+        return self._is_trusted(host)
+
+    def _match(self, host: str) -> bool:
         try:
             ip = ipaddress.ip_address(host)
-            if ip in self.trusted_hosts:
-                return True
-            return any(ip in net for net in self.trusted_networks)
-
         except ValueError:
             return host in self.trusted_literals
 
+        if ip in self.trusted_hosts:
+            return True
+        address = int(ip)
+        for prefixlen, prefixes in self.trusted_prefixes[ip.version].items():
+            if address >> (ip.max_prefixlen - prefixlen) in prefixes:
+                return True
+        return False
+
     def get_trusted_client_host(self, x_forwarded_for: str) -> str:
         """Extract the client host from x_forwarded_for header
 
@@ -2,11 +2,17 @@ from __future__ import annotations
 
 import asyncio
 import concurrent.futures
+import functools
 import io
+import logging
+import queue
 import sys
+import threading
+import time
 import warnings
 from collections import deque
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
+from typing import IO, Any, Callable, cast
 
 from uvicorn._types import (
     ASGIReceiveCallable,
@@ -19,12 +25,288 @@ from uvicorn._types import (
     HTTPResponseBodyEvent,
     HTTPResponseStartEvent,
     HTTPScope,
+    Scope,
     StartResponse,
     WSGIApp,
 )
+from uvicorn.protocols.http.flow_control import service_unavailable
 
+logger = logging.getLogger("uvicorn.error")
 
-def build_environ(scope: HTTPScope, message: ASGIReceiveEvent, body: io.BytesIO) -> Environ:
+# The number of bytes of request body buffered for the application, above which the request body is
+# no longer received, so that the protocol stops reading from the connection.
+WSGI_INPUT_BUFFER_SIZE = 65536
+
+# The number of bytes of response body queued for the client, above which the application's thread
+# waits for them to be sent before producing more.
+WSGI_OUTPUT_BUFFER_SIZE = 65536
+
+# The smallest block size used to read files returned through `wsgi.file_wrapper`.
+FILE_WRAPPER_BLOCK_SIZE = 65536
+
+# The number of seconds after which idle threads above the minimum of a `WSGIExecutor` stop.
+THREAD_IDLE_TIMEOUT = 30.0
+
+_WorkItem = tuple[concurrent.futures.Future[Any], Callable[[], Any], float]
+
+
+class WSGIExecutor(concurrent.futures.ThreadPoolExecutor):
+    """
+    The thread pool WSGI applications run in. Threads are started, up to `max_threads`, while requests
+    wait for one, and those above `min_threads` stop once idle for `idle_timeout` seconds. Requests are
+    turned away once `max_queued` of them are waiting for a thread. The number of requests waiting for
+    a thread, and how long they waited, are measured.
+
+    It is a `ThreadPoolExecutor`, as a2wsgi expects one, but manages its threads itself.
+    """
+
+    def __init__(
+        self,
+        max_threads: int = 10,
+        min_threads: int | None = None,
+        idle_timeout: float = THREAD_IDLE_TIMEOUT,
+        max_queued: int | None = None,
+    ) -> None:
+        super().__init__(max_workers=max_threads, thread_name_prefix="uvicorn-wsgi")
+        self.max_threads = max_threads
+        self.min_threads = max_threads if min_threads is None else min(min_threads, max_threads)
+        self.idle_timeout = idle_timeout
+        self.max_queued = max_queued
+        self.threads: set[threading.Thread] = set()
+        # The number of requests waiting for a thread, and of those turned away as too many were.
+        self.queued = 0
+        self.max_queued_seen = 0
+        self.rejected = 0
+        # The number of requests that were given a thread, and how long they waited for it, in seconds.
+        self.started = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+        self._items: queue.SimpleQueue[_WorkItem | None] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._idle = 0
+        self._busy = 0
+        self._closed = False
+
+    def admit(self) -> bool:
+        """
+        Whether a request may be submitted, counting it as rejected if `max_queued` requests would
+        already be waiting once every thread is running one.
+        """
+        if self.max_queued is None:
+            return True
+        with self._lock:
+            if self._busy + self.queued < self.max_threads + self.max_queued:
+                return True
+            self.rejected += 1
+            return False
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> concurrent.futures.Future[Any]:
+        future: concurrent.futures.Future[Any] = concurrent.futures.Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._items.put((future, functools.partial(fn, *args, **kwargs), time.monotonic()))
+            self.queued += 1
+            self.max_queued_seen = max(self.max_queued_seen, self.queued)
+            if self._idle < self.queued and len(self.threads) < self.max_threads:
+                thread = threading.Thread(target=self._work, name="uvicorn-wsgi", daemon=True)
+                self.threads.add(thread)
+                thread.start()
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._closed = True
+            threads = list(self.threads)
+            for _ in threads:
+                self._items.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def stats(self) -> dict[str, float]:
+        """
+        A snapshot of the state of the pool, and of the requests it ran so far.
+        """
+        with self._lock:
+            threads = len(self.threads)
+            return {
+                "threads": threads,
+                "busy_threads": self._busy,
+                "queued": self.queued,
+                "max_queued": self.max_queued_seen,
+                "rejected": self.rejected,
+                "started": self.started,
+                "average_wait": self.total_wait / self.started if self.started else 0.0,
+                "max_wait": self.max_wait,
+            }
+
+    def format_stats(self, stats: dict[str, float] | None = None) -> str:
+        if stats is None:
+            stats = self.stats()
+        return (
+            "%(started)d requests waited %(average_wait).3fs on average and %(max_wait).3fs at most for one of "
+            "%(threads)d threads (%(busy_threads)d busy), with %(queued)d requests waiting now, at most "
+            "%(max_queued)d, and %(rejected)d turned away" % stats
+        )
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                self._idle += 1
+                timeout = self.idle_timeout if len(self.threads) > self.min_threads else None
+            try:
+                item = self._items.get(timeout=timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._idle -= 1
+                    # Requests are queued with the lock held, so none can be left without a thread.
+                    if self._items.empty() and len(self.threads) > self.min_threads:
+                        self.threads.discard(threading.current_thread())
+                        return
+                continue  # pragma: full coverage
+
+            with self._lock:
+                self._idle -= 1
+                if item is None:
+                    self.threads.discard(threading.current_thread())
+                    return
+                future, fn, submitted = item
+                wait = time.monotonic() - submitted
+                self.queued -= 1
+                self._busy += 1
+                self.started += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = fn()
+                except BaseException as exc:
+                    future.set_exception(exc)
+                else:
+                    future.set_result(result)
+            with self._lock:
+                self._busy -= 1
+
+
+class WSGIInput:
+    """
+    The `wsgi.input` stream, filled with the request body from the event loop while the application
+    reads it from its thread, with at most `max_buffer_size` bytes buffered in between.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_buffer_size: int = WSGI_INPUT_BUFFER_SIZE) -> None:
+        self.loop = loop
+        self.max_buffer_size = max_buffer_size
+        self.buffer = bytearray()
+        self.eof = False
+        self.condition = threading.Condition()
+        # Set from the application's thread once there is room in the buffer again.
+        self.writable = asyncio.Event()
+        self.waiting_for_room = False
+
+    async def feed(self, receive: ASGIReceiveCallable, body: bytes, more_body: bool) -> None:
+        """
+        Receive the request body, starting with `body`, until it ends or the client disconnects.
+        """
+        try:
+            self.write(body)
+            while more_body:
+                while self.waiting_for_room:
+                    await self.writable.wait()
+                    self.writable.clear()
+                message = await receive()
+                if message["type"] != "http.request":
+                    break
+                self.write(message.get("body", b""))
+                more_body = message.get("more_body", False)
+        finally:
+            with self.condition:
+                self.eof = True
+                self.condition.notify_all()
+
+    def write(self, data: bytes) -> None:
+        with self.condition:
+            self.buffer += data
+            self.waiting_for_room = len(self.buffer) >= self.max_buffer_size
+            self.condition.notify_all()
+
+    def _read(self, size: int | None, line: bool) -> bytes:
+        if size is None or size < 0:
+            size = sys.maxsize
+        chunks = []
+        with self.condition:
+            while True:
+                # A full buffer is taken as is, as the rest of the request body only comes once there
+                # is room for it.
+                self.condition.wait_for(
+                    lambda: self.eof
+                    or self.waiting_for_room
+                    or len(self.buffer) >= size
+                    or (line and b"\n" in self.buffer)
+                )
+                end = self.buffer.find(b"\n") if line else -1
+                count = min(end + 1 if end >= 0 else len(self.buffer), size)
+                chunks.append(bytes(self.buffer[:count]))
+                del self.buffer[:count]
+                size -= count
+                if self.waiting_for_room and len(self.buffer) < self.max_buffer_size:
+                    self.waiting_for_room = False
+                    self.loop.call_soon_threadsafe(self.writable.set)
+                if self.eof or size == 0 or end >= 0:
+                    return b"".join(chunks)
+
+    def read(self, size: int | None = -1) -> bytes:
+        return self._read(size, line=False)
+
+    def readline(self, size: int | None = -1) -> bytes:
+        return self._read(size, line=True)
+
+    def readlines(self, hint: int | None = -1) -> list[bytes]:
+        lines = []
+        total = 0
+        while hint is None or hint <= 0 or total < hint:
+            line = self.readline()
+            if not line:
+                break
+            lines.append(line)
+            total += len(line)
+        return lines
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+
+class FileWrapper:
+    """
+    The `wsgi.file_wrapper`, which reads the file in blocks of at least `FILE_WRAPPER_BLOCK_SIZE`
+    bytes, rather than iterating over its lines.
+    """
+
+    def __init__(self, filelike: IO[bytes], blksize: int = FILE_WRAPPER_BLOCK_SIZE) -> None:
+        self.filelike = filelike
+        self.blksize = max(blksize, FILE_WRAPPER_BLOCK_SIZE)
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            data = self.filelike.read(self.blksize)
+            if not data:
+                return
+            yield data
+
+    def close(self) -> None:
+        close = getattr(self.filelike, "close", None)
+        if close is not None:
+            close()
+
+
+def build_environ(scope: HTTPScope, message: ASGIReceiveEvent, body: io.BytesIO | WSGIInput) -> Environ:
     """
     Builds a scope and request message into a WSGI environ object.
     """
@@ -45,6 +327,7 @@ def build_environ(scope: HTTPScope, message: ASGIReceiveEvent, body: io.BytesIO)
         "wsgi.multithread": True,
         "wsgi.multiprocess": True,
         "wsgi.run_once": False,
+        "wsgi.file_wrapper": FileWrapper,
     }
 
     # Get server name and port - required in WSGI, not in ASGI
@@ -79,14 +362,19 @@ def build_environ(scope: HTTPScope, message: ASGIReceiveEvent, body: io.BytesIO)
     return environ
 
 
+async def reject_request(scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
+    logger.warning("Exceeded WSGI queue limit.")
+    await service_unavailable(scope, receive, send)
+
+
 class _WSGIMiddleware:
-    def __init__(self, app: WSGIApp, workers: int = 10):
+    def __init__(self, app: WSGIApp, workers: int = 10, executor: WSGIExecutor | None = None):
         warnings.warn(
             "Uvicorn's native WSGI implementation is deprecated, you should switch to a2wsgi (`pip install a2wsgi`).",
             DeprecationWarning,
         )
         self.app = app
-        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        self.executor = WSGIExecutor(workers) if executor is None else executor
 
     async def __call__(
         self,
@@ -95,6 +383,8 @@ class _WSGIMiddleware:
         send: ASGISendCallable,
     ) -> None:
         assert scope["type"] == "http"
+        if not self.executor.admit():
+            return await reject_request(scope, receive, send)
         instance = WSGIResponder(self.app, self.executor, scope)
         await instance(receive, send)
 
@@ -103,7 +393,7 @@ class WSGIResponder:
     def __init__(
         self,
         app: WSGIApp,
-        executor: concurrent.futures.ThreadPoolExecutor,
+        executor: concurrent.futures.Executor,
         scope: HTTPScope,
     ):
         self.app = app
@@ -113,46 +403,90 @@ class WSGIResponder:
         self.response_headers = None
         self.send_event = asyncio.Event()
         self.send_queue: deque[ASGISendEvent | None] = deque()
+        # The number of bytes of response body in `send_queue`, or being sent.
+        self.queued_bytes = 0
+        self.queue_condition = threading.Condition()
+        self.sender_idle = True
+        self.sender_closed = False
         self.loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
         self.response_started = False
         self.exc_info: ExcInfo | None = None
 
     async def __call__(self, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
         message: HTTPRequestEvent = await receive()  # type: ignore[assignment]
-        body = io.BytesIO(message.get("body", b""))
-        more_body = message.get("more_body", False)
-        if more_body:
-            body.seek(0, io.SEEK_END)
-            while more_body:
-                body_message: HTTPRequestEvent = (
-                    await receive()  # type: ignore[assignment]
-                )
-                body.write(body_message.get("body", b""))
-                more_body = body_message.get("more_body", False)
-            body.seek(0)
-        environ = build_environ(self.scope, message, body)
         self.loop = asyncio.get_event_loop()
+        # The application starts as soon as the request headers are received, and reads the request
+        # body while it is received.
+        body = WSGIInput(self.loop)
+        feeder = self.loop.create_task(body.feed(receive, message.get("body", b""), message.get("more_body", False)))
+        environ = build_environ(self.scope, message, body)
         wsgi = self.loop.run_in_executor(self.executor, self.wsgi, environ, self.start_response)
         sender = self.loop.create_task(self.sender(send))
         try:
             await asyncio.wait_for(wsgi, None)
         finally:
-            self.send_queue.append(None)
-            self.send_event.set()
+            feeder.cancel()
+            self.put(None, wait=False)
             await asyncio.wait_for(sender, None)
         if self.exc_info is not None:
             raise self.exc_info[0].with_traceback(self.exc_info[1], self.exc_info[2])
 
     async def sender(self, send: ASGISendCallable) -> None:
-        while True:
-            if self.send_queue:
-                message = self.send_queue.popleft()
-                if message is None:
-                    return
-                await send(message)
-            else:
-                await self.send_event.wait()
-                self.send_event.clear()
+        try:
+            while True:
+                with self.queue_condition:
+                    messages = list(self.send_queue)
+                    self.send_queue.clear()
+                    self.sender_idle = not messages
+                if not messages:
+                    await self.send_event.wait()
+                    self.send_event.clear()
+                    continue
+
+                # The body chunks queued since the last wake-up are sent as a single message.
+                chunks: list[bytes] = []
+                more_body = True
+                size = 0
+                for message in messages:
+                    if message is not None and message["type"] == "http.response.body":
+                        body_message = cast(HTTPResponseBodyEvent, message)
+                        chunks.append(body_message["body"])
+                        size += len(body_message["body"])
+                        more_body = body_message["more_body"]
+                        continue
+                    if chunks:
+                        await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": more_body})
+                        chunks = []
+                    if message is None:
+                        return
+                    await send(message)
+                if chunks:
+                    await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": more_body})
+
+                with self.queue_condition:
+                    self.queued_bytes -= size
+                    self.queue_condition.notify_all()
+        finally:
+            with self.queue_condition:
+                self.sender_closed = True
+                self.queue_condition.notify_all()
+
+    def put(self, message: ASGISendEvent | None, size: int = 0, wait: bool = True) -> None:
+        """
+        Queue a message for the sender, with the `size` of its body. Waits for the queued response
+        body to be sent first if it exceeds `WSGI_OUTPUT_BUFFER_SIZE`. Messages queued once the sender
+        stopped are dropped.
+        """
+        with self.queue_condition:
+            if wait:
+                self.queue_condition.wait_for(lambda: self.queued_bytes < WSGI_OUTPUT_BUFFER_SIZE or self.sender_closed)
+            if self.sender_closed:
+                return
+            self.send_queue.append(message)
+            self.queued_bytes += size
+            wake_up, self.sender_idle = self.sender_idle, False
+        if wake_up:
+            self.loop.call_soon_threadsafe(self.send_event.set)
 
     def start_response(
         self,
@@ -171,29 +505,57 @@ class WSGIResponder:
                 "status": status_code,
                 "headers": headers,
             }
-            self.send_queue.append(http_response_start_event)
-            self.loop.call_soon_threadsafe(self.send_event.set)
+            self.put(http_response_start_event)
 
     def wsgi(self, environ: Environ, start_response: StartResponse) -> None:
-        for chunk in self.app(environ, start_response):  # type: ignore
-            response_body: HTTPResponseBodyEvent = {
-                "type": "http.response.body",
-                "body": chunk,
-                "more_body": True,
-            }
-            self.send_queue.append(response_body)
-            self.loop.call_soon_threadsafe(self.send_event.set)
+        iterable = self.app(environ, start_response)
+        try:
+            for chunk in iterable:  # type: ignore
+                response_body: HTTPResponseBodyEvent = {
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": True,
+                }
+                self.put(response_body, len(chunk))
+        finally:
+            close = getattr(iterable, "close", None)
+            if close is not None:
+                close()
 
         empty_body: HTTPResponseBodyEvent = {
             "type": "http.response.body",
             "body": b"",
             "more_body": False,
         }
-        self.send_queue.append(empty_body)
-        self.loop.call_soon_threadsafe(self.send_event.set)
+        self.put(empty_body)
 
 
 try:
-    from a2wsgi import WSGIMiddleware
+    import a2wsgi
+    import a2wsgi.wsgi_typing
 except ModuleNotFoundError:  # pragma: no cover
-    WSGIMiddleware = _WSGIMiddleware  # type: ignore[misc, assignment]
+    WSGIMiddleware = _WSGIMiddleware
+else:
+
+    class WSGIMiddleware(a2wsgi.WSGIMiddleware):  # type: ignore[no-redef]
+        """
+        a2wsgi's WSGI middleware, running the application in `executor` when given one, and turning
+        requests away while too many wait for a thread of it.
+        """
+
+        def __init__(
+            self,
+            app: a2wsgi.wsgi_typing.WSGIApp,
+            workers: int = 10,
+            send_queue_size: int = 10,
+            executor: WSGIExecutor | None = None,
+        ) -> None:
+            # a2wsgi's constructor only sets these, besides starting a thread pool of its own.
+            self.app = app
+            self.send_queue_size = send_queue_size
+            self.executor: WSGIExecutor = WSGIExecutor(workers) if executor is None else executor
+
+        async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+            if scope["type"] == "http" and not self.executor.admit():
+                return await reject_request(scope, receive, send)
+            await super().__call__(scope, receive, send)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import collections
+import logging
+import os
+import signal
+import time
+from types import CodeType, FrameType
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of the main thread, where the event loop runs, on each `interval` of CPU time
+    used by the process, and writes the samples to `directory` in the collapsed stack format read by
+    flame graph tools.
+    """
+
+    def __init__(self, directory: str, interval: float = 0.01) -> None:
+        self.directory = directory
+        self.interval = interval
+        self.samples: collections.Counter[tuple[CodeType, ...]] = collections.Counter()
+        self.running = False
+
+    def start(self) -> None:
+        self.samples.clear()
+        self.running = True
+        signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        logger.info("Started profiling process [%d]", os.getpid())
+
+    def stop(self) -> str:
+        """
+        Stop sampling, returning the path of the file the samples were written to.
+        """
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_IGN)
+        self.running = False
+
+        pid = os.getpid()
+        path = os.path.join(self.directory, f"uvicorn-{pid}-{time.strftime('%Y%m%d-%H%M%S')}.collapsed")
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, "w") as output:
+            for stack, count in self.samples.items():
+                output.write(";".join(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})" for code in stack))
+                output.write(f" {count}\n")
+        logger.info("Stopped profiling process [%d], wrote %d samples to %s", pid, sum(self.samples.values()), path)
+        return path
+
+    def toggle(self) -> None:
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def _sample(self, sig: int, frame: FrameType | None) -> None:
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        # The collapsed format lists the outermost frame first.
+        self.samples[tuple(reversed(stack))] += 1
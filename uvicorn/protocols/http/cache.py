@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Callable
+
+from uvicorn._types import HTTPScope
+
+CACHEABLE_METHODS = ("GET", "HEAD")
+
+# Headers that the cache serves itself, or that must not be replayed to another client. Whether the
+# connection is closed is up to each request.
+EXCLUDED_HEADERS = (b"content-length", b"transfer-encoding", b"age", b"date", b"connection")
+
+BaseKey = tuple[str, str, bytes, bytes, bytes]
+CacheKey = tuple[BaseKey, tuple[bytes, ...]]
+CoalesceKey = tuple[str, bytes, bytes, bytes, bytes]
+
+# The `Cache-Control` directives of the responses that are never cached or sent to coalesced requests.
+UNSHARED_DIRECTIVES = {b"private", b"no-store", b"no-cache"}
+# The request headers that are part of the coalescing key, and that a response may thus vary on.
+COALESCE_VARY = {b"host", b"accept-encoding"}
+
+
+def get_max_age(headers: list[tuple[bytes, bytes]]) -> int | None:
+    """
+    Return the number of seconds a response may be served from a shared cache, according to its
+    headers, or `None` if it must not be cached.
+    """
+    cache_control = []
+    for name, value in headers:
+        name = name.lower()
+        if name == b"cache-control":
+            cache_control.append(value.lower())
+        elif name == b"set-cookie" or name == b"connection":
+            return None
+        elif name == b"vary" and value.strip() == b"*":
+            return None
+
+    directives = {}
+    for directive in b",".join(cache_control).split(b","):
+        key, _, value = directive.partition(b"=")
+        directives[key.strip()] = value.strip().strip(b'"')
+    if b"public" not in directives or not directives.keys().isdisjoint(UNSHARED_DIRECTIVES):
+        return None
+    try:
+        max_age = int(directives.get(b"s-maxage") or directives.get(b"max-age") or b"0")
+    except ValueError:
+        return None
+    return max_age if max_age > 0 else None
+
+
+def get_directives(value: bytes) -> set[bytes]:
+    """
+    The names in a comma-separated header value, without their arguments.
+    """
+    return {directive.partition(b"=")[0].strip() for directive in value.split(b",")} - {b""}
+
+
+def get_header_value(headers: Iterable[tuple[bytes, bytes]], name: bytes) -> bytes:
+    return b",".join(value for header_name, value in headers if header_name == name)
+
+
+class CachedResponse:
+    def __init__(self, status: int, headers: list[tuple[bytes, bytes]], body: bytes, max_age: int) -> None:
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.created = time.monotonic()
+        self.expires = self.created + max_age
+        self.size = len(body) + sum(len(name) + len(value) for name, value in headers)
+
+    @property
+    def age(self) -> int:
+        return int(time.monotonic() - self.created)
+
+
+def make_cached_response(
+    scope: HTTPScope, status: int, headers: list[tuple[bytes, bytes]], body: bytes, max_age: int
+) -> CachedResponse | None:
+    """
+    Build a response that can be sent again to other requests, framed by its content length.
+    """
+    headers = [(name.lower(), value) for name, value in headers]
+    content_length = get_header_value(headers, b"content-length")
+    headers = [(name, value) for name, value in headers if name not in EXCLUDED_HEADERS]
+    if scope["method"] == "HEAD":
+        # The length of the body can only be known from the headers.
+        if not content_length:
+            return None
+        headers.append((b"content-length", content_length))
+    elif status not in (204, 304):
+        headers.append((b"content-length", str(len(body)).encode("ascii")))
+    return CachedResponse(status, headers, body, max_age)
+
+
+class ResponseRecorder:
+    """
+    Buffers a response sent by the application, to store it in the cache once complete.
+    """
+
+    def __init__(
+        self,
+        cache: ResponseCache,
+        scope: HTTPScope,
+        base_key: BaseKey,
+        status: int,
+        headers: list[tuple[bytes, bytes]],
+        max_age: int,
+    ) -> None:
+        self.cache = cache
+        self.scope = scope
+        self.base_key = base_key
+        self.status = status
+        self.headers = headers
+        self.max_age = max_age
+        self.body: list[bytes] = []
+        self.size = 0
+
+    def write(self, body: bytes) -> bool:
+        """
+        Record a chunk of the response body, returning `False` if the response became too large to be cached.
+        """
+        self.size += len(body)
+        self.body.append(body)
+        return self.size <= self.cache.max_entry_size
+
+    def finish(self) -> None:
+        self.cache.store(self.scope, self.status, self.headers, b"".join(self.body), self.max_age, self.base_key)
+
+
+class ResponseCache:
+    """
+    A per-worker cache of the responses marked as `public` with a `max-age` or `s-maxage` by the application.
+
+    Responses are keyed by method, scheme, `Host` header, path, query string and the values of the
+    request headers listed in their `Vary` header. They are evicted once expired, or the least recently
+    used first once the total size of the cache exceeds `max_size` bytes.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.max_entry_size = max_size // 8
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[CacheKey, CachedResponse] = OrderedDict()
+        # The `Vary` header names of the responses cached for a base key, along with the number of
+        # entries cached for them.
+        self._vary: dict[BaseKey, tuple[tuple[bytes, ...], int]] = {}
+
+    def get(self, scope: HTTPScope) -> CachedResponse | None:
+        base_key = self.get_base_key(scope)
+        vary = self._vary.get(base_key)
+        if vary is None:
+            self.misses += 1
+            return None
+        headers = scope["headers"]
+        cache_control = get_header_value(headers, b"cache-control") + get_header_value(headers, b"pragma")
+        if b"no-cache" in cache_control or b"no-store" in cache_control:
+            self.misses += 1
+            return None
+
+        key = (base_key, self._get_vary_values(scope, vary[0]))
+        response = self._entries.get(key)
+        if response is None:
+            self.misses += 1
+            return None
+        if response.expires <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def record(
+        self, scope: HTTPScope, base_key: BaseKey, status: int, headers: list[tuple[bytes, bytes]]
+    ) -> ResponseRecorder | None:
+        """
+        Start recording the response to a request, if it can be cached. The base key must have been
+        taken before the application ran, as middlewares may change the scheme of the scope.
+        """
+        if scope["method"] not in CACHEABLE_METHODS or b"no-store" in get_header_value(
+            scope["headers"], b"cache-control"
+        ):
+            return None
+        max_age = get_max_age(headers)
+        if max_age is None:
+            return None
+        return ResponseRecorder(self, scope, base_key, status, headers, max_age)
+
+    def store(
+        self,
+        scope: HTTPScope,
+        status: int,
+        headers: list[tuple[bytes, bytes]],
+        body: bytes,
+        max_age: int,
+        base_key: BaseKey | None = None,
+    ) -> None:
+        response = make_cached_response(scope, status, headers, body, max_age)
+        if response is None or response.size > self.max_entry_size:
+            return
+        vary = tuple(
+            name.strip().lower() for name in get_header_value(response.headers, b"vary").split(b",") if name.strip()
+        )
+
+        if base_key is None:
+            base_key = self.get_base_key(scope)
+        key = (base_key, self._get_vary_values(scope, vary))
+        if key in self._entries:
+            self._remove(key)
+        _, count = self._vary.get(base_key, (vary, 0))
+        self._vary[base_key] = (vary, count + 1)
+        self._entries[key] = response
+        self.size += response.size
+        while self.size > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def get_base_key(self, scope: HTTPScope) -> BaseKey:
+        host = get_header_value(scope["headers"], b"host")
+        return (scope["method"], scope["scheme"], host, scope["raw_path"], scope["query_string"])
+
+    def _get_vary_values(self, scope: HTTPScope, vary: tuple[bytes, ...]) -> tuple[bytes, ...]:
+        headers = scope["headers"]
+        return tuple(get_header_value(headers, name) for name in vary)
+
+    def _remove(self, key: CacheKey) -> None:
+        response = self._entries.pop(key)
+        self.size -= response.size
+        base_key = key[0]
+        names, count = self._vary[base_key]
+        if count == 1:
+            del self._vary[base_key]
+        else:
+            self._vary[base_key] = (names, count - 1)
+
+
+class Flight:
+    """
+    A request processed by the application on behalf of the identical requests received meanwhile.
+    Once its response is complete, it is sent to each of them as well. If it cannot be shared, they
+    are processed by the application instead.
+    """
+
+    def __init__(self, coalescer: RequestCoalescer, key: CoalesceKey) -> None:
+        self.coalescer = coalescer
+        self.key = key
+        self.waiters: list[Callable[[CachedResponse | None], None]] = []
+        self.landed = False
+        self.status = 0
+        self.headers: list[tuple[bytes, bytes]] = []
+        self.body: list[bytes] = []
+        self.size = 0
+
+    def start(self, status: int, headers: list[tuple[bytes, bytes]]) -> None:
+        # Only the responses that the cache would store are sent to others, as long as they don't vary
+        # on request headers that are not part of the key.
+        vary = b",".join(value.lower() for name, value in headers if name.lower() == b"vary")
+        if get_max_age(headers) is None or not COALESCE_VARY.issuperset(get_directives(vary)):
+            self.fail()
+            return
+        self.status = status
+        self.headers = headers
+
+    def write(self, body: bytes) -> None:
+        if self.landed:
+            return
+        self.size += len(body)
+        if self.size > self.coalescer.max_size:
+            self.fail()
+        else:
+            self.body.append(body)
+
+    def finish(self, scope: HTTPScope) -> None:
+        if not self.landed:
+            self._land(make_cached_response(scope, self.status, self.headers, b"".join(self.body), max_age=0))
+
+    def fail(self) -> None:
+        if not self.landed:
+            self._land(None)
+
+    def _land(self, response: CachedResponse | None) -> None:
+        self.landed = True
+        del self.coalescer.flights[self.key]
+        for waiter in self.waiters:
+            waiter(response)
+        self.waiters = []
+
+
+class RequestCoalescer:
+    """
+    Processes concurrent identical `GET` requests to the paths starting with one of `paths` once.
+
+    Requests are identical if their scheme, path, query string, `Host` and `Accept-Encoding` headers
+    match. Only the responses that could be cached are sent to the identical requests. Requests with
+    an `Authorization` or `Cookie` header are never coalesced.
+    """
+
+    def __init__(self, paths: list[str], max_size: int) -> None:
+        self.paths = tuple(paths)
+        self.max_size = max_size
+        self.coalesced = 0
+        self.flights: dict[CoalesceKey, Flight] = {}
+
+    def get_key(self, scope: HTTPScope) -> CoalesceKey | None:
+        if scope["method"] != "GET" or not scope["path"].startswith(self.paths):
+            return None
+        host = accept_encoding = b""
+        for name, value in scope["headers"]:
+            if name == b"authorization" or name == b"cookie":
+                return None
+            elif name == b"host":
+                host = value
+            elif name == b"accept-encoding":
+                accept_encoding = value
+        return (scope["scheme"], scope["raw_path"], scope["query_string"], host, accept_encoding)
+
+    def join(self, key: CoalesceKey, waiter: Callable[[CachedResponse | None], None]) -> bool:
+        """
+        Wait for the response to an identical request, returning `False` if none is being processed.
+        """
+        flight = self.flights.get(key)
+        if flight is None:
+            return False
+        flight.waiters.append(waiter)
+        self.coalesced += 1
+        return True
+
+    def start(self, key: CoalesceKey) -> Flight:
+        flight = self.flights[key] = Flight(self, key)
+        return flight
@@ -1,4 +1,9 @@
+from __future__ import annotations
+
 import asyncio
+import heapq
+import time
+from typing import Callable
 
 from uvicorn._types import ASGIReceiveCallable, ASGISendCallable, Scope
 
@@ -6,14 +11,164 @@ CLOSE_HEADER = (b"connection", b"close")
 
 HIGH_WATER_LIMIT = 65536
 
+# The default high-water mark of the asyncio and uvloop transports' write buffers.
+WRITE_HIGH_WATER_LIMIT = 65536
+
+# The number of seconds over which the minimum request body rate is measured.
+REQUEST_BODY_RATE_PERIOD = 5.0
+
+REQUEST_TIMEOUT_RESPONSE = b"\r\n".join(
+    [
+        b"HTTP/1.1 408 Request Timeout",
+        b"content-type: text/plain; charset=utf-8",
+        b"content-length: 15",
+        b"connection: close",
+        b"",
+        b"Request Timeout",
+    ]
+)
+
+
+def noop() -> None:
+    """
+    Replaces the `on_response` callback of a finished cycle, without allocating a closure for it.
+    """
+
+
+class Notifier:
+    """
+    An `asyncio.Event`, without the event loop binding and the deque of waiters that make up most of
+    its size, as each connection holds a few of them and they are rarely waited on by more than one
+    task. The futures of the waiters are only created while waiting.
+    """
+
+    __slots__ = ("_is_set", "_waiters")
+
+    def __init__(self, is_set: bool = False) -> None:
+        self._is_set = is_set
+        self._waiters: list[asyncio.Future[None]] | None = None
+
+    def is_set(self) -> bool:
+        return self._is_set
+
+    def set(self) -> None:
+        if self._is_set:
+            return
+        self._is_set = True
+        for waiter in self._waiters or ():
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def clear(self) -> None:
+        self._is_set = False
+
+    async def wait(self) -> None:
+        if self._is_set:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        if self._waiters is None:
+            self._waiters = [waiter]
+        else:
+            self._waiters.append(waiter)
+        try:
+            await waiter
+        finally:
+            assert self._waiters is not None
+            self._waiters.remove(waiter)
+            if not self._waiters:
+                self._waiters = None
+
 
 class FlowControl:
-    def __init__(self, transport: asyncio.Transport) -> None:
+    """
+    Applies backpressure on a connection.
+
+    * read_high_water - Pause reading once this many bytes of request body are buffered.
+    * write_high_water, write_low_water - The write buffer limits of the transport, which pause and
+                                          resume writing. When unset, the transport's defaults are used.
+    * memory_limit - The most bytes the connection may hold across its buffered request body and its
+                     write buffer. Both limits above are capped to it.
+    * budget - The server-wide memory budget the buffered request body is accounted against.
+    * clock - The clock the time reading is paused for is measured with.
+
+    The request body buffered for the request being processed, and the one held by the pipelined
+    requests queued behind it, are reported separately and accounted for together.
+    """
+
+    __slots__ = (
+        "_transport",
+        "_budget",
+        "buffered",
+        "queued",
+        "over_budget",
+        "read_paused",
+        "_clock",
+        "_read_paused_at",
+        "_read_paused_time",
+        "write_paused",
+        "_is_writable_event",
+        "read_high_water",
+        "memory_limit",
+    )
+
+    def __init__(
+        self,
+        transport: asyncio.Transport,
+        read_high_water: int = HIGH_WATER_LIMIT,
+        write_high_water: int | None = None,
+        write_low_water: int | None = None,
+        memory_limit: int | None = None,
+        budget: MemoryBudget | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
         self._transport = transport
+        self._budget = budget
+        self.buffered = 0
+        self.queued = 0
+        self.over_budget = False
         self.read_paused = False
+        self._clock = clock
+        self._read_paused_at = 0.0
+        self._read_paused_time = 0.0
         self.write_paused = False
-        self._is_writable_event = asyncio.Event()
-        self._is_writable_event.set()
+        self._is_writable_event = Notifier(is_set=True)
+
+        self.read_high_water = read_high_water
+        self.memory_limit = memory_limit
+        if memory_limit is not None:
+            self.read_high_water = min(read_high_water, memory_limit)
+            # The transport must pause writing by itself before the limit is exceeded, so that it
+            # also resumes it once the write buffer is flushed.
+            write_high_water = min(write_high_water or WRITE_HIGH_WATER_LIMIT, memory_limit)
+            if write_low_water is not None:
+                write_low_water = min(write_low_water, write_high_water)
+        if write_high_water is not None or write_low_water is not None:
+            transport.set_write_buffer_limits(high=write_high_water, low=write_low_water)
+
+    def buffered_read(self, num_bytes: int) -> None:
+        """
+        Called with the number of request body bytes buffered for the request being processed, to
+        pause reading once the connection's total exceeds the read high-water mark or its memory limit.
+        """
+        self.buffered = num_bytes
+        self._update_buffered()
+
+    def queued_read(self, num_bytes: int) -> None:
+        """
+        Called with the number of request body bytes held by the pipelined requests, that are
+        queued until the request being processed is complete.
+        """
+        self.queued = num_bytes
+        self._update_buffered()
+
+    def _update_buffered(self) -> None:
+        num_bytes = self.buffered + self.queued
+        if self._budget is not None:
+            self._budget.update(self, num_bytes)
+        if num_bytes > self.read_high_water or (
+            self.memory_limit is not None and num_bytes + self._transport.get_write_buffer_size() > self.memory_limit
+        ):
+            self.pause_reading()
 
     async def drain(self) -> None:
         await self._is_writable_event.wait()  # pragma: full coverage
@@ -21,13 +176,46 @@ class FlowControl:
     def pause_reading(self) -> None:
         if not self.read_paused:
             self.read_paused = True
+            self._read_paused_at = self._clock()
             self._transport.pause_reading()
 
     def resume_reading(self) -> None:
-        if self.read_paused:
+        if self.read_paused and not self.over_budget:
             self.read_paused = False
+            self._read_paused_time += self._clock() - self._read_paused_at
             self._transport.resume_reading()
 
+    def take_read_paused_time(self) -> float:
+        """
+        The number of seconds reading was paused for since the last call.
+        """
+        paused_time = self._read_paused_time
+        if self.read_paused:
+            now = self._clock()
+            paused_time += now - self._read_paused_at
+            self._read_paused_at = now
+        self._read_paused_time = 0.0
+        return paused_time
+
+    def suspend(self) -> None:
+        """
+        Pause reading until the server is back within its memory budget.
+        """
+        self.over_budget = True
+        self.pause_reading()
+
+    def unsuspend(self) -> None:
+        self.over_budget = False
+        if self.buffered + self.queued <= self.read_high_water:
+            self.resume_reading()
+
+    def release(self) -> None:
+        """
+        Stop accounting for the connection against the server's memory budget, once it is closed.
+        """
+        if self._budget is not None:
+            self._budget.discard(self)
+
     def pause_writing(self) -> None:
         if not self.write_paused:  # pragma: full coverage
             self.write_paused = True
@@ -39,6 +227,75 @@ class FlowControl:
             self._is_writable_event.set()
 
 
+class MemoryBudget:
+    """
+    Accounts for the request body bytes buffered by every connection of a server.
+
+    Once the total exceeds the limit, reading is paused on the connections holding the most bytes,
+    until those cover the excess. As the buffered bytes are consumed, the paused connections are
+    resumed in the order they were paused while there is room left, counting a full read high-water
+    mark for each of them.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.total = 0
+        self._buffered: dict[FlowControl, int] = {}
+        # Used as an ordered set.
+        self._paused: dict[FlowControl, None] = {}
+        # The bytes buffered by the paused connections, which cover that much of the excess.
+        self._paused_total = 0
+
+    def update(self, flow: FlowControl, num_bytes: int) -> None:
+        previous = self._buffered.pop(flow, 0)
+        if num_bytes:
+            self._buffered[flow] = num_bytes
+        self.total += num_bytes - previous
+        if flow in self._paused:
+            self._paused_total += num_bytes - previous
+        if self.total - self._paused_total > self.limit:
+            self._shed()
+        elif self._paused and num_bytes < previous:
+            self._restore()
+
+    def discard(self, flow: FlowControl) -> None:
+        num_bytes = self._buffered.pop(flow, 0)
+        self.total -= num_bytes
+        if flow in self._paused:
+            del self._paused[flow]
+            self._paused_total -= num_bytes
+        if self._paused:
+            self._restore()
+
+    def _shed(self) -> None:
+        # Only the connections that are still reading are considered, as the paused ones already
+        # cover part of the excess.
+        excess = self.total - self._paused_total - self.limit
+        # A heap of the reading connections, holding the most bytes first.
+        heap = [
+            (-num_bytes, index, flow)
+            for index, (flow, num_bytes) in enumerate(self._buffered.items())
+            if flow not in self._paused
+        ]
+        heapq.heapify(heap)
+        while excess > 0 and heap:
+            _, _, flow = heapq.heappop(heap)
+            self._paused[flow] = None
+            self._paused_total += self._buffered[flow]
+            excess -= self._buffered[flow]
+            flow.suspend()
+
+    def _restore(self) -> None:
+        headroom = self.limit - self.total
+        for flow in list(self._paused):
+            if headroom <= 0:
+                break
+            headroom -= flow.read_high_water
+            del self._paused[flow]
+            self._paused_total -= self._buffered.get(flow, 0)
+            flow.unsuspend()
+
+
 async def service_unavailable(scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
     await send(
         {
@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import http
 import logging
+from collections.abc import Coroutine
 from typing import Any, Callable, Literal, cast
 from urllib.parse import unquote
 
 import h11
 from h11._connection import DEFAULT_MAX_INCOMPLETE_EVENT_SIZE
 
+from uvicorn._compat import create_eager_task
 from uvicorn._types import (
     ASGI3Application,
     ASGIReceiveEvent,
@@ -18,10 +21,30 @@ from uvicorn._types import (
     HTTPResponseStartEvent,
     HTTPScope,
 )
-from uvicorn.config import Config
+from uvicorn.config import Config, set_socket_options
 from uvicorn.logging import TRACE_LOG_LEVEL
-from uvicorn.protocols.http.flow_control import CLOSE_HEADER, HIGH_WATER_LIMIT, FlowControl, service_unavailable
-from uvicorn.protocols.utils import get_client_addr, get_local_addr, get_path_with_query_string, get_remote_addr, is_ssl
+from uvicorn.protocols.http.cache import CachedResponse, Flight, ResponseCache, ResponseRecorder
+from uvicorn.protocols.http.flow_control import (
+    CLOSE_HEADER,
+    REQUEST_BODY_RATE_PERIOD,
+    REQUEST_TIMEOUT_RESPONSE,
+    FlowControl,
+    Notifier,
+    noop,
+    service_unavailable,
+)
+from uvicorn.protocols.http.static import SENDFILE_MIN_SIZE, StaticResponse
+from uvicorn.protocols.proxy_protocol import InvalidProxyHeader, parse_proxy_header
+from uvicorn.protocols.utils import (
+    HEADER_RE,
+    HEADER_VALUE_RE,
+    STATUS_LINE,
+    get_client_addr,
+    get_local_addr,
+    get_path_with_query_string,
+    get_remote_addr,
+    is_ssl,
+)
 from uvicorn.server import ServerState
 
 
@@ -35,7 +58,60 @@ def _get_status_phrase(status_code: int) -> bytes:
 STATUS_PHRASES = {status_code: _get_status_phrase(status_code) for status_code in range(100, 600)}
 
 
+END_OF_MESSAGE = h11.EndOfMessage()
+
+
+@functools.cache
+def _framing_response(status_code: int, close: bool) -> h11.Response:
+    """
+    The response event given to h11 in place of the serialized one, carrying only what h11 needs
+    to follow the state of the connection. h11 events are immutable, so they are built once.
+    """
+    return h11.Response(status_code=status_code, headers=[CLOSE_HEADER] if close else [])
+
+
+def _is_close(connection: bytes) -> bool:
+    return b"close" in [token.strip() for token in connection.lower().split(b",")]
+
+
 class H11Protocol(asyncio.Protocol):
+    __slots__ = (
+        "config",
+        "app",
+        "loop",
+        "logger",
+        "access_logger",
+        "access_log",
+        "conn",
+        "ws_protocol_class",
+        "root_path",
+        "limit_concurrency",
+        "app_state",
+        "timeout_keep_alive_task",
+        "timeout_keep_alive",
+        "timeout_request_header_task",
+        "timeout_request_header",
+        "timeout_request_body_task",
+        "min_request_body_rate",
+        "body_received",
+        "server_state",
+        "connections",
+        "tasks",
+        "eager_tasks",
+        "response_cache",
+        "coalescer",
+        "static_files",
+        "transport",
+        "flow",
+        "server",
+        "client",
+        "scheme",
+        "proxy_header",
+        "scope",
+        "headers",
+        "cycle",
+    )
+
     def __init__(
         self,
         config: Config,
@@ -66,11 +142,20 @@ class H11Protocol(asyncio.Protocol):
         # Timeouts
         self.timeout_keep_alive_task: asyncio.TimerHandle | None = None
         self.timeout_keep_alive = config.timeout_keep_alive
+        self.timeout_request_header_task: asyncio.TimerHandle | None = None
+        self.timeout_request_header = config.timeout_request_header
+        self.timeout_request_body_task: asyncio.TimerHandle | None = None
+        self.min_request_body_rate = config.min_request_body_rate
+        self.body_received = 0
 
         # Shared server state
         self.server_state = server_state
         self.connections = server_state.connections
         self.tasks = server_state.tasks
+        self.eager_tasks = config.eager_tasks
+        self.response_cache = server_state.response_cache
+        self.coalescer = server_state.coalescer
+        self.static_files = server_state.static_files
 
         # Per-connection state
         self.transport: asyncio.Transport = None  # type: ignore[assignment]
@@ -78,6 +163,8 @@ class H11Protocol(asyncio.Protocol):
         self.server: tuple[str, int] | None = None
         self.client: tuple[str, int] | None = None
         self.scheme: Literal["http", "https"] | None = None
+        # The start of the PROXY protocol header, until it is received.
+        self.proxy_header: bytes | None = None
 
         # Per-request state
         self.scope: HTTPScope = None  # type: ignore[assignment]
@@ -89,12 +176,30 @@ class H11Protocol(asyncio.Protocol):
         self, transport: asyncio.Transport
     ) -> None:
         self.connections.add(self)
+        self.server_state.evict_idle_connections()
 
         self.transport = transport
-        self.flow = FlowControl(transport)
+        self.flow = FlowControl(
+            transport,
+            read_high_water=self.config.read_high_water,
+            write_high_water=self.config.write_high_water,
+            write_low_water=self.config.write_low_water,
+            memory_limit=self.config.limit_connection_memory,
+            budget=self.server_state.memory_budget,
+            clock=self.loop.time,
+        )
         self.server = get_local_addr(transport)
         self.client = get_remote_addr(transport)
         self.scheme = "https" if is_ssl(transport) else "http"
+        if self.config.proxy_protocol:
+            self.proxy_header = b""
+
+        if self.config.connection_socket_options:
+            sock = transport.get_extra_info("socket")
+            if sock is not None:
+                set_socket_options(sock, self.config.connection_socket_options)
+
+        self._set_request_header_timeout()
 
         if self.logger.level <= TRACE_LOG_LEVEL:
             prefix = "%s:%d - " % self.client if self.client else ""
@@ -102,6 +207,7 @@ class H11Protocol(asyncio.Protocol):
 
     def connection_lost(self, exc: Exception | None) -> None:
         self.connections.discard(self)
+        self.server_state.idle_connections.pop(self, None)
 
         if self.logger.level <= TRACE_LOG_LEVEL:
             prefix = "%s:%d - " % self.client if self.client else ""
@@ -121,6 +227,9 @@ class H11Protocol(asyncio.Protocol):
             self.cycle.message_event.set()
         if self.flow is not None:
             self.flow.resume_writing()
+            self.flow.release()
+        self._unset_request_header_timeout()
+        self._unset_request_body_timeout()
         if exc is None:
             self.transport.close()
             self._unset_keepalive_if_required()
@@ -132,6 +241,39 @@ class H11Protocol(asyncio.Protocol):
         if self.timeout_keep_alive_task is not None:
             self.timeout_keep_alive_task.cancel()
             self.timeout_keep_alive_task = None
+            self.server_state.idle_connections.pop(self, None)
+
+    def _set_request_header_timeout(self) -> None:
+        if self.timeout_request_header is not None and self.timeout_request_header_task is None:
+            self.timeout_request_header_task = self.loop.call_later(
+                self.timeout_request_header, self.timeout_request_header_handler
+            )
+
+    def _set_request_header_timeout_if_started(self) -> None:
+        """
+        Set the request header timeout if part of a new request is buffered, as the connection is
+        otherwise idle and subject to the keep-alive timeout instead.
+        """
+        if self.timeout_request_header is not None and self.conn.their_state is h11.IDLE and self.conn.trailing_data[0]:
+            self._set_request_header_timeout()
+
+    def _unset_request_header_timeout(self) -> None:
+        if self.timeout_request_header_task is not None:
+            self.timeout_request_header_task.cancel()
+            self.timeout_request_header_task = None
+
+    def _set_request_body_timeout(self) -> None:
+        if self.min_request_body_rate is not None:
+            self.body_received = 0
+            self.flow.take_read_paused_time()
+            self.timeout_request_body_task = self.loop.call_later(
+                REQUEST_BODY_RATE_PERIOD, self.timeout_request_body_handler
+            )
+
+    def _unset_request_body_timeout(self) -> None:
+        if self.timeout_request_body_task is not None:
+            self.timeout_request_body_task.cancel()
+            self.timeout_request_body_task = None
 
     def _get_upgrade(self) -> bytes | None:
         connection = []
@@ -165,11 +307,39 @@ class H11Protocol(asyncio.Protocol):
             self._unsupported_upgrade_warning()
         return False
 
+    def _receive_proxy_header(self, data: bytes) -> bytes:
+        """
+        Buffer the PROXY protocol header the connection starts with, returning the data after it.
+        """
+        assert self.proxy_header is not None
+        data = self.proxy_header + data
+        try:
+            parsed = parse_proxy_header(data)
+        except InvalidProxyHeader as exc:
+            self.logger.warning("Invalid PROXY protocol header received, %s.", exc)
+            self.transport.close()
+            return b""
+        if parsed is None:
+            self.proxy_header = data
+            return b""
+
+        length, addresses = parsed
+        self.proxy_header = None
+        if addresses is not None:
+            self.client, self.server = addresses
+        return data[length:]
+
     def data_received(self, data: bytes) -> None:
+        if self.proxy_header is not None:
+            data = self._receive_proxy_header(data)
+            if not data:
+                return
+
         self._unset_keepalive_if_required()
 
         self.conn.receive_data(data)
         self.handle_events()
+        self._set_request_header_timeout_if_started()
 
     def handle_events(self) -> None:
         while True:
@@ -193,6 +363,7 @@ class H11Protocol(asyncio.Protocol):
                 break
 
             elif isinstance(event, h11.Request):
+                self._unset_request_header_timeout()
                 self.headers = [(key.lower(), value) for key, value in event.headers]
                 raw_path, _, query_string = event.target.partition(b"?")
                 path = unquote(raw_path.decode("ascii"))
@@ -244,22 +415,23 @@ class H11Protocol(asyncio.Protocol):
                     access_logger=self.access_logger,
                     access_log=self.access_log,
                     default_headers=self.server_state.default_headers,
-                    message_event=asyncio.Event(),
+                    message_event=Notifier(),
                     on_response=self.on_response_complete,
+                    response_cache=self.response_cache,
                 )
-                task = self.loop.create_task(self.cycle.run_asgi(app))
-                task.add_done_callback(self.tasks.discard)
-                self.tasks.add(task)
+                self._set_request_body_timeout()
+                self._start_cycle(self.cycle, app)
 
             elif isinstance(event, h11.Data):
                 if self.conn.our_state is h11.DONE:
                     continue
                 self.cycle.body += event.data
-                if len(self.cycle.body) > HIGH_WATER_LIMIT:
-                    self.flow.pause_reading()
+                self.body_received += len(event.data)
+                self.flow.buffered_read(len(self.cycle.body))
                 self.cycle.message_event.set()
 
             elif isinstance(event, h11.EndOfMessage):
+                self._unset_request_body_timeout()
                 if self.conn.our_state is h11.DONE:
                     self.transport.resume_reading()
                     self.conn.start_next_cycle()
@@ -285,6 +457,8 @@ class H11Protocol(asyncio.Protocol):
             app_state=self.app_state,
         )
         protocol.connection_made(self.transport)
+        # The addresses may have been passed on by a PROXY protocol header.
+        protocol.client, protocol.server = self.client, self.server  # type: ignore[union-attr]
         protocol.data_received(b"".join(output))
         self.transport.set_protocol(protocol)
 
@@ -306,8 +480,62 @@ class H11Protocol(asyncio.Protocol):
 
         self.transport.close()
 
+    def _start_cycle(self, cycle: RequestResponseCycle, app: ASGI3Application) -> None:
+        """
+        Start processing a request, unless it can be answered without running the application.
+        """
+        if self.static_files is not None:
+            static_response = self.static_files.get_response(cycle.scope)
+            if static_response is not None:
+                if not cycle.send_static(static_response):
+                    self._create_task(cycle.sendfile(static_response))
+                return
+        if self.response_cache is not None:
+            cached_response = self.response_cache.get(cycle.scope)
+            if cached_response is not None:
+                cycle.send_cached(cached_response)
+                return
+        if not self._coalesce(cycle, app):
+            self._create_task(cycle.run_asgi(app))
+
+    def _create_task(self, coroutine: Coroutine[Any, Any, None]) -> None:
+        if self.eager_tasks:
+            task = create_eager_task(self.loop, coroutine)
+        else:
+            task = self.loop.create_task(coroutine)
+        task.add_done_callback(self.tasks.discard)
+        self.tasks.add(task)
+
+    def _coalesce(self, cycle: RequestResponseCycle, app: ASGI3Application) -> bool:
+        """
+        Wait for the response to an identical request being processed, returning `False` if the
+        request must be processed by the application instead.
+        """
+        if self.coalescer is None:
+            return False
+        key = self.coalescer.get_key(cycle.scope)
+        if key is None:
+            return False
+        if self.coalescer.join(key, functools.partial(self._on_coalesced_response, cycle, app)):
+            return True
+        # Identical requests received meanwhile are queued on this one, unless it is rejected.
+        if app is self.app:
+            cycle.flight = self.coalescer.start(key)
+        return False
+
+    def _on_coalesced_response(
+        self, cycle: RequestResponseCycle, app: ASGI3Application, response: CachedResponse | None
+    ) -> None:
+        if cycle.disconnected:
+            return
+        if response is not None:
+            cycle.send_cached(response)
+        else:
+            self._create_task(cycle.run_asgi(app))
+
     def on_response_complete(self) -> None:
-        self.server_state.total_requests += 1
+        self.server_state.on_request_complete()
+        self.flow.buffered_read(0)
 
         if self.transport.is_closing():
             return
@@ -315,7 +543,10 @@ class H11Protocol(asyncio.Protocol):
         # Set a short Keep-Alive timeout.
         self._unset_keepalive_if_required()
 
-        self.timeout_keep_alive_task = self.loop.call_later(self.timeout_keep_alive, self.timeout_keep_alive_handler)
+        self.timeout_keep_alive_task = self.loop.call_later(
+            self.server_state.keep_alive_timeout(self.timeout_keep_alive), self.timeout_keep_alive_handler
+        )
+        self.server_state.idle_connections[self] = None
 
         # Unpause data reads if needed.
         self.flow.resume_reading()
@@ -324,6 +555,7 @@ class H11Protocol(asyncio.Protocol):
         if self.conn.our_state is h11.DONE and self.conn.their_state is h11.DONE:
             self.conn.start_next_cycle()
             self.handle_events()
+            self._set_request_header_timeout_if_started()
 
     def shutdown(self) -> None:
         """
@@ -358,8 +590,70 @@ class H11Protocol(asyncio.Protocol):
             self.conn.send(event)
             self.transport.close()
 
+    def timeout_request_header_handler(self) -> None:
+        """
+        Called if the headers of a request are not received in time.
+        """
+        self.timeout_request_header_task = None
+        if self.cycle is not None and not self.cycle.response_complete:
+            # The previous request of the connection is still being processed, and reading may be paused.
+            self._set_request_header_timeout()
+        else:
+            self.on_request_timeout()
+
+    def timeout_request_body_handler(self) -> None:
+        """
+        Called periodically while a request body is received, to check the client sends it fast enough.
+        The time reading was paused for is not held against the client.
+        """
+        self.timeout_request_body_task = None
+        assert self.min_request_body_rate is not None
+        reading_time = max(REQUEST_BODY_RATE_PERIOD - self.flow.take_read_paused_time(), 0.0)
+        if self.body_received >= self.min_request_body_rate * reading_time:
+            self._set_request_body_timeout()
+        else:
+            self.on_request_timeout()
+
+    def on_request_timeout(self) -> None:
+        if self.transport.is_closing():
+            return
+        self.server_state.request_timeouts += 1
+        self.logger.debug("Request timed out.")
+        if self.cycle is None or self.cycle.response_complete or not self.cycle.response_started:
+            self.transport.write(REQUEST_TIMEOUT_RESPONSE)
+        if self.cycle is not None and not self.cycle.response_complete:
+            self.cycle.disconnected = True
+            self.cycle.message_event.set()
+        self.transport.close()
+
 
 class RequestResponseCycle:
+    __slots__ = (
+        "scope",
+        "conn",
+        "transport",
+        "flow",
+        "logger",
+        "access_logger",
+        "access_log",
+        "default_headers",
+        "message_event",
+        "on_response",
+        "disconnected",
+        "keep_alive",
+        "waiting_for_100_continue",
+        "body",
+        "more_body",
+        "response_started",
+        "response_complete",
+        "chunked_encoding",
+        "expected_content_length",
+        "response_cache",
+        "recorder",
+        "flight",
+        "cache_key",
+    )
+
     def __init__(
         self,
         scope: HTTPScope,
@@ -370,8 +664,9 @@ class RequestResponseCycle:
         access_logger: logging.Logger,
         access_log: bool,
         default_headers: list[tuple[bytes, bytes]],
-        message_event: asyncio.Event,
+        message_event: Notifier,
         on_response: Callable[..., None],
+        response_cache: ResponseCache | None = None,
     ) -> None:
         self.scope = scope
         self.conn = conn
@@ -396,6 +691,13 @@ class RequestResponseCycle:
         # Response state
         self.response_started = False
         self.response_complete = False
+        self.chunked_encoding: bool | None = None
+        self.expected_content_length = 0
+        self.response_cache = response_cache
+        self.recorder: ResponseRecorder | None = None
+        if response_cache is not None:
+            self.cache_key = response_cache.get_base_key(scope)
+        self.flight: Flight | None = None
 
     # ASGI exception wrapper
     async def run_asgi(self, app: ASGI3Application) -> None:
@@ -424,7 +726,9 @@ class RequestResponseCycle:
                 self.logger.error(msg)
                 self.transport.close()
         finally:
-            self.on_response = lambda: None
+            if self.flight is not None:
+                self.flight.fail()
+            self.on_response = noop
 
     async def send_500_response(self) -> None:
         response_start_event: HTTPResponseStartEvent = {
@@ -464,7 +768,8 @@ class RequestResponseCycle:
             self.waiting_for_100_continue = False
 
             status = message["status"]
-            headers = self.default_headers + list(message.get("headers", []))
+            app_headers = list(message.get("headers", []))
+            headers = self.default_headers + app_headers
 
             if CLOSE_HEADER in self.scope["headers"] and CLOSE_HEADER not in headers:
                 headers = headers + [CLOSE_HEADER]
@@ -479,11 +784,59 @@ class RequestResponseCycle:
                     status,
                 )
 
-            # Write response status line and headers
-            reason = STATUS_PHRASES[status]
-            response = h11.Response(status_code=status, headers=headers, reason=reason)
-            output = self.conn.send(event=response)
-            self.transport.write(output)
+            # Write response status line and headers. They are serialized here, like `httptools_impl`
+            # does, as h11 validates and normalizes them again in pure Python. h11 is only told whether
+            # the connection is kept alive, so that its state still follows the response.
+            content = [STATUS_LINE[status]]
+            close = self.scope["http_version"] != "1.1" or any(
+                name == b"connection" and _is_close(value) for name, value in self.scope["headers"]
+            )
+            close_sent = False
+
+            for name, value in headers:
+                if HEADER_RE.search(name):
+                    raise RuntimeError("Invalid HTTP header name.")
+                if HEADER_VALUE_RE.search(value):
+                    raise RuntimeError("Invalid HTTP header value.")
+
+                name = name.lower()
+                if name == b"content-length" and self.chunked_encoding is None:
+                    self.expected_content_length = int(value.decode())
+                    self.chunked_encoding = False
+                elif name == b"transfer-encoding" and value.lower() == b"chunked":
+                    self.expected_content_length = 0
+                    self.chunked_encoding = True
+                elif name == b"connection" and _is_close(value):
+                    close = close_sent = True
+                content.extend([name, b": ", value, b"\r\n"])
+
+            if status in (204, 304) or self.scope["method"] == "HEAD":
+                # The headers of a response to a HEAD request are the same as for a GET request.
+                if self.chunked_encoding is None and status not in (204, 304):
+                    content.append(b"transfer-encoding: chunked\r\n")
+                self.chunked_encoding = False
+                self.expected_content_length = 0
+            elif self.chunked_encoding is None:
+                # Neither content-length nor transfer-encoding specified
+                if self.scope["http_version"] == "1.1":
+                    self.chunked_encoding = True
+                    content.append(b"transfer-encoding: chunked\r\n")
+                else:
+                    # HTTP/1.0 clients read the body until the connection is closed.
+                    self.expected_content_length = -1
+                    close = True
+
+            if close and not close_sent:
+                content.append(b"connection: close\r\n")
+            content.append(b"\r\n")
+
+            self.conn.send(event=_framing_response(status, close))
+            self.transport.write(b"".join(content))
+
+            if self.response_cache is not None:
+                self.recorder = self.response_cache.record(self.scope, self.cache_key, status, app_headers)
+            if self.flight is not None:
+                self.flight.start(status, app_headers)
 
         elif not self.response_complete:
             # Sending response body
@@ -495,17 +848,42 @@ class RequestResponseCycle:
             body = message.get("body", b"")
             more_body = message.get("more_body", False)
 
+            if self.recorder is not None and not self.recorder.write(body):
+                self.recorder = None
+            if self.flight is not None:
+                self.flight.write(body)
+
             # Write response body
-            data = b"" if self.scope["method"] == "HEAD" else body
-            output = self.conn.send(event=h11.Data(data=data))
-            self.transport.write(output)
+            if self.scope["method"] == "HEAD":
+                pass
+            elif self.chunked_encoding:
+                if body:
+                    content = [b"%x\r\n" % len(body), body, b"\r\n"]
+                else:
+                    content = []
+                if not more_body:
+                    content.append(b"0\r\n\r\n")
+                self.transport.write(b"".join(content))
+            elif self.expected_content_length < 0:
+                self.transport.write(body)
+            else:
+                num_bytes = len(body)
+                if num_bytes > self.expected_content_length:
+                    raise RuntimeError("Response content longer than Content-Length")
+                self.expected_content_length -= num_bytes
+                self.transport.write(body)
 
             # Handle response completion
             if not more_body:
+                if self.expected_content_length > 0:
+                    raise RuntimeError("Response content shorter than Content-Length")
                 self.response_complete = True
                 self.message_event.set()
-                output = self.conn.send(event=h11.EndOfMessage())
-                self.transport.write(output)
+                self.conn.send(event=END_OF_MESSAGE)
+                if self.recorder is not None:
+                    self.recorder.finish()
+                if self.flight is not None:
+                    self.flight.finish(self.scope)
 
         else:
             # Response already sent
@@ -518,6 +896,108 @@ class RequestResponseCycle:
                 self.transport.close()
             self.on_response()
 
+    def send_cached(self, response: CachedResponse) -> None:
+        """
+        Send a response from the cache, or the response to an identical request, instead of running the application.
+        """
+        self.response_started = True
+        self.response_complete = True
+        self.waiting_for_100_continue = False
+
+        if self.access_log:
+            self.access_logger.info(
+                '%s - "%s %s HTTP/%s" %d',
+                get_client_addr(self.scope),
+                self.scope["method"],
+                get_path_with_query_string(self.scope),
+                self.scope["http_version"],
+                response.status,
+            )
+
+        headers = self.default_headers + response.headers + [(b"age", b"%d" % response.age)]
+        if CLOSE_HEADER in self.scope["headers"]:
+            headers.append(CLOSE_HEADER)
+        reason = STATUS_PHRASES[response.status]
+        output = self.conn.send(event=h11.Response(status_code=response.status, headers=headers, reason=reason))
+        if self.scope["method"] != "HEAD" and response.body:
+            output += self.conn.send(event=h11.Data(data=response.body))
+        output += self.conn.send(event=h11.EndOfMessage())
+        self.transport.write(output)
+
+        self.message_event.set()
+        if self.conn.our_state is h11.MUST_CLOSE or not self.keep_alive:
+            self.conn.send(event=h11.ConnectionClosed())
+            self.transport.close()
+        self.on_response()
+
+    def send_static(self, response: StaticResponse) -> bool:
+        """
+        Send a static file instead of running the application. Returns `False` if the body is
+        large enough to be sent from a task, with `sendfile`.
+        """
+        self.response_started = True
+        self.waiting_for_100_continue = False
+
+        if self.access_log:
+            self.access_logger.info(
+                '%s - "%s %s HTTP/%s" %d',
+                get_client_addr(self.scope),
+                self.scope["method"],
+                get_path_with_query_string(self.scope),
+                self.scope["http_version"],
+                response.status,
+            )
+
+        headers = self.default_headers + response.headers
+        if CLOSE_HEADER in self.scope["headers"]:
+            headers.append(CLOSE_HEADER)
+        reason = STATUS_PHRASES[response.status]
+        output = self.conn.send(event=h11.Response(status_code=response.status, headers=headers, reason=reason))
+        if response.file is None:
+            output += self.conn.send(event=h11.EndOfMessage())
+            self.transport.write(output)
+            self._complete_static(truncated=False)
+            return True
+        if response.count > SENDFILE_MIN_SIZE:
+            self.transport.write(output)
+            # Let h11 account for the body, which is sent separately.
+            self.conn.send_with_data_passthrough(h11.Data(data=response))  # type: ignore[arg-type]
+            return False
+
+        body = response.read()
+        response.close()
+        if len(body) == response.count:
+            output += self.conn.send(event=h11.Data(data=body))
+            output += self.conn.send(event=h11.EndOfMessage())
+        else:
+            output += body
+        self.transport.write(output)
+        self._complete_static(truncated=len(body) < response.count)
+        return True
+
+    async def sendfile(self, response: StaticResponse) -> None:
+        try:
+            complete = await response.sendfile(asyncio.get_running_loop(), self.transport, self.flow)
+        except OSError:
+            complete = False
+        finally:
+            response.close()
+        if complete:
+            self.transport.write(self.conn.send(event=h11.EndOfMessage()))
+        self._complete_static(truncated=not complete)
+
+    def _complete_static(self, truncated: bool) -> None:
+        self.response_complete = True
+        self.message_event.set()
+        if truncated:
+            # The body is incomplete, so the connection cannot be reused.
+            if not self.transport.is_closing():
+                self.transport.close()
+        elif self.conn.our_state is h11.MUST_CLOSE or not self.keep_alive:
+            self.conn.send(event=h11.ConnectionClosed())
+            self.transport.close()
+        self.on_response()
+
     async def receive(self) -> ASGIReceiveEvent:
         if self.waiting_for_100_continue and not self.transport.is_closing():
             headers: list[tuple[str, str]] = []
@@ -540,4 +1020,5 @@ class RequestResponseCycle:
             "more_body": self.more_body,
         }
         self.body = b""
+        self.flow.buffered_read(0)
         return message
@@ -1,16 +1,17 @@
 from __future__ import annotations
 
 import asyncio
-import http
+import functools
 import logging
-import re
 import urllib
 from asyncio.events import TimerHandle
 from collections import deque
+from collections.abc import Coroutine
 from typing import Any, Callable, Literal, cast
 
 import httptools
 
+from uvicorn._compat import create_eager_task
 from uvicorn._types import (
     ASGI3Application,
     ASGIReceiveEvent,
@@ -19,28 +20,74 @@ from uvicorn._types import (
     HTTPResponseStartEvent,
     HTTPScope,
 )
-from uvicorn.config import Config
+from uvicorn.config import Config, set_socket_options
 from uvicorn.logging import TRACE_LOG_LEVEL
-from uvicorn.protocols.http.flow_control import CLOSE_HEADER, HIGH_WATER_LIMIT, FlowControl, service_unavailable
-from uvicorn.protocols.utils import get_client_addr, get_local_addr, get_path_with_query_string, get_remote_addr, is_ssl
+from uvicorn.protocols.http.cache import CachedResponse, Flight, ResponseCache, ResponseRecorder
+from uvicorn.protocols.http.flow_control import (
+    CLOSE_HEADER,
+    REQUEST_BODY_RATE_PERIOD,
+    REQUEST_TIMEOUT_RESPONSE,
+    FlowControl,
+    Notifier,
+    noop,
+    service_unavailable,
+)
+from uvicorn.protocols.http.static import SENDFILE_MIN_SIZE, StaticResponse
+from uvicorn.protocols.proxy_protocol import InvalidProxyHeader, parse_proxy_header
+from uvicorn.protocols.utils import (
+    HEADER_RE,
+    HEADER_VALUE_RE,
+    STATUS_LINE,
+    get_client_addr,
+    get_local_addr,
+    get_path_with_query_string,
+    get_remote_addr,
+    is_ssl,
+)
 from uvicorn.server import ServerState
 
-HEADER_RE = re.compile(b'[\x00-\x1f\x7f()<>@,;:[]={} \t\\"]')
-HEADER_VALUE_RE = re.compile(b"[\x00-\x08\x0a-\x1f\x7f]")
-
-
-def _get_status_line(status_code: int) -> bytes:
-    try:
-        phrase = http.HTTPStatus(status_code).phrase.encode()
-    except ValueError:
-        phrase = b""
-    return b"".join([b"HTTP/1.1 ", str(status_code).encode(), b" ", phrase, b"\r\n"])
-
-
-STATUS_LINE = {status_code: _get_status_line(status_code) for status_code in range(100, 600)}
-
 
 class HttpToolsProtocol(asyncio.Protocol):
+    __slots__ = (
+        "config",
+        "app",
+        "loop",
+        "logger",
+        "access_logger",
+        "access_log",
+        "parser",
+        "ws_protocol_class",
+        "root_path",
+        "limit_concurrency",
+        "app_state",
+        "timeout_keep_alive_task",
+        "timeout_keep_alive",
+        "timeout_request_header_task",
+        "timeout_request_header",
+        "timeout_request_body_task",
+        "min_request_body_rate",
+        "body_received",
+        "server_state",
+        "connections",
+        "tasks",
+        "eager_tasks",
+        "response_cache",
+        "coalescer",
+        "static_files",
+        "transport",
+        "flow",
+        "server",
+        "client",
+        "scheme",
+        "proxy_header",
+        "pipeline",
+        "scope",
+        "headers",
+        "expect_100_continue",
+        "cycle",
+        "url",
+    )
+
     def __init__(
         self,
         config: Config,
@@ -74,11 +121,20 @@ class HttpToolsProtocol(asyncio.Protocol):
         # Timeouts
         self.timeout_keep_alive_task: TimerHandle | None = None
         self.timeout_keep_alive = config.timeout_keep_alive
+        self.timeout_request_header_task: TimerHandle | None = None
+        self.timeout_request_header = config.timeout_request_header
+        self.timeout_request_body_task: TimerHandle | None = None
+        self.min_request_body_rate = config.min_request_body_rate
+        self.body_received = 0
 
         # Global state
         self.server_state = server_state
         self.connections = server_state.connections
         self.tasks = server_state.tasks
+        self.eager_tasks = config.eager_tasks
+        self.response_cache = server_state.response_cache
+        self.coalescer = server_state.coalescer
+        self.static_files = server_state.static_files
 
         # Per-connection state
         self.transport: asyncio.Transport = None  # type: ignore[assignment]
@@ -86,6 +142,8 @@ class HttpToolsProtocol(asyncio.Protocol):
         self.server: tuple[str, int] | None = None
         self.client: tuple[str, int] | None = None
         self.scheme: Literal["http", "https"] | None = None
+        # The start of the PROXY protocol header, until it is received.
+        self.proxy_header: bytes | None = None
         self.pipeline: deque[tuple[RequestResponseCycle, ASGI3Application]] = deque()
 
         # Per-request state
@@ -99,12 +157,30 @@ class HttpToolsProtocol(asyncio.Protocol):
         self, transport: asyncio.Transport
     ) -> None:
         self.connections.add(self)
+        self.server_state.evict_idle_connections()
 
         self.transport = transport
-        self.flow = FlowControl(transport)
+        self.flow = FlowControl(
+            transport,
+            read_high_water=self.config.read_high_water,
+            write_high_water=self.config.write_high_water,
+            write_low_water=self.config.write_low_water,
+            memory_limit=self.config.limit_connection_memory,
+            budget=self.server_state.memory_budget,
+            clock=self.loop.time,
+        )
         self.server = get_local_addr(transport)
         self.client = get_remote_addr(transport)
         self.scheme = "https" if is_ssl(transport) else "http"
+        if self.config.proxy_protocol:
+            self.proxy_header = b""
+
+        if self.config.connection_socket_options:
+            sock = transport.get_extra_info("socket")
+            if sock is not None:
+                set_socket_options(sock, self.config.connection_socket_options)
+
+        self._set_request_header_timeout()
 
         if self.logger.level <= TRACE_LOG_LEVEL:
             prefix = "%s:%d - " % self.client if self.client else ""
@@ -112,6 +188,7 @@ class HttpToolsProtocol(asyncio.Protocol):
 
     def connection_lost(self, exc: Exception | None) -> None:
         self.connections.discard(self)
+        self.server_state.idle_connections.pop(self, None)
 
         if self.logger.level <= TRACE_LOG_LEVEL:
             prefix = "%s:%d - " % self.client if self.client else ""
@@ -123,6 +200,9 @@ class HttpToolsProtocol(asyncio.Protocol):
             self.cycle.message_event.set()
         if self.flow is not None:
             self.flow.resume_writing()
+            self.flow.release()
+        self._unset_request_header_timeout()
+        self._unset_request_body_timeout()
         if exc is None:
             self.transport.close()
             self._unset_keepalive_if_required()
@@ -136,6 +216,31 @@ class HttpToolsProtocol(asyncio.Protocol):
         if self.timeout_keep_alive_task is not None:
             self.timeout_keep_alive_task.cancel()
             self.timeout_keep_alive_task = None
+            self.server_state.idle_connections.pop(self, None)
+
+    def _set_request_header_timeout(self) -> None:
+        if self.timeout_request_header is not None and self.timeout_request_header_task is None:
+            self.timeout_request_header_task = self.loop.call_later(
+                self.timeout_request_header, self.timeout_request_header_handler
+            )
+
+    def _unset_request_header_timeout(self) -> None:
+        if self.timeout_request_header_task is not None:
+            self.timeout_request_header_task.cancel()
+            self.timeout_request_header_task = None
+
+    def _set_request_body_timeout(self) -> None:
+        if self.min_request_body_rate is not None:
+            self.body_received = 0
+            self.flow.take_read_paused_time()
+            self.timeout_request_body_task = self.loop.call_later(
+                REQUEST_BODY_RATE_PERIOD, self.timeout_request_body_handler
+            )
+
+    def _unset_request_body_timeout(self) -> None:
+        if self.timeout_request_body_task is not None:
+            self.timeout_request_body_task.cancel()
+            self.timeout_request_body_task = None
 
     def _get_upgrade(self) -> bytes | None:
         connection = []
@@ -164,7 +269,34 @@ class HttpToolsProtocol(asyncio.Protocol):
         upgrade = self._get_upgrade()
         return upgrade == b"websocket" and self._should_upgrade_to_ws()
 
+    def _receive_proxy_header(self, data: bytes) -> bytes:
+        """
+        Buffer the PROXY protocol header the connection starts with, returning the data after it.
+        """
+        assert self.proxy_header is not None
+        data = self.proxy_header + data
+        try:
+            parsed = parse_proxy_header(data)
+        except InvalidProxyHeader as exc:
+            self.logger.warning("Invalid PROXY protocol header received, %s.", exc)
+            self.transport.close()
+            return b""
+        if parsed is None:
+            self.proxy_header = data
+            return b""
+
+        length, addresses = parsed
+        self.proxy_header = None
+        if addresses is not None:
+            self.client, self.server = addresses
+        return data[length:]
+
     def data_received(self, data: bytes) -> None:
+        if self.proxy_header is not None:
+            data = self._receive_proxy_header(data)
+            if not data:
+                return
+
         self._unset_keepalive_if_required()
 
         try:
@@ -197,6 +329,8 @@ class HttpToolsProtocol(asyncio.Protocol):
             app_state=self.app_state,
         )
         protocol.connection_made(self.transport)
+        # The addresses may have been passed on by a PROXY protocol header.
+        protocol.client, protocol.server = self.client, self.server  # type: ignore[union-attr]
         protocol.data_received(b"".join(output))
         self.transport.set_protocol(protocol)
 
@@ -217,6 +351,10 @@ class HttpToolsProtocol(asyncio.Protocol):
         self.transport.close()
 
     def on_message_begin(self) -> None:
+        # A pipelined request may begin after a response sent without a task armed the keep-alive
+        # timeout, and the connection is no longer idle.
+        self._unset_keepalive_if_required()
+        self._set_request_header_timeout()
         self.url = b""
         self.expect_100_continue = False
         self.headers = []
@@ -243,6 +381,7 @@ class HttpToolsProtocol(asyncio.Protocol):
         self.headers.append((name, value))
 
     def on_headers_complete(self) -> None:
+        self._unset_request_header_timeout()
         http_version = self.parser.get_http_version()
         method = self.parser.get_method()
         self.scope["method"] = method.decode("ascii")
@@ -280,16 +419,16 @@ class HttpToolsProtocol(asyncio.Protocol):
             access_logger=self.access_logger,
             access_log=self.access_log,
             default_headers=self.server_state.default_headers,
-            message_event=asyncio.Event(),
+            message_event=Notifier(),
             expect_100_continue=self.expect_100_continue,
             keep_alive=http_version != "1.0",
             on_response=self.on_response_complete,
+            response_cache=self.response_cache,
         )
+        self._set_request_body_timeout()
         if existing_cycle is None or existing_cycle.response_complete:
             # Standard case - start processing the request.
-            task = self.loop.create_task(self.cycle.run_asgi(app))
-            task.add_done_callback(self.tasks.discard)
-            self.tasks.add(task)
+            self._start_cycle(self.cycle, app)
         else:
             # Pipelined HTTP requests need to be queued up.
             self.flow.pause_reading()
@@ -299,19 +438,78 @@ class HttpToolsProtocol(asyncio.Protocol):
         if (self.parser.should_upgrade() and self._should_upgrade()) or self.cycle.response_complete:
             return
         self.cycle.body += body
-        if len(self.cycle.body) > HIGH_WATER_LIMIT:
-            self.flow.pause_reading()
+        self.body_received += len(body)
+        if self.pipeline:
+            # The request is queued behind the one being processed.
+            self.flow.queued_read(sum(len(queued.body) for queued, _ in self.pipeline))
+        else:
+            self.flow.buffered_read(len(self.cycle.body))
         self.cycle.message_event.set()
 
     def on_message_complete(self) -> None:
+        self._unset_request_body_timeout()
         if (self.parser.should_upgrade() and self._should_upgrade()) or self.cycle.response_complete:
             return
         self.cycle.more_body = False
         self.cycle.message_event.set()
 
+    def _start_cycle(self, cycle: RequestResponseCycle, app: ASGI3Application) -> None:
+        """
+        Start processing a request, unless it can be answered without running the application.
+        """
+        if self.static_files is not None:
+            static_response = self.static_files.get_response(cycle.scope)
+            if static_response is not None:
+                if not cycle.send_static(static_response):
+                    self._create_task(cycle.sendfile(static_response))
+                return
+        if self.response_cache is not None:
+            cached_response = self.response_cache.get(cycle.scope)
+            if cached_response is not None:
+                cycle.send_cached(cached_response)
+                return
+        if not self._coalesce(cycle, app):
+            self._create_task(cycle.run_asgi(app))
+
+    def _create_task(self, coroutine: Coroutine[Any, Any, None]) -> None:
+        if self.eager_tasks:
+            task = create_eager_task(self.loop, coroutine)
+        else:
+            task = self.loop.create_task(coroutine)
+        task.add_done_callback(self.tasks.discard)
+        self.tasks.add(task)
+
+    def _coalesce(self, cycle: RequestResponseCycle, app: ASGI3Application) -> bool:
+        """
+        Wait for the response to an identical request being processed, returning `False` if the
+        request must be processed by the application instead.
+        """
+        if self.coalescer is None:
+            return False
+        key = self.coalescer.get_key(cycle.scope)
+        if key is None:
+            return False
+        if self.coalescer.join(key, functools.partial(self._on_coalesced_response, cycle, app)):
+            return True
+        # Identical requests received meanwhile are queued on this one, unless it is rejected.
+        if app is self.app:
+            cycle.flight = self.coalescer.start(key)
+        return False
+
+    def _on_coalesced_response(
+        self, cycle: RequestResponseCycle, app: ASGI3Application, response: CachedResponse | None
+    ) -> None:
+        if cycle.disconnected:
+            return
+        if response is not None:
+            cycle.send_cached(response)
+        else:
+            self._create_task(cycle.run_asgi(app))
+
     def on_response_complete(self) -> None:
         # Callback for pipelined HTTP requests to be started.
-        self.server_state.total_requests += 1
+        self.server_state.on_request_complete()
+        self.flow.buffered_read(0)
 
         if self.transport.is_closing():
             return
@@ -325,13 +523,14 @@ class HttpToolsProtocol(asyncio.Protocol):
         # Keep-Alive timeout instead.
         if self.pipeline:
             cycle, app = self.pipeline.pop()
-            task = self.loop.create_task(cycle.run_asgi(app))
-            task.add_done_callback(self.tasks.discard)
-            self.tasks.add(task)
+            self.flow.queued_read(sum(len(queued.body) for queued, _ in self.pipeline))
+            self.flow.buffered_read(len(cycle.body))
+            self._start_cycle(cycle, app)
         else:
             self.timeout_keep_alive_task = self.loop.call_later(
-                self.timeout_keep_alive, self.timeout_keep_alive_handler
+                self.server_state.keep_alive_timeout(self.timeout_keep_alive), self.timeout_keep_alive_handler
             )
+            self.server_state.idle_connections[self] = None
 
     def shutdown(self) -> None:
         """
@@ -362,8 +561,69 @@ class HttpToolsProtocol(asyncio.Protocol):
         if not self.transport.is_closing():
             self.transport.close()
 
+    def timeout_request_header_handler(self) -> None:
+        """
+        Called if the headers of a request are not received in time.
+        """
+        self.timeout_request_header_task = None
+        if self.cycle is not None and not self.cycle.response_complete:
+            # The previous request of the connection is still being processed, and reading may be paused.
+            self._set_request_header_timeout()
+        else:
+            self.on_request_timeout()
+
+    def timeout_request_body_handler(self) -> None:
+        """
+        Called periodically while a request body is received, to check the client sends it fast enough.
+        The time reading was paused for is not held against the client.
+        """
+        self.timeout_request_body_task = None
+        assert self.min_request_body_rate is not None
+        reading_time = max(REQUEST_BODY_RATE_PERIOD - self.flow.take_read_paused_time(), 0.0)
+        if self.body_received >= self.min_request_body_rate * reading_time:
+            self._set_request_body_timeout()
+        else:
+            self.on_request_timeout()
+
+    def on_request_timeout(self) -> None:
+        if self.transport.is_closing():
+            return
+        self.server_state.request_timeouts += 1
+        self.logger.debug("Request timed out.")
+        if self.cycle is None or self.cycle.response_complete or not self.cycle.response_started:
+            self.transport.write(REQUEST_TIMEOUT_RESPONSE)
+        if self.cycle is not None and not self.cycle.response_complete:
+            self.cycle.disconnected = True
+            self.cycle.message_event.set()
+        self.transport.close()
+
 
 class RequestResponseCycle:
+    __slots__ = (
+        "scope",
+        "transport",
+        "flow",
+        "logger",
+        "access_logger",
+        "access_log",
+        "default_headers",
+        "message_event",
+        "on_response",
+        "disconnected",
+        "keep_alive",
+        "waiting_for_100_continue",
+        "body",
+        "more_body",
+        "response_started",
+        "response_complete",
+        "chunked_encoding",
+        "expected_content_length",
+        "response_cache",
+        "recorder",
+        "flight",
+        "cache_key",
+    )
+
     def __init__(
         self,
         scope: HTTPScope,
@@ -373,10 +633,11 @@ class RequestResponseCycle:
         access_logger: logging.Logger,
         access_log: bool,
         default_headers: list[tuple[bytes, bytes]],
-        message_event: asyncio.Event,
+        message_event: Notifier,
         expect_100_continue: bool,
         keep_alive: bool,
         on_response: Callable[..., None],
+        response_cache: ResponseCache | None = None,
     ):
         self.scope = scope
         self.transport = transport
@@ -402,6 +663,11 @@ class RequestResponseCycle:
         self.response_complete = False
         self.chunked_encoding: bool | None = None
         self.expected_content_length = 0
+        self.response_cache = response_cache
+        self.recorder: ResponseRecorder | None = None
+        if response_cache is not None:
+            self.cache_key = response_cache.get_base_key(scope)
+        self.flight: Flight | None = None
 
     # ASGI exception wrapper
     async def run_asgi(self, app: ASGI3Application) -> None:
@@ -430,7 +696,9 @@ class RequestResponseCycle:
                 self.logger.error(msg)
                 self.transport.close()
         finally:
-            self.on_response = lambda: None
+            if self.flight is not None:
+                self.flight.fail()
+            self.on_response = noop
 
     async def send_500_response(self) -> None:
         await self.send(
@@ -467,7 +735,8 @@ class RequestResponseCycle:
             self.waiting_for_100_continue = False
 
             status_code = message["status"]
-            headers = self.default_headers + list(message.get("headers", []))
+            app_headers = list(message.get("headers", []))
+            headers = self.default_headers + app_headers
 
             if CLOSE_HEADER in self.scope["headers"] and CLOSE_HEADER not in headers:
                 headers = headers + [CLOSE_HEADER]
@@ -510,6 +779,11 @@ class RequestResponseCycle:
             content.append(b"\r\n")
             self.transport.write(b"".join(content))
 
+            if self.response_cache is not None:
+                self.recorder = self.response_cache.record(self.scope, self.cache_key, status_code, app_headers)
+            if self.flight is not None:
+                self.flight.start(status_code, app_headers)
+
         elif not self.response_complete:
             # Sending response body
             if message_type != "http.response.body":
@@ -519,6 +793,11 @@ class RequestResponseCycle:
             body = cast(bytes, message.get("body", b""))
             more_body = message.get("more_body", False)
 
+            if self.recorder is not None and not self.recorder.write(body):
+                self.recorder = None
+            if self.flight is not None:
+                self.flight.write(body)
+
             # Write response body
             if self.scope["method"] == "HEAD":
                 self.expected_content_length = 0
@@ -542,6 +821,10 @@ class RequestResponseCycle:
             if not more_body:
                 if self.expected_content_length != 0:
                     raise RuntimeError("Response content shorter than Content-Length")
+                if self.recorder is not None:
+                    self.recorder.finish()
+                if self.flight is not None:
+                    self.flight.finish(self.scope)
                 self.response_complete = True
                 self.message_event.set()
                 if not self.keep_alive:
@@ -553,6 +836,101 @@ class RequestResponseCycle:
             msg = "Unexpected ASGI message '%s' sent, after response already completed."
             raise RuntimeError(msg % message_type)
 
+    def send_cached(self, response: CachedResponse) -> None:
+        """
+        Send a response from the cache, or the response to an identical request, instead of running the application.
+        """
+        self.response_started = True
+        self.response_complete = True
+        self.waiting_for_100_continue = False
+
+        if self.access_log:
+            self.access_logger.info(
+                '%s - "%s %s HTTP/%s" %d',
+                get_client_addr(self.scope),
+                self.scope["method"],
+                get_path_with_query_string(self.scope),
+                self.scope["http_version"],
+                response.status,
+            )
+
+        content = [STATUS_LINE[response.status]]
+        for name, value in self.default_headers:
+            content.extend([name, b": ", value, b"\r\n"])
+        for name, value in response.headers:
+            content.extend([name, b": ", value, b"\r\n"])
+        content.append(b"age: %d\r\n" % response.age)
+        if CLOSE_HEADER in self.scope["headers"]:
+            content.append(b"connection: close\r\n")
+            self.keep_alive = False
+        content.append(b"\r\n")
+        if self.scope["method"] != "HEAD":
+            content.append(response.body)
+        self.transport.write(b"".join(content))
+
+        self.message_event.set()
+        if not self.keep_alive:
+            self.transport.close()
+        self.on_response()
+
+    def send_static(self, response: StaticResponse) -> bool:
+        """
+        Send a static file instead of running the application. Returns `False` if the body is
+        large enough to be sent from a task, with `sendfile`.
+        """
+        self.response_started = True
+        self.waiting_for_100_continue = False
+
+        if self.access_log:
+            self.access_logger.info(
+                '%s - "%s %s HTTP/%s" %d',
+                get_client_addr(self.scope),
+                self.scope["method"],
+                get_path_with_query_string(self.scope),
+                self.scope["http_version"],
+                response.status,
+            )
+
+        content = [STATUS_LINE[response.status]]
+        for name, value in self.default_headers:
+            content.extend([name, b": ", value, b"\r\n"])
+        for name, value in response.headers:
+            content.extend([name, b": ", value, b"\r\n"])
+        if CLOSE_HEADER in self.scope["headers"]:
+            content.append(b"connection: close\r\n")
+            self.keep_alive = False
+        content.append(b"\r\n")
+        if response.file is not None and response.count <= SENDFILE_MIN_SIZE:
+            body = response.read()
+            response.close()
+            content.append(body)
+            if len(body) < response.count:
+                # The file was truncated since its size was read.
+                self.keep_alive = False
+        self.transport.write(b"".join(content))
+
+        if response.file is not None:
+            return False
+        self._complete_static()
+        return True
+
+    async def sendfile(self, response: StaticResponse) -> None:
+        try:
+            if not await response.sendfile(asyncio.get_running_loop(), self.transport, self.flow):
+                self.keep_alive = False
+        except OSError:
+            self.keep_alive = False
+        finally:
+            response.close()
+        self._complete_static()
+
+    def _complete_static(self) -> None:
+        self.response_complete = True
+        self.message_event.set()
+        if not self.keep_alive and not self.transport.is_closing():
+            self.transport.close()
+        self.on_response()
+
     async def receive(self) -> ASGIReceiveEvent:
         if self.waiting_for_100_continue and not self.transport.is_closing():
             self.transport.write(b"HTTP/1.1 100 Continue\r\n\r\n")
@@ -567,4 +945,5 @@ class RequestResponseCycle:
             return {"type": "http.disconnect"}
         message: HTTPRequestEvent = {"type": "http.request", "body": self.body, "more_body": self.more_body}
         self.body = b""
+        self.flow.buffered_read(0)
         return message
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+import mimetypes
+import os
+import stat
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+from uvicorn._types import HTTPScope
+from uvicorn.protocols.http.flow_control import FlowControl
+
+# Bodies up to this size are read and written directly, rather than with `sendfile` from a task.
+SENDFILE_MIN_SIZE = 64 * 1024
+
+# Fallback read size, for transports that do not support `sendfile` such as TLS.
+READ_CHUNK_SIZE = 256 * 1024
+
+# How long the `stat` result of an open file is trusted, before checking that it is unchanged.
+STAT_INTERVAL = 1.0
+
+
+def parse_static_mount(value: str) -> tuple[str, str]:
+    """
+    Parse a `PREFIX=DIRECTORY` mount, such as `/static=./public`.
+    """
+    prefix, sep, directory = value.partition("=")
+    if not sep or not prefix.startswith("/") or not directory:
+        raise ValueError(f"Invalid static mount {value!r}, expected PREFIX=DIRECTORY.")
+    return prefix.rstrip("/") + "/", os.path.abspath(directory)
+
+
+class StaticFile:
+    """
+    A file kept open, along with the headers describing it.
+    """
+
+    def __init__(self, path: str, fd: int, st: os.stat_result) -> None:
+        self.path = path
+        self.fd = fd
+        self.size = st.st_size
+        self.identity = (st.st_ino, st.st_size, st.st_mtime_ns)
+        self.mtime = int(st.st_mtime)
+        self.checked = time.monotonic()
+        self.etag = b'"%x-%x"' % (st.st_mtime_ns, st.st_size)
+        self.last_modified = formatdate(st.st_mtime, usegmt=True).encode("ascii")
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+        self.content_type = content_type.encode("latin-1")
+        # The number of responses being sent from the file, which is only closed once they are complete.
+        self.users = 0
+        self.evicted = False
+
+
+class StaticResponse:
+    """
+    A response to a request for a static file. `file` is `None` if there is no body to send.
+    """
+
+    def __init__(
+        self,
+        files: StaticFiles,
+        status: int,
+        headers: list[tuple[bytes, bytes]],
+        file: StaticFile | None = None,
+        offset: int = 0,
+        count: int = 0,
+    ) -> None:
+        self.files = files
+        self.status = status
+        self.headers = headers
+        self.file = file
+        self.offset = offset
+        self.count = count
+        if file is not None:
+            file.users += 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def read(self) -> bytes:
+        assert self.file is not None
+        return os.pread(self.file.fd, self.count, self.offset)
+
+    async def sendfile(self, loop: asyncio.AbstractEventLoop, transport: asyncio.Transport, flow: FlowControl) -> bool:
+        """
+        Send the body to the transport, with `sendfile` if supported. Returns `False` if the file
+        was truncated meanwhile and the body is incomplete.
+        """
+        assert self.file is not None
+        offset, count = self.offset, self.count
+        try:
+            with open(self.file.fd, "rb", buffering=0, closefd=False) as file:
+                sent = await loop.sendfile(transport, file, offset, count, fallback=False)
+            offset += sent
+            count -= sent
+        except (NotImplementedError, RuntimeError):
+            # Raised by event loops and transports, such as TLS ones, that do not support `sendfile`.
+            pass
+        while count > 0 and not transport.is_closing():
+            chunk = os.pread(self.file.fd, min(count, READ_CHUNK_SIZE), offset)
+            if not chunk:
+                return False
+            transport.write(chunk)
+            offset += len(chunk)
+            count -= len(chunk)
+            if flow.write_paused:
+                await flow.drain()  # pragma: full coverage
+        return count == 0
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.files.release(self.file)
+            self.file = None
+
+
+class StaticFiles:
+    """
+    Serves the files below the mounted directories, for `GET` and `HEAD` requests to the paths
+    starting with the prefix of a mount. Requests for missing files are left to the application.
+
+    Up to `max_open_files` files are kept open, the least recently used being closed first. Their
+    `stat` results are checked again once per second, in case the files were modified. Symbolic links
+    are followed, as long as they resolve to a file below the directory of the mount.
+    """
+
+    def __init__(self, mounts: list[tuple[str, str]], max_open_files: int) -> None:
+        self.mounts = [(prefix, os.path.realpath(directory)) for prefix, directory in mounts]
+        self.max_open_files = max_open_files
+        self.hits = 0
+        self._files: OrderedDict[str, StaticFile] = OrderedDict()
+
+    def get_response(self, scope: HTTPScope) -> StaticResponse | None:
+        if scope["method"] not in ("GET", "HEAD"):
+            return None
+        mounted_path = self._get_path(scope["path"])
+        if mounted_path is None:
+            return None
+        file = self._open(*mounted_path)
+        if file is None:
+            return None
+        self.hits += 1
+
+        if_none_match = if_modified_since = range_ = if_range = None
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value
+            elif name == b"if-modified-since":
+                if_modified_since = value
+            elif name == b"range":
+                range_ = value
+            elif name == b"if-range":
+                if_range = value
+
+        headers = [(b"etag", file.etag), (b"last-modified", file.last_modified)]
+        if self._not_modified(file, if_none_match, if_modified_since):
+            return StaticResponse(self, 304, headers)
+
+        headers += [(b"content-type", file.content_type), (b"accept-ranges", b"bytes")]
+        offset, count, status = 0, file.size, 200
+        if range_ is not None and (if_range is None or if_range in (file.etag, file.last_modified)):
+            byte_range = self._parse_range(range_, file.size)
+            if byte_range is None:
+                headers += [(b"content-range", b"bytes */%d" % file.size), (b"content-length", b"0")]
+                return StaticResponse(self, 416, headers)
+            if byte_range != (0, file.size):
+                offset, count = byte_range
+                status = 206
+                headers.append((b"content-range", b"bytes %d-%d/%d" % (offset, offset + count - 1, file.size)))
+        headers.append((b"content-length", b"%d" % count))
+        if scope["method"] == "HEAD" or count == 0:
+            return StaticResponse(self, status, headers)
+        return StaticResponse(self, status, headers, file, offset, count)
+
+    def release(self, file: StaticFile) -> None:
+        file.users -= 1
+        if file.evicted and not file.users:
+            os.close(file.fd)
+
+    def close(self) -> None:
+        """
+        Close the files kept open. Those still being sent are closed once their responses are complete.
+        """
+        for path in list(self._files):
+            self._remove(path)
+
+    def _get_path(self, path: str) -> tuple[str, str] | None:
+        """
+        The path of the requested file, along with the directory of its mount.
+        """
+        for prefix, directory in self.mounts:
+            if path.startswith(prefix):
+                parts = [part for part in path[len(prefix) :].split("/") if part and part != "."]
+                if not parts or any(part == ".." or "\\" in part or "\0" in part for part in parts):
+                    return None
+                return os.path.join(directory, *parts), directory
+        return None
+
+    def _open(self, path: str, directory: str) -> StaticFile | None:
+        now = time.monotonic()
+        file = self._files.get(path)
+        if file is not None:
+            if now - file.checked >= STAT_INTERVAL:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    st = None
+                if st is None or (st.st_ino, st.st_size, st.st_mtime_ns) != file.identity:
+                    self._remove(path)
+                    return self._open(path, directory) if st is not None else None
+                file.checked = now
+            self._files.move_to_end(path)
+            return file
+
+        # Symbolic links must not lead out of the directory of the mount.
+        real_path = os.path.realpath(path)
+        if not real_path.startswith(os.path.join(directory, "")):
+            return None
+        try:
+            fd = os.open(real_path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+        except OSError:
+            return None
+        st = os.fstat(fd)
+        if not stat.S_ISREG(st.st_mode):
+            os.close(fd)
+            return None
+        file = self._files[path] = StaticFile(path, fd, st)
+        if len(self._files) > self.max_open_files:
+            self._remove(next(iter(self._files)))
+        return file
+
+    def _remove(self, path: str) -> None:
+        file = self._files.pop(path)
+        file.evicted = True
+        if not file.users:
+            os.close(file.fd)
+
+    @staticmethod
+    def _not_modified(file: StaticFile, if_none_match: bytes | None, if_modified_since: bytes | None) -> bool:
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix(b"W/") for tag in if_none_match.split(b",")]
+            return b"*" in tags or file.etag in tags
+        if if_modified_since is not None:
+            try:
+                return file.mtime <= parsedate_to_datetime(if_modified_since.decode("latin-1")).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def _parse_range(value: bytes, size: int) -> tuple[int, int] | None:
+        """
+        Parse a single byte range into an offset and a count, or return `None` if unsatisfiable.
+        Multiple ranges are answered with the whole file.
+        """
+        unit, _, ranges = value.partition(b"=")
+        if unit.strip().lower() != b"bytes" or b"," in ranges:
+            return (0, size)
+        start, sep, end = ranges.strip().partition(b"-")
+        try:
+            if not sep:
+                return (0, size)
+            if not start:
+                suffix = int(end)
+                if suffix <= 0 or not size:
+                    return None
+                return (max(size - suffix, 0), min(suffix, size))
+            first = int(start)
+            last = int(end) if end else size - 1
+        except ValueError:
+            return (0, size)
+        if first >= size or last < first:
+            return None
+        last = min(last, size - 1)
+        return (first, last - first + 1)
@@ -0,0 +1,100 @@
+"""
+Parsing of the PROXY protocol header, which load balancers send at the start of a connection to pass
+on the addresses of the connection they accepted from the client.
+
+See <https://www.haproxy.org/download/2.9/doc/proxy-protocol.txt>.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+
+V1_PREFIX = b"PROXY "
+# The longest version 1 header, including its CRLF.
+V1_MAX_LENGTH = 107
+V2_SIGNATURE = b"\r\n\r\n\x00\r\nQUIT\n"
+V2_HEADER_LENGTH = 16
+
+# The client and server addresses passed on by a header.
+Addresses = tuple[tuple[str, int], tuple[str, int]]
+
+
+class InvalidProxyHeader(ValueError): ...
+
+
+def parse_proxy_header(data: bytes) -> tuple[int, Addresses | None] | None:
+    """
+    Parse the PROXY protocol header at the start of `data`, returning its length and the addresses it
+    passes on, or None if more data is needed. The addresses are None for headers sent by the load
+    balancer for its own connections, such as health checks, or for connections that aren't TCP.
+
+    Raises `InvalidProxyHeader` if `data` doesn't start with a valid header.
+    """
+    if data.startswith(V2_SIGNATURE):
+        return _parse_v2(data)
+    if data.startswith(V1_PREFIX):
+        return _parse_v1(data)
+    if V2_SIGNATURE.startswith(data[: len(V2_SIGNATURE)]) or V1_PREFIX.startswith(data[: len(V1_PREFIX)]):
+        return None
+    raise InvalidProxyHeader("the connection doesn't start with a PROXY protocol header")
+
+
+def _parse_v1(data: bytes) -> tuple[int, Addresses | None] | None:
+    end = data.find(b"\r\n", 0, V1_MAX_LENGTH)
+    if end == -1:
+        if len(data) >= V1_MAX_LENGTH:
+            raise InvalidProxyHeader("the version 1 header is too long")
+        return None
+
+    fields = data[:end].split(b" ")
+    if fields[1] == b"UNKNOWN":
+        return end + 2, None
+    if len(fields) != 6 or fields[1] not in (b"TCP4", b"TCP6"):
+        raise InvalidProxyHeader("the version 1 header is malformed")
+    try:
+        client_ip = ipaddress.ip_address(fields[2].decode("ascii"))
+        server_ip = ipaddress.ip_address(fields[3].decode("ascii"))
+    except ValueError:
+        raise InvalidProxyHeader("the version 1 header has an invalid address") from None
+    if not client_ip.version == server_ip.version == int(fields[1][3:]):
+        raise InvalidProxyHeader("the version 1 header has an invalid address")
+    ports = []
+    for port in fields[4:]:
+        if not port.isdigit() or int(port) > 65535:
+            raise InvalidProxyHeader("the version 1 header has an invalid port")
+        ports.append(int(port))
+    return end + 2, ((str(client_ip), ports[0]), (str(server_ip), ports[1]))
+
+
+def _parse_v2(data: bytes) -> tuple[int, Addresses | None] | None:
+    if len(data) < V2_HEADER_LENGTH:
+        return None
+    version_command, family = data[12], data[13]
+    end = V2_HEADER_LENGTH + int.from_bytes(data[14:16], "big")
+    if version_command >> 4 != 2 or version_command & 0x0F > 1:
+        raise InvalidProxyHeader("the version 2 header has an unsupported version or command")
+    if len(data) < end:
+        return None
+
+    # The LOCAL command is sent for the load balancer's own connections, which are handled as is.
+    if version_command & 0x0F == 0:
+        return end, None
+    address_family = family >> 4
+    ip_class: type[ipaddress.IPv4Address | ipaddress.IPv6Address]
+    if address_family == 1:
+        ip_class, size = ipaddress.IPv4Address, 4
+    elif address_family == 2:
+        ip_class, size = ipaddress.IPv6Address, 16
+    else:
+        # Unspecified and UNIX socket addresses aren't passed on.
+        return end, None
+    if end < V2_HEADER_LENGTH + 2 * size + 4:
+        raise InvalidProxyHeader("the version 2 header is too short for its addresses")
+
+    # Any TLVs after the addresses are ignored.
+    start = V2_HEADER_LENGTH
+    client_ip = ip_class(data[start : start + size])
+    server_ip = ip_class(data[start + size : start + 2 * size])
+    client_port = int.from_bytes(data[start + 2 * size : start + 2 * size + 2], "big")
+    server_port = int.from_bytes(data[start + 2 * size + 2 : start + 2 * size + 4], "big")
+    return end, ((str(client_ip), client_port), (str(server_ip), server_port))
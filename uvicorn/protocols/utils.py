@@ -1,10 +1,28 @@
 from __future__ import annotations
 
 import asyncio
+import http
+import re
 import urllib.parse
 
 from uvicorn._types import WWWScope
 
+# The characters that are not allowed in the names and values of response headers. Names must be
+# tokens, so bytes above 0x7f are rejected as well.
+HEADER_RE = re.compile(b'[\x00-\x1f\x7f-\xff()<>@,;:\\[\\]/?={} \t\\\\"]')
+HEADER_VALUE_RE = re.compile(b"[\x00-\x08\x0a-\x1f\x7f]")
+
+
+def _get_status_line(status_code: int) -> bytes:
+    try:
+        phrase = http.HTTPStatus(status_code).phrase.encode()
+    except ValueError:
+        phrase = b""
+    return b"".join([b"HTTP/1.1 ", str(status_code).encode(), b" ", phrase, b"\r\n"])
+
+
+STATUS_LINE = {status_code: _get_status_line(status_code) for status_code in range(100, 600)}
+
 
 class ClientDisconnected(OSError): ...
 
@@ -13,12 +13,17 @@ import time
 from collections.abc import Generator, Sequence
 from email.utils import formatdate
 from types import FrameType
-from typing import TYPE_CHECKING, Union
+from typing import TYPE_CHECKING, Any, Callable, TypeVar, Union
 
 import click
 
 from uvicorn._compat import asyncio_run
-from uvicorn.config import Config
+from uvicorn.config import Config, set_socket_options
+from uvicorn.profiler import SamplingProfiler
+from uvicorn.protocols.http.cache import RequestCoalescer, ResponseCache
+from uvicorn.protocols.http.flow_control import MemoryBudget
+from uvicorn.protocols.http.static import StaticFiles
+from uvicorn.watchdog import LoopWatchdog
 
 if TYPE_CHECKING:
     from uvicorn.protocols.http.h11_impl import H11Protocol
@@ -38,30 +43,152 @@ if sys.platform == "win32":  # pragma: py-not-win32
 
 logger = logging.getLogger("uvicorn.error")
 
+# The number of seconds between logs of how long requests of WSGI applications waited for a thread.
+WSGI_STATS_INTERVAL = 60
+
+_T = TypeVar("_T")
+
+
+class ObservedSet(set[_T]):
+    """
+    A set which calls `on_empty` once its last item is removed.
+    """
+
+    on_empty: Callable[[], object] | None = None
+
+    def discard(self, item: _T) -> None:
+        super().discard(item)
+        if not self and self.on_empty is not None:
+            self.on_empty()
+
+    def remove(self, item: _T) -> None:
+        super().remove(item)
+        if not self and self.on_empty is not None:
+            self.on_empty()
+
 
 class ServerState:
     """
     Shared servers state that is available between all protocol instances.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        memory_limit: int | None = None,
+        keep_alive_pressure: int | None = None,
+        response_cache_size: int | None = None,
+        coalesce_paths: list[str] | None = None,
+        coalesce_max_size: int = 1024 * 1024,
+        static_mounts: list[tuple[str, str]] | None = None,
+        static_max_open_files: int = 256,
+        max_requests: int | None = None,
+    ) -> None:
         self.total_requests = 0
-        self.connections: set[Protocols] = set()
-        self.tasks: set[asyncio.Task[None]] = set()
+        self.max_requests = max_requests
+        # Called once `total_requests` reaches `max_requests`.
+        self.on_max_requests: Callable[[], None] | None = None
+        self.connections: ObservedSet[Protocols] = ObservedSet()
+        self.tasks: ObservedSet[asyncio.Task[None]] = ObservedSet()
         self.default_headers: list[tuple[bytes, bytes]] = []
+        self.request_timeouts = 0
+        self.memory_budget = MemoryBudget(memory_limit) if memory_limit is not None else None
+        # Keep-alive connections waiting for their next request, the longest idle first. Used as an ordered set.
+        self.idle_connections: dict[H11Protocol | HttpToolsProtocol, None] = {}
+        self.keep_alive_pressure = keep_alive_pressure
+        self.response_cache = ResponseCache(response_cache_size) if response_cache_size is not None else None
+        self.coalescer = RequestCoalescer(coalesce_paths, coalesce_max_size) if coalesce_paths else None
+        self.static_files = StaticFiles(static_mounts, static_max_open_files) if static_mounts else None
+
+    def on_request_complete(self) -> None:
+        self.total_requests += 1
+        if self.total_requests == self.max_requests and self.on_max_requests is not None:
+            self.on_max_requests()
+
+    def keep_alive_timeout(self, timeout: float) -> float:
+        """
+        Shrink the keep-alive timeout linearly once the number of connections exceeds half the
+        keep-alive pressure threshold, down to nothing at the threshold.
+        """
+        if self.keep_alive_pressure is None:
+            return timeout
+        start = self.keep_alive_pressure / 2
+        excess = len(self.connections) - start
+        if excess <= 0:
+            return timeout
+        return timeout * max(0.0, 1 - excess / start)
+
+    def evict_idle_connections(self) -> None:
+        """
+        Close the longest idle keep-alive connections, until the number of connections is back
+        within the keep-alive pressure threshold.
+        """
+        if self.keep_alive_pressure is None:
+            return
+        excess = len(self.connections) - self.keep_alive_pressure
+        while excess > 0 and self.idle_connections:
+            connection = next(iter(self.idle_connections))
+            del self.idle_connections[connection]
+            # The connection is lost on a later iteration of the event loop, but it no longer counts.
+            self.connections.discard(connection)
+            connection.timeout_keep_alive_handler()
+            excess -= 1
 
 
 class Server:
     def __init__(self, config: Config) -> None:
         self.config = config
-        self.server_state = ServerState()
+        self.server_state = ServerState(
+            memory_limit=config.limit_server_memory,
+            keep_alive_pressure=config.keep_alive_pressure,
+            response_cache_size=config.response_cache_size,
+            coalesce_paths=config.coalesce_paths,
+            coalesce_max_size=config.coalesce_max_size,
+            static_mounts=config.static_mounts,
+            static_max_open_files=config.static_max_open_files,
+            max_requests=config.limit_max_requests,
+        )
+
+        self.profiler = SamplingProfiler(config.profile_dir) if config.profile_dir is not None else None
+        self.watchdog = LoopWatchdog(config.loop_lag_threshold) if config.loop_lag_threshold is not None else None
 
         self.started = False
-        self.should_exit = False
-        self.force_exit = False
+        self._should_exit = False
+        self._force_exit = False
         self.last_notified = 0.0
+        self.last_wsgi_stats = 0.0
+        # The requests started and turned away by the WSGI thread pool, as of its last log.
+        self._wsgi_stats_logged = (0.0, 0.0)
 
         self._captured_signals: list[int] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        # Set whenever the main loop or the graceful shutdown should check whether they are done.
+        self._wakeup: asyncio.Event = None  # type: ignore[assignment]
+        self._tick_handle: asyncio.TimerHandle | None = None
+        self._notify_task: asyncio.Future[None] | None = None
+
+    @property
+    def should_exit(self) -> bool:
+        return self._should_exit
+
+    @should_exit.setter
+    def should_exit(self, value: bool) -> None:
+        self._should_exit = value
+        self._wake()
+
+    @property
+    def force_exit(self) -> bool:
+        return self._force_exit
+
+    @force_exit.setter
+    def force_exit(self, value: bool) -> None:
+        self._force_exit = value
+        self._wake()
+
+    def _wake(self) -> None:
+        # May be called from a signal handler or from another thread.
+        if self._loop is not None:
+            with contextlib.suppress(RuntimeError):  # The event loop is closed.
+                self._loop.call_soon_threadsafe(self._wakeup.set)
 
     def run(self, sockets: list[socket.socket] | None = None) -> None:
         return asyncio_run(self.serve(sockets=sockets), loop_factory=self.config.get_loop_factory())
@@ -86,14 +213,30 @@ class Server:
         await self.startup(sockets=sockets)
         if self.should_exit:
             return
-        await self.main_loop()
-        await self.shutdown(sockets=sockets)
+        if self.watchdog is not None:
+            self.watchdog.start(asyncio.get_running_loop())
+        try:
+            await self.main_loop()
+            await self.shutdown(sockets=sockets)
+        finally:
+            if self._tick_handle is not None:
+                self._tick_handle.cancel()
+            if self._notify_task is not None:
+                self._notify_task.cancel()
+            if self.watchdog is not None:
+                self.watchdog.stop()
 
         message = "Finished server process [%d]"
         color_message = "Finished server process [" + click.style("%d", fg="cyan") + "]"
         logger.info(message, process_id, extra={"color_message": color_message})
 
     async def startup(self, sockets: list[socket.socket] | None = None) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self.server_state.connections.on_empty = self._wakeup.set
+        self.server_state.tasks.on_empty = self._wakeup.set
+        self.server_state.on_max_requests = self._wakeup.set
+
         await self.lifespan.startup()
         if self.lifespan.should_exit:
             self.should_exit = True
@@ -131,8 +274,9 @@ class Server:
             self.servers: list[asyncio.base_events.Server] = []
             for sock in sockets:
                 is_windows = platform.system() == "Windows"
-                if config.workers > 1 and is_windows:  # pragma: py-not-win32
+                if (config.workers > 1 or config.workers_max is not None) and is_windows:  # pragma: py-not-win32
                     sock = _share_socket(sock)  # type: ignore[assignment]
+                set_socket_options(sock, config.listener_socket_options)
                 server = await loop.create_server(create_protocol, sock=sock, ssl=config.ssl, backlog=config.backlog)
                 self.servers.append(server)
             listeners = sockets
@@ -158,6 +302,22 @@ class Server:
             listeners = server.sockets
             self.servers = [server]
 
+        elif config.listener_socket_options:
+            # Create the sockets from a host/port pair, with the listener socket options set before
+            # they start listening, as options such as `SO_RCVBUF` only affect the TCP window
+            # scaling negotiated from then on.
+            try:
+                listeners = await self._bind_sockets()
+            except OSError as exc:
+                logger.error(exc)
+                await self.lifespan.shutdown()
+                sys.exit(1)
+
+            self.servers = []
+            for sock in listeners:
+                server = await loop.create_server(create_protocol, sock=sock, ssl=config.ssl, backlog=config.backlog)
+                self.servers.append(server)
+
         else:
             # Standard case. Create a socket from a host/port pair.
             try:
@@ -186,6 +346,31 @@ class Server:
 
         self.started = True
 
+    async def _bind_sockets(self) -> list[socket.socket]:
+        """
+        Create and bind a socket for each address of the host, as `loop.create_server()` does.
+        """
+        config = self.config
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            config.host or None, config.port, type=socket.SOCK_STREAM, flags=socket.AI_PASSIVE
+        )
+        sockets: list[socket.socket] = []
+        try:
+            for family, type_, proto, _, address in dict.fromkeys(infos):
+                sock = socket.socket(family, type_, proto)
+                sockets.append(sock)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                if family == socket.AF_INET6:  # pragma: full coverage
+                    # Bind IPv6 sockets to IPv6 only, as the IPv4 addresses have their own sockets.
+                    sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 1)
+                set_socket_options(sock, config.listener_socket_options)
+                sock.bind(address)
+        except OSError:
+            for sock in sockets:
+                sock.close()
+            raise
+        return sockets
+
     def _log_started_message(self, listeners: Sequence[socket.SocketType]) -> None:
         config = self.config
 
@@ -222,43 +407,56 @@ class Server:
             )
 
     async def main_loop(self) -> None:
-        counter = 0
-        should_exit = await self.on_tick(counter)
-        while not should_exit:
-            counter += 1
-            counter = counter % 864000
-            await asyncio.sleep(0.1)
-            should_exit = await self.on_tick(counter)
-
-    async def on_tick(self, counter: int) -> bool:
-        # Update the default headers, once per second.
-        if counter % 10 == 0:
-            current_time = time.time()
-            current_date = formatdate(current_time, usegmt=True).encode()
-
-            if self.config.date_header:
-                date_header = [(b"date", current_date)]
-            else:
-                date_header = []
-
-            self.server_state.default_headers = date_header + self.config.encoded_headers
-
-            # Callback to `callback_notify` once every `timeout_notify` seconds.
-            if self.config.callback_notify is not None:
-                if current_time - self.last_notified > self.config.timeout_notify:  # pragma: full coverage
-                    self.last_notified = current_time
-                    await self.config.callback_notify()
-
-        # Determine if we should exit.
-        if self.should_exit:
-            return True
+        self.on_tick()
+        while True:
+            self._wakeup.clear()
+            if self.should_exit:
+                return
+
+            max_requests = self.config.limit_max_requests
+            if max_requests is not None and self.server_state.total_requests >= max_requests:
+                logger.warning(f"Maximum request limit of {max_requests} exceeded. Terminating process.")
+                return
+
+            await self._wakeup.wait()
+
+    def on_tick(self) -> None:
+        """
+        Called at the start of every second of the wall clock, from the start of the main loop
+        until the server has shut down.
+        """
+        current_time = time.time()
+        current_date = formatdate(current_time, usegmt=True).encode()
+
+        if self.config.date_header:
+            date_header = [(b"date", current_date)]
+        else:
+            date_header = []
+
+        self.server_state.default_headers = date_header + self.config.encoded_headers
+
+        # Callback to `callback_notify` once every `timeout_notify` seconds.
+        if self.config.callback_notify is not None and (self._notify_task is None or self._notify_task.done()):
+            if current_time - self.last_notified > self.config.timeout_notify:  # pragma: full coverage
+                self.last_notified = current_time
+                self._notify_task = asyncio.ensure_future(self.config.callback_notify())
+                self._notify_task.add_done_callback(self._on_notify_done)
+
+        # Log the WSGI thread pool's figures every `WSGI_STATS_INTERVAL` seconds, when requests came since.
+        executor = self.config.wsgi_executor
+        if executor is not None and current_time - self.last_wsgi_stats >= WSGI_STATS_INTERVAL:
+            self.last_wsgi_stats = current_time
+            stats = executor.stats()
+            if (stats["started"], stats["rejected"]) != self._wsgi_stats_logged:
+                self._wsgi_stats_logged = (stats["started"], stats["rejected"])
+                logger.info("WSGI thread pool: %s", executor.format_stats(stats))
 
-        max_requests = self.config.limit_max_requests
-        if max_requests is not None and self.server_state.total_requests >= max_requests:
-            logger.warning(f"Maximum request limit of {max_requests} exceeded. Terminating process.")
-            return True
+        loop = asyncio.get_running_loop()
+        self._tick_handle = loop.call_at(loop.time() + 1 - current_time % 1, self.on_tick)
 
-        return False
+    def _on_notify_done(self, task: asyncio.Future[None]) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Exception in 'callback_notify'", exc_info=task.exception())
 
     async def shutdown(self, sockets: list[socket.socket] | None = None) -> None:
         logger.info("Shutting down")
@@ -269,10 +467,11 @@ class Server:
         for sock in sockets or []:
             sock.close()  # pragma: full coverage
 
-        # Request shutdown on all existing connections.
+        # Request shutdown on all existing connections, and give the idle ones a moment to close.
         for connection in list(self.server_state.connections):
             connection.shutdown()
-        await asyncio.sleep(0.1)
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._wait_until(lambda: not self.server_state.connections), timeout=0.1)
 
         # When 3.10 is not supported anymore, use `async with asyncio.timeout(...):`.
         try:
@@ -288,6 +487,19 @@ class Server:
             for t in self.server_state.tasks:
                 t.cancel(msg="Task cancelled, timeout graceful shutdown exceeded")
 
+        # Close the static files kept open.
+        if self.server_state.static_files is not None:
+            self.server_state.static_files.close()
+
+        # Write the samples taken since profiling was started.
+        if self.profiler is not None and self.profiler.running:
+            self.profiler.stop()
+
+        # Stop the threads of WSGI applications, which are no longer running requests.
+        if self.config.wsgi_executor is not None:
+            logger.info("WSGI thread pool: %s", self.config.wsgi_executor.format_stats())
+            self.config.wsgi_executor.shutdown(wait=False)
+
         # Send the lifespan shutdown event, and wait for application shutdown.
         if not self.force_exit:
             await self.lifespan.shutdown()
@@ -297,19 +509,24 @@ class Server:
         if self.server_state.connections and not self.force_exit:
             msg = "Waiting for connections to close. (CTRL+C to force quit)"
             logger.info(msg)
-            while self.server_state.connections and not self.force_exit:
-                await asyncio.sleep(0.1)
+            await self._wait_until(lambda: not self.server_state.connections)
 
         # Wait for existing tasks to complete.
         if self.server_state.tasks and not self.force_exit:
             msg = "Waiting for background tasks to complete. (CTRL+C to force quit)"
             logger.info(msg)
-            while self.server_state.tasks and not self.force_exit:
-                await asyncio.sleep(0.1)
+            await self._wait_until(lambda: not self.server_state.tasks)
 
         for server in self.servers:
             await server.wait_closed()
 
+    async def _wait_until(self, condition: Callable[[], bool]) -> None:
+        while True:
+            self._wakeup.clear()
+            if condition() or self.force_exit:
+                return
+            await self._wakeup.wait()
+
     @contextlib.contextmanager
     def capture_signals(self) -> Generator[None, None, None]:
         # Signals can only be listened to from the main thread.
@@ -318,7 +535,9 @@ class Server:
             return
         # always use signal.signal, even if loop.add_signal_handler is available
         # this allows to restore previous signal handlers later on
-        original_handlers = {sig: signal.signal(sig, self.handle_exit) for sig in HANDLED_SIGNALS}
+        original_handlers: dict[int, Any] = {sig: signal.signal(sig, self.handle_exit) for sig in HANDLED_SIGNALS}
+        if self.profiler is not None and hasattr(signal, "SIGUSR2"):  # pragma: py-win32
+            original_handlers[signal.SIGUSR2] = signal.signal(signal.SIGUSR2, self.handle_profile)
         try:
             yield
         finally:
@@ -336,3 +555,10 @@ class Server:
             self.force_exit = True  # pragma: full coverage
         else:
             self.should_exit = True
+
+    def handle_profile(self, sig: int, frame: FrameType | None) -> None:
+        # Start or stop profiling from the event loop, rather than from within the signal handler.
+        # The handler is only installed when profiling is enabled.
+        assert self.profiler is not None
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.profiler.toggle)
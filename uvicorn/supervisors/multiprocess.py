@@ -1,16 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 import signal
+import socket
+import struct
 import threading
-from multiprocessing import Pipe
-from socket import socket
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
 from typing import Any, Callable
 
 import click
 
-from uvicorn._subprocess import get_subprocess
+from uvicorn._subprocess import get_subprocess, spawn
 from uvicorn.config import Config
 
 SIGNALS = {
@@ -22,34 +26,193 @@ SIGNALS = {
 logger = logging.getLogger("uvicorn.error")
 
 
+def get_accept_queue_depth(sock: socket.socket) -> int:
+    """
+    The number of connections waiting to be accepted on a listening socket.
+
+    Only available for TCP sockets on Linux, where it is reported as `tcpi_unacked`
+    by `TCP_INFO`. Returns 0 whenever it can't be determined.
+    """
+    if not hasattr(socket, "TCP_INFO") or sock.family not in (socket.AF_INET, socket.AF_INET6):
+        return 0  # pragma: py-linux
+    try:
+        tcp_info = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, 104)
+    except OSError:  # pragma: no cover
+        return 0
+    return struct.unpack_from("I", tcp_info, 24)[0]
+
+
+def parse_cpu_list(cpu_list: str) -> set[int]:
+    """
+    Parse a CPU list in the format used by sysfs, e.g. `0-3,8,10-11`.
+    """
+    cpus: set[int] = set()
+    for part in cpu_list.strip().split(","):
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        cpus.update(range(int(start), int(end or start) + 1))
+    return cpus
+
+
+def get_cpu_sets(affinity: str, nodes_path: Path = Path("/sys/devices/system/node")) -> list[set[int]]:
+    """
+    The sets of CPUs that workers can be pinned to, or an empty list if pinning is unavailable.
+
+    * affinity - `"core"` to pin each worker to a single CPU, or `"numa"` to pin each
+                 worker to all the CPUs of a NUMA node.
+    * nodes_path - Where the NUMA nodes are described in sysfs.
+    """
+    if affinity == "none" or not hasattr(os, "sched_setaffinity"):
+        return []  # pragma: py-not-linux
+
+    available = os.sched_getaffinity(0)
+    if affinity == "core":
+        return [{cpu} for cpu in sorted(available)]
+
+    cpu_sets = []
+    for cpu_list in sorted(nodes_path.glob("node[0-9]*/cpulist")):
+        cpus = parse_cpu_list(cpu_list.read_text()) & available
+        if cpus:
+            cpu_sets.append(cpus)
+    # Without NUMA information, the whole machine is a single node.
+    return cpu_sets or [available]
+
+
+class Autoscaler:
+    """
+    Decides when the supervisor should add or remove a worker, based on the load they report.
+
+    The workers must be overloaded for `scale_up_delay` seconds before one is added, and
+    underloaded for the longer `scale_down_delay` before one is removed, so that short bursts
+    of traffic don't make the number of workers flap. Connections waiting to be accepted only
+    count once they did on `accept_queue_readings` readings in a row.
+
+    When `max_in_flight` is set, the load of a worker is the larger of its event loop busy ratio
+    and the fraction of `max_in_flight` it has in-flight requests for, so that workers that wait
+    on their requests rather than compute them are scaled as well.
+    """
+
+    def __init__(
+        self,
+        min_workers: int,
+        max_workers: int,
+        high_load: float = 0.75,
+        low_load: float = 0.25,
+        scale_up_delay: float = 10.0,
+        scale_down_delay: float = 60.0,
+        max_in_flight: int | None = None,
+        accept_queue_readings: int = 3,
+    ) -> None:
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.high_load = high_load
+        self.low_load = low_load
+        self.scale_up_delay = scale_up_delay
+        self.scale_down_delay = scale_down_delay
+        self.max_in_flight = max_in_flight
+        self.accept_queue_readings = accept_queue_readings
+
+        self.overloaded_since: float | None = None
+        self.underloaded_since: float | None = None
+        # The number of readings in a row the accept queue wasn't empty on.
+        self.accept_queue_backlog = 0
+
+    def decide(self, workers: int, load: float, in_flight: float, accept_queue: int, now: float) -> int:
+        """
+        Returns 1 to add a worker, -1 to remove one, or 0 to keep the current number.
+
+        * workers - The current number of workers.
+        * load - The average event loop busy ratio of the workers, between 0 and 1.
+        * in_flight - The average number of in-flight requests of the workers.
+        * accept_queue - The number of connections waiting to be accepted.
+        * now - The current time, as given by `time.monotonic()`.
+        """
+        if self.max_in_flight:
+            load = max(load, min(in_flight / self.max_in_flight, 1.0))
+        self.accept_queue_backlog = self.accept_queue_backlog + 1 if accept_queue > 0 else 0
+
+        overloaded = load >= self.high_load or self.accept_queue_backlog >= self.accept_queue_readings
+        # Only scale down if the remaining workers can take over the load without being overloaded.
+        underloaded = (
+            load <= self.low_load and accept_queue == 0 and load * workers / max(workers - 1, 1) < self.high_load
+        )
+
+        if overloaded and workers < self.max_workers:
+            self.underloaded_since = None
+            if self.overloaded_since is None:
+                self.overloaded_since = now
+            elif now - self.overloaded_since >= self.scale_up_delay:
+                self.overloaded_since = None
+                return 1
+        elif underloaded and workers > self.min_workers:
+            self.overloaded_since = None
+            if self.underloaded_since is None:
+                self.underloaded_since = now
+            elif now - self.underloaded_since >= self.scale_down_delay:
+                self.underloaded_since = None
+                return -1
+        else:
+            self.overloaded_since = None
+            self.underloaded_since = None
+        return 0
+
+
 class Process:
     def __init__(
         self,
         config: Config,
-        target: Callable[[list[socket] | None], None],
-        sockets: list[socket],
+        target: Callable[[list[socket.socket] | None], None],
+        sockets: list[socket.socket],
+        cpus: set[int] | None = None,
     ) -> None:
         self.real_target = target
+        self.config = config
+        self.cpus = cpus
+
+        # Incremented by the child's event loop, and read by the parent without blocking.
+        self.heartbeat = spawn.Value("Q", 0, lock=False)
+        self.last_heartbeat = 0
+        self.last_heartbeat_at = time.monotonic()
+
+        # Load reported by the child on each heartbeat.
+        self.busy = spawn.Value("d", 0.0, lock=False)
+        self.pending_tasks = spawn.Value("Q", 0, lock=False)
+        self.last_notified_at: float | None = None
+        self.last_busy_time = 0.0
+
+        # The server's notify callback is replaced by the heartbeat, which calls the one of the
+        # application in its own task, on its own schedule.
+        self.callback_notify = config.callback_notify
+        self.timeout_notify = config.timeout_notify
+        self.callback_notified_at = 0.0
+        self.callback_task: asyncio.Future[None] | None = None
 
-        self.parent_conn, self.child_conn = Pipe()
         self.process = get_subprocess(config, self.target, sockets)
 
-    def ping(self, timeout: float = 5) -> bool:
-        self.parent_conn.send(b"ping")
-        if self.parent_conn.poll(timeout):
-            self.parent_conn.recv()
-            return True
-        return False
-
-    def pong(self) -> None:
-        self.child_conn.recv()
-        self.child_conn.send(b"pong")
-
-    def always_pong(self) -> None:
-        while True:
-            self.pong()
-
-    def target(self, sockets: list[socket] | None = None) -> Any:  # pragma: no cover
+    async def notify(self) -> None:
+        # The CPU time of the event loop's thread only, which the threads running requests of WSGI
+        # applications or `run_in_executor` calls don't add to.
+        now, busy_time = time.monotonic(), time.thread_time()
+        if self.last_notified_at is not None:
+            self.busy.value = min((busy_time - self.last_busy_time) / (now - self.last_notified_at), 1.0)
+        self.last_notified_at, self.last_busy_time = now, busy_time
+        # Every task on the event loop, apart from the server's main task and the notification ones, is in-flight work.
+        notify_tasks = (asyncio.current_task(), self.callback_task)
+        self.pending_tasks.value = max(sum(task not in notify_tasks for task in asyncio.all_tasks()) - 1, 0)
+        self.heartbeat.value += 1
+
+        if self.callback_notify is not None and (self.callback_task is None or self.callback_task.done()):
+            if now - self.callback_notified_at > self.timeout_notify:
+                self.callback_notified_at = now
+                self.callback_task = asyncio.ensure_future(self.callback_notify())
+                self.callback_task.add_done_callback(self._on_callback_done)
+
+    def _on_callback_done(self, task: asyncio.Future[None]) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Exception in 'callback_notify'", exc_info=task.exception())
+
+    def target(self, sockets: list[socket.socket] | None = None) -> Any:  # pragma: no cover
         if os.name == "nt":  # pragma: py-not-win32
             # Windows doesn't support SIGTERM, so we use SIGBREAK instead.
             # And then we raise SIGTERM when SIGBREAK is received.
@@ -59,14 +222,34 @@ class Process:
                 lambda sig, frame: signal.raise_signal(signal.SIGTERM),
             )
 
-        threading.Thread(target=self.always_pong, daemon=True).start()
+        if self.cpus is not None:
+            os.sched_setaffinity(0, self.cpus)
+
+        # Until the server handles it, a profiling request must not terminate the process.
+        if self.config.profile_dir is not None and hasattr(signal, "SIGUSR2"):
+            signal.signal(signal.SIGUSR2, signal.SIG_IGN)
+
+        # The server calls `callback_notify` from its main loop, so the heartbeat
+        # stops as soon as the event loop is blocked.
+        self.config.callback_notify = self.notify
+        self.config.timeout_notify = 0
         return self.real_target(sockets)
 
+    def is_responsive(self, timeout: float) -> bool:
+        heartbeat = self.heartbeat.value
+        now = time.monotonic()
+        if heartbeat != self.last_heartbeat:
+            self.last_heartbeat = heartbeat
+            self.last_heartbeat_at = now
+            return True
+        # A worker that is still starting up hasn't sent its first heartbeat yet.
+        return heartbeat == 0 or now - self.last_heartbeat_at < timeout
+
     def is_alive(self, timeout: float = 5) -> bool:
         if not self.process.is_alive():
             return False  # pragma: full coverage
 
-        return self.ping(timeout)
+        return self.is_responsive(timeout)
 
     def start(self) -> None:
         self.process.start()
@@ -82,9 +265,6 @@ class Process:
                 os.kill(self.process.pid, signal.SIGTERM)
             logger.info(f"Terminated child process [{self.process.pid}]")
 
-            self.parent_conn.close()
-            self.child_conn.close()
-
     def kill(self) -> None:
         # In Windows, the method will call `TerminateProcess` to kill the process.
         # In Unix, the method will send SIGKILL to the process.
@@ -98,13 +278,17 @@ class Process:
     def pid(self) -> int | None:
         return self.process.pid
 
+    @property
+    def sentinel(self) -> int:
+        return self.process.sentinel
+
 
 class Multiprocess:
     def __init__(
         self,
         config: Config,
-        target: Callable[[list[socket] | None], None],
-        sockets: list[socket],
+        target: Callable[[list[socket.socket] | None], None],
+        sockets: list[socket.socket],
     ) -> None:
         self.config = config
         self.target = target
@@ -112,34 +296,68 @@ class Multiprocess:
 
         self.processes_num = config.workers
         self.processes: list[Process] = []
+        # Processes that were asked to stop, and are still finishing their requests.
+        self.retiring: list[Process] = []
+
+        self.cpu_sets = get_cpu_sets(config.worker_affinity)
+
+        self.autoscaler: Autoscaler | None = None
+        if config.workers_max is not None:
+            self.autoscaler = Autoscaler(
+                min_workers=config.workers, max_workers=config.workers_max, max_in_flight=config.limit_concurrency
+            )
 
         self.should_exit = threading.Event()
 
         self.signal_queue: list[int] = []
-        for sig in SIGNALS:
+        for sig, name in SIGNALS.items():
+            # SIGUSR2 keeps its default action, terminating the process, unless profiling is enabled.
+            if name == "USR2" and config.profile_dir is None:
+                continue
             signal.signal(sig, lambda sig, frame: self.signal_queue.append(sig))
 
+    def new_process(self, cpus: set[int] | None = None) -> Process:
+        if cpus is None and self.cpu_sets:
+            # Place the process on the CPU set that is used by the fewest processes.
+            usage = [sum(process.cpus == cpu_set for process in self.processes) for cpu_set in self.cpu_sets]
+            cpus = self.cpu_sets[usage.index(min(usage))]
+        process = Process(self.config, self.target, self.sockets, cpus=cpus)
+        process.start()
+        return process
+
     def init_processes(self) -> None:
         for _ in range(self.processes_num):
-            process = Process(self.config, self.target, self.sockets)
-            process.start()
-            self.processes.append(process)
+            self.processes.append(self.new_process())
 
     def terminate_all(self) -> None:
         for process in self.processes:
             process.terminate()
 
     def join_all(self) -> None:
-        for process in self.processes:
+        for process in self.processes + self.retiring:
             process.join()
 
+    def add_process(self) -> None:
+        self.processes_num += 1
+        self.processes.append(self.new_process())
+
+    def retire_process(self, process: Process) -> None:
+        self.processes_num -= 1
+        self.processes.remove(process)
+        process.terminate()
+        self.retiring.append(process)
+
+    def reap_retired(self) -> None:
+        for process in list(self.retiring):
+            if not process.process.is_alive():
+                process.join()
+                self.retiring.remove(process)
+
     def restart_all(self) -> None:
         for idx, process in enumerate(self.processes):
             process.terminate()
             process.join()
-            new_process = Process(self.config, self.target, self.sockets)
-            new_process.start()
-            self.processes[idx] = new_process
+            self.processes[idx] = self.new_process(process.cpus)
 
     def run(self) -> None:
         message = f"Started parent process [{os.getpid()}]"
@@ -148,9 +366,13 @@ class Multiprocess:
 
         self.init_processes()
 
-        while not self.should_exit.wait(0.5):
+        while not self.should_exit.is_set():
             self.handle_signals()
             self.keep_subprocess_alive()
+            self.reap_retired()
+            self.autoscale()
+            # Wake up as soon as any child process exits, instead of polling each of them in turn.
+            wait([process.sentinel for process in self.processes], timeout=0.5)
 
         self.terminate_all()
         self.join_all()
@@ -164,9 +386,11 @@ class Multiprocess:
             return  # parent process is exiting, no need to keep subprocess alive
 
         for idx, process in enumerate(self.processes):
-            if process.is_alive():
+            if process.is_alive(self.config.timeout_worker_healthcheck):
                 continue
 
+            if process.process.is_alive():
+                logger.warning(f"Child process [{process.pid}] is not responding, killing it")
             process.kill()  # process is hung, kill it
             process.join()
 
@@ -174,9 +398,33 @@ class Multiprocess:
                 return  # pragma: full coverage
 
             logger.info(f"Child process [{process.pid}] died")
-            process = Process(self.config, self.target, self.sockets)
-            process.start()
-            self.processes[idx] = process
+            self.processes[idx] = self.new_process(process.cpus)
+
+    def autoscale(self) -> None:
+        if self.autoscaler is None or self.should_exit.is_set():
+            return
+
+        # Workers that haven't sent a heartbeat yet are still starting up, and don't report any load.
+        reporting = [process for process in self.processes if process.heartbeat.value]
+        if not reporting:
+            return
+
+        load = sum(process.busy.value for process in reporting) / len(reporting)
+        in_flight = sum(process.pending_tasks.value for process in reporting) / len(reporting)
+        accept_queue = sum(get_accept_queue_depth(sock) for sock in self.sockets)
+        decision = self.autoscaler.decide(len(self.processes), load, in_flight, accept_queue, time.monotonic())
+        if decision > 0:
+            logger.info(
+                f"Workers are overloaded (load {load:.2f}, {in_flight:.1f} requests in flight), "
+                "increasing the number of processes."
+            )
+            self.add_process()
+        elif decision < 0:
+            logger.info(
+                f"Workers are underloaded (load {load:.2f}, {in_flight:.1f} requests in flight), "
+                "decreasing the number of processes."
+            )
+            self.retire_process(min(reporting, key=lambda process: process.pending_tasks.value))
 
     def handle_signals(self) -> None:
         for sig in tuple(self.signal_queue):
@@ -206,17 +454,17 @@ class Multiprocess:
 
     def handle_ttin(self) -> None:  # pragma: py-win32
         logger.info("Received SIGTTIN, increasing the number of processes.")
-        self.processes_num += 1
-        process = Process(self.config, self.target, self.sockets)
-        process.start()
-        self.processes.append(process)
+        self.add_process()
 
     def handle_ttou(self) -> None:  # pragma: py-win32
         logger.info("Received SIGTTOU, decreasing number of processes.")
         if self.processes_num <= 1:
             logger.info("Already reached one process, cannot decrease the number of processes anymore.")
             return
-        self.processes_num -= 1
-        process = self.processes.pop()
-        process.terminate()
-        process.join()
+        self.retire_process(self.processes[-1])
+
+    def handle_usr2(self) -> None:  # pragma: py-win32
+        logger.info("Received SIGUSR2, starting or stopping the profiler of the processes.")
+        for process in self.processes:
+            assert process.pid is not None
+            os.kill(process.pid, signal.SIGUSR2)
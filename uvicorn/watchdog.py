@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import collections
+import logging
+import math
+import sys
+import threading
+import time
+import traceback
+
+logger = logging.getLogger("uvicorn.error")
+
+# Upper bounds of the buckets of the lag histogram, in seconds.
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, math.inf)
+
+
+class LoopWatchdog:
+    """
+    Measures how late a heartbeat scheduled on the event loop runs, and logs the stack of the event
+    loop thread, from a thread of its own, whenever the loop is blocked for longer than `threshold`
+    seconds.
+    """
+
+    def __init__(self, threshold: float, max_stacks: int = 16) -> None:
+        self.threshold = threshold
+        self.interval = threshold / 2
+        # The number of heartbeats for each bucket of `LAG_BUCKETS`.
+        self.histogram = [0] * len(LAG_BUCKETS)
+        self.max_lag = 0.0
+        # The most recent stacks captured while the loop was blocked.
+        self.stacks: collections.deque[str] = collections.deque(maxlen=max_stacks)
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._handle: asyncio.TimerHandle | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._loop_thread_id = 0
+        self._last_beat = 0.0
+        self._reported = False
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Start watching the event loop, which must be running in the current thread.
+        """
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._handle = loop.call_later(self.interval, self._beat, loop.time() + self.interval)
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._watch, name="uvicorn-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        logger.info("Event loop lag: max %.3fs, %s", self.max_lag, self.format_histogram())
+
+    def format_histogram(self) -> str:
+        counts = []
+        for bound, count in zip(LAG_BUCKETS, self.histogram):
+            label = f"<={bound * 1000:g}ms" if bound != math.inf else f">{LAG_BUCKETS[-2] * 1000:g}ms"
+            counts.append(f"{label}: {count}")
+        return ", ".join(counts)
+
+    def _beat(self, expected: float) -> None:
+        assert self._loop is not None
+        now = self._loop.time()
+        lag = max(now - expected, 0.0)
+        self.histogram[bisect.bisect_left(LAG_BUCKETS, lag)] += 1
+        self.max_lag = max(self.max_lag, lag)
+        if lag > self.threshold:
+            logger.warning("The event loop was blocked for %.3f seconds.", lag)
+        self._last_beat = time.monotonic()
+        self._reported = False
+        self._handle = self._loop.call_at(now + self.interval, self._beat, now + self.interval)
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval):
+            blocked = time.monotonic() - self._last_beat - self.interval
+            if blocked <= self.threshold or self._reported:
+                continue
+            # Only the first stack of each blocking call is logged.
+            self._reported = True
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:  # pragma: no cover
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            self.stacks.append(stack)
+            logger.warning("The event loop has been blocked for %.3f seconds, in:\n%s", blocked, stack)